@@ -0,0 +1,53 @@
+"""
+Benchmark of a compiled filter expression against one substring pass per term
+
+Usage: python benchmarks/bench_filter_expression.py [line count]
+"""
+
+import sys
+import os
+import time
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.log.filter_expression import compile_filter
+
+DEFAULT_LINE_COUNT = 1000000
+TERMS = ["error", "warn", "timeout", "channel: 9"]
+
+
+def load_lines(line_count):
+    with open(os.path.join(os.path.dirname(__file__), '..', 'debug', 'ExampleLog.txt'), 'r') as f:
+        example_lines = [line.rstrip('\n') for line in f if line.strip()]
+    return (example_lines * (line_count // len(example_lines) + 1))[:line_count]
+
+
+def filter_per_term(lines):
+    # one lowercase copy and substring pass per term, results merged afterwards
+    matches = set()
+    for term in TERMS:
+        matches.update(index for index, line in enumerate(lines) if term in line.lower())
+    return sorted(matches)
+
+
+def filter_compiled(lower_lines):
+    line_matcher = compile_filter(" | ".join(f'"{term}"' for term in TERMS))
+    return [index for index, line in enumerate(lower_lines) if line_matcher(line)]
+
+
+def measure(name, function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    print(f"{name:<28} {(time.perf_counter() - start_time) * 1000:8.1f} ms  {len(result)} matches")
+    return result
+
+
+if __name__ == "__main__":
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINE_COUNT
+    lines = load_lines(line_count)
+    # the log store keeps a lowercase copy of the lines
+    lower_lines = [line.lower() for line in lines]
+    print(f"filtering {len(lines)} lines for any of {TERMS}")
+    expected = measure("substring pass per term", filter_per_term, lines)
+    assert measure("compiled expression", filter_compiled, lower_lines) == expected
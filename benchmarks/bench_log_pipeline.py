@@ -0,0 +1,46 @@
+"""
+Benchmark of the log processing with synthetic load from the demo load generator
+
+Usage: python benchmarks/bench_log_pipeline.py [line count] [filter]
+"""
+
+import sys
+import os
+import time
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import libs.log.log_controller as log_controller
+from libs.jlink.demo_load_generator import DemoLoadGenerator
+
+DEFAULT_LINE_COUNT = 1000000
+BATCH_LINE_COUNT = 10000
+
+
+class _LogViewStub:
+    max_displayed_lines = 100000
+
+    def update_log(self, text, append):
+        pass
+
+
+if __name__ == "__main__":
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINE_COUNT
+    filter_string = sys.argv[2] if len(sys.argv) > 2 else "ERROR | WARN"
+    generator = DemoLoadGenerator(lines_per_s=0, total_lines=line_count, seed=1)
+    batches = []
+    while not generator.done:
+        batches.append(generator.generate_lines(BATCH_LINE_COUNT))
+
+    log_handler = log_controller.create_log_processor_and_displayer(_LogViewStub())
+    log_handler["process"]("", filter_string=filter_string, highlight_string="sensor")
+    start_time = time.perf_counter()
+    displayed_line_count = 0
+    for batch in batches:
+        update = log_handler["process"](new_lines=batch)
+        # the log view reads the text of the new lines
+        displayed_line_count += sum(1 for _ in update["highlighted_text_list"].texts())
+    elapsed_time = time.perf_counter() - start_time
+    print(f"processed {line_count} lines with filter '{filter_string}' in {elapsed_time * 1000:.1f} ms: "
+          f"{line_count / elapsed_time:,.0f} lines/s, {displayed_line_count} lines displayed")
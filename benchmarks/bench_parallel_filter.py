@@ -0,0 +1,57 @@
+"""
+Benchmark of filtering a large log history in one thread and in a process pool
+
+Usage: python benchmarks/bench_parallel_filter.py [line count]
+"""
+
+import sys
+import os
+import time
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.log.log_store import LogStore, create_line_index_array
+from libs.log.parallel_filter import ParallelFilterEngine, ParallelFilterPass
+from libs.log.progressive_filter import ProgressiveFilterPass
+
+DEFAULT_LINE_COUNT = 2000000
+FILTER_STRING = "channel: 9"
+
+
+def create_log_store(line_count):
+    with open(os.path.join(os.path.dirname(__file__), '..', 'debug', 'ExampleLog.txt'), 'r') as f:
+        example_lines = [line.rstrip('\n') for line in f if line.strip()]
+    store = LogStore()
+    for start in range(0, line_count, len(example_lines)):
+        store.append_lines(example_lines[:line_count - start])
+    return store
+
+
+def apply_filter(store, filter_string, start, stop):
+    filter_string_lower = filter_string.lower()
+    return create_line_index_array(index for index, line in store.iter_lines(start, stop, lower=True) if filter_string_lower in line)
+
+
+def run_pass(name, filter_pass):
+    start_time = time.perf_counter()
+    match_count = 0
+    while not filter_pass.done:
+        match_count += len(filter_pass.run_slice(0.02))
+    elapsed_time = time.perf_counter() - start_time
+    print(f"{name:<24} {elapsed_time * 1000:8.1f} ms  {match_count} matches")
+
+
+if __name__ == "__main__":
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LINE_COUNT
+    store = create_log_store(line_count)
+    print(f"filtering {len(store)} lines for '{FILTER_STRING}'")
+    run_pass("single thread", ProgressiveFilterPass(FILTER_STRING, len(store), lambda f, start, stop: apply_filter(store, f, start, stop)))
+    worker_count = 2
+    while worker_count <= (os.cpu_count() or 1):
+        engine = ParallelFilterEngine(worker_count)
+        # start the pool before measuring
+        engine.submit("", 0, "").result()
+        run_pass(f"{worker_count} processes", ParallelFilterPass(FILTER_STRING, len(store), store, engine, None))
+        engine.shutdown()
+        worker_count *= 2
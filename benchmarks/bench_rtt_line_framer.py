@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of the RTT line framer against the previous string based framing
+
+Usage: python benchmarks/bench_rtt_line_framer.py
+"""
+
+import sys
+import os
+import re
+import time
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.rtt_line_framer import RTTLineFramer
+
+CHUNK_SIZE_BYTES = 4096
+TOTAL_SIZE_BYTES = 32 * 1024 * 1024
+
+
+class LegacyLineFramer:
+    """
+    Framing as previously done in RTTHandler._read_rtt
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._ansi_pattern = re.compile(rb'\x1b\[[0-9;]*[a-zA-Z]')
+
+    def feed(self, data):
+        byte_string = bytes(data)
+        ansi_clean_string = self._ansi_pattern.sub(b'', byte_string)
+        ff_clean_string = ansi_clean_string.replace(b'\n\xff0', b'\n').replace(b'\n\xff', b'\n')
+        latin_string = ff_clean_string.decode('utf-8', errors='ignore')
+        full_string = self._buffer + latin_string
+        lines = full_string.split('\n')
+        self._buffer = lines[-1]
+        return lines[:-1]
+
+
+def create_chunks(colored):
+    with open(os.path.join(os.path.dirname(__file__), '..', 'debug', 'ExampleLog.txt'), 'rb') as f:
+        log_data = f.read()
+    if colored:
+        log_data = log_data.replace(b'ADC', b'\x1b[32mADC\x1b[0m')
+    data = log_data * (TOTAL_SIZE_BYTES // len(log_data) + 1)
+    return [data[i:i + CHUNK_SIZE_BYTES] for i in range(0, TOTAL_SIZE_BYTES, CHUNK_SIZE_BYTES)]
+
+
+def run_benchmark(name, framer, chunks):
+    line_count = 0
+    start_time = time.perf_counter()
+    for chunk in chunks:
+        line_count += len(framer.feed(chunk))
+    elapsed_time = time.perf_counter() - start_time
+    print(f"{name:<24} {elapsed_time * 1000:8.1f} ms  {line_count / elapsed_time / 1e6:6.2f} M lines/s  "
+          f"{TOTAL_SIZE_BYTES / elapsed_time / 1e6:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    for colored in (False, True):
+        chunks = create_chunks(colored)
+        print(f"{len(chunks)} chunks of {CHUNK_SIZE_BYTES} bytes, ANSI colored: {colored}")
+        run_benchmark("legacy string framing", LegacyLineFramer(), chunks)
+        run_benchmark("RTTLineFramer", RTTLineFramer(), chunks)
@@ -0,0 +1,48 @@
+"""
+Benchmark of the maximum sustainable data rate of the RTT read loop against a simulated J-Link
+
+The simulated target produces faster than the reader can read and blocks when
+its up-buffer is full, so the measured rate is limited by the read loop, the
+line framing and the log queue. The simulated producer runs in the read
+thread, so its cost is included and the rate is a lower bound.
+
+Usage: python benchmarks/bench_rtt_reader.py [duration in s]
+"""
+
+import sys
+import os
+import queue
+import time
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.rtt_handler import RTTHandler
+from libs.jlink.simulated_jlink import SimulatedJLink
+
+DEFAULT_DURATION_s = 2.0
+READ_SIZES = [1024, 4096, 16384, 65536]
+UP_BUFFER_SIZE = 65536
+
+
+def measure(read_size, duration_s):
+    log_queue = queue.Queue()
+    jlink = SimulatedJLink(up_buffer_size=UP_BUFFER_SIZE, bytes_per_s=1e9, overflow_mode="block")
+    handler = RTTHandler(log_queue, read_size=read_size, jlink=jlink)
+    handler.connect("SIMULATED_MCU")
+    line_count = 0
+    end_time = time.monotonic() + duration_s
+    while time.monotonic() < end_time:
+        try:
+            line_count += len(log_queue.get(timeout=0.1).get("lines", ()))
+        except queue.Empty:
+            pass
+    handler.disconnect()
+    print(f"read size {read_size:6d}: {jlink.read_byte_count / duration_s / 1e6:7.2f} MB/s  "
+          f"{line_count / duration_s:10,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    duration_s = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DURATION_s
+    for read_size in READ_SIZES:
+        measure(read_size, duration_s)
@@ -0,0 +1,149 @@
+import random
+import time
+
+# Constants
+DEMO_BATCH_INTERVAL_s = 0.01
+DEMO_MEAN_LINE_LENGTH = 80
+DEMO_LINE_LENGTH_DISTRIBUTIONS = ("fixed", "uniform", "exponential")
+DEMO_MAX_LINE_LENGTH = 4096
+DEMO_LEVEL_WEIGHTS = {"DEBUG": 20, "INFO": 70, "WARN": 7, "ERROR": 3}
+# Generated lines are taken from a pool of random lines, only the sequence number is formatted per line
+DEMO_LINE_POOL_SIZE = 4096
+# Upper bound of the lines of one batch, a generator falling behind catches up over several batches
+DEMO_MAX_LINES_PER_BATCH = 100000
+_DEMO_WORDS = ("adc", "channel", "sensor", "value", "raw", "converted", "gpio", "irq", "dma", "uart",
+               "timer", "spi", "i2c", "buffer", "task", "queue", "state", "event", "voltage", "temp")
+
+
+def parse_level_weights(text):
+    """
+    Parse a log level mix like "INFO=70,WARN=20,ERROR=10".
+
+    Returns:
+        dict: Level name to weight.
+
+    Raises:
+        ValueError: If the text is not a valid level mix.
+    """
+    level_weights = {}
+    for item in text.split(','):
+        level, _, weight = item.partition('=')
+        if not level.strip() or not weight.strip():
+            raise ValueError(f"invalid log level weight {item!r}, expected LEVEL=WEIGHT")
+        level_weights[level.strip().upper()] = float(weight)
+    if sum(level_weights.values()) <= 0:
+        raise ValueError("log level weights must not all be 0")
+    return level_weights
+
+
+class DemoLoadGenerator:
+    """
+    Synthetic log line generator for load tests.
+
+    Generates lines at a target rate in lines/s or bytes/s, optionally with
+    bursts of a higher rate, and emits them in batches, so the generator is
+    not the bottleneck of the log processing at high rates.
+    """
+
+    def __init__(self, lines_per_s=None, bytes_per_s=None, mean_line_length=DEMO_MEAN_LINE_LENGTH,
+                 line_length_distribution="uniform", burst_factor=1.0, burst_period_s=0.0, burst_duty=0.1,
+                 level_weights=None, total_lines=None, seed=None):
+        """
+        Args:
+            lines_per_s (float, optional): Target rate in lines/s.
+            bytes_per_s (float, optional): Target rate in bytes/s, used if lines_per_s is not set.
+            mean_line_length (int): Mean length of the generated lines.
+            line_length_distribution (str): "fixed", "uniform" (0.5 to 1.5 times the mean) or "exponential".
+            burst_factor (float): Rate multiplier during bursts.
+            burst_period_s (float): Period of the burst pattern, 0 disables bursts.
+            burst_duty (float): Fraction of each period spent in a burst.
+            level_weights (dict, optional): Log level name to relative frequency.
+            total_lines (int, optional): Number of lines after which the generator stops.
+            seed (int, optional): Random seed for reproducible lines.
+        """
+        if line_length_distribution not in DEMO_LINE_LENGTH_DISTRIBUTIONS:
+            raise ValueError(f"unknown line length distribution {line_length_distribution!r}")
+        self._random = random.Random(seed)
+        self._mean_line_length = max(1, mean_line_length)
+        self._line_length_distribution = line_length_distribution
+        self._level_weights = level_weights or DEMO_LEVEL_WEIGHTS
+        self._line_pool = [self._create_line() for _ in range(DEMO_LINE_POOL_SIZE)]
+        if lines_per_s is None and bytes_per_s is not None:
+            # line feed included
+            mean_pool_line_bytes = sum(len(line) + 1 for line in self._line_pool) / len(self._line_pool)
+            lines_per_s = bytes_per_s / mean_pool_line_bytes
+        self.lines_per_s = lines_per_s
+        self._burst_factor = burst_factor
+        self._burst_period_s = burst_period_s
+        self._burst_duty = burst_duty
+        self._total_lines = total_lines
+        self.generated_line_count = 0
+
+    def _get_line_length(self):
+        if self._line_length_distribution == "fixed":
+            length = self._mean_line_length
+        elif self._line_length_distribution == "uniform":
+            length = self._random.randint(self._mean_line_length // 2, self._mean_line_length * 3 // 2)
+        else:
+            length = int(self._random.expovariate(1.0 / self._mean_line_length))
+        return max(1, min(length, DEMO_MAX_LINE_LENGTH))
+
+    def _create_line(self):
+        level = self._random.choices(list(self._level_weights), weights=list(self._level_weights.values()))[0]
+        length = self._get_line_length()
+        words = [f"[{level}]"]
+        text_length = len(words[0])
+        while text_length < length:
+            word = self._random.choice(_DEMO_WORDS)
+            if self._random.random() < 0.3:
+                word = f"{word}: {self._random.randint(0, 65535)}"
+            words.append(word)
+            text_length += len(word) + 1
+        return ' '.join(words)[:length].rstrip()
+
+    def get_rate(self, elapsed_time_s):
+        """
+        Get the target rate in lines/s at a time since the start.
+        """
+        if self._burst_period_s > 0 and (elapsed_time_s % self._burst_period_s) < self._burst_period_s * self._burst_duty:
+            return self.lines_per_s * self._burst_factor
+        return self.lines_per_s
+
+    @property
+    def done(self):
+        return self._total_lines is not None and self.generated_line_count >= self._total_lines
+
+    def generate_lines(self, count):
+        """
+        Generate the next lines, each line starts with its sequence number.
+        """
+        if self._total_lines is not None:
+            count = min(count, self._total_lines - self.generated_line_count)
+        first_sequence_no = self.generated_line_count
+        pool = self._line_pool
+        pool_size = len(pool)
+        lines = [f"{sequence_no} {pool[sequence_no % pool_size]}" for sequence_no in range(first_sequence_no, first_sequence_no + count)]
+        self.generated_line_count += count
+        return lines
+
+    def run(self, emit_lines, stop_event, batch_interval_s=DEMO_BATCH_INTERVAL_s):
+        """
+        Emit batches of lines at the target rate until stopped or the total line count is reached.
+
+        Args:
+            emit_lines: Function called with each batch of lines.
+            stop_event (threading.Event): Event stopping the generator.
+            batch_interval_s (float): Time between two batches.
+        """
+        start_time = time.monotonic()
+        last_time = start_time
+        due_line_count = 0.0
+        while not self.done and not stop_event.is_set():
+            current_time = time.monotonic()
+            due_line_count += self.get_rate(current_time - start_time) * (current_time - last_time)
+            last_time = current_time
+            line_count = min(int(due_line_count), DEMO_MAX_LINES_PER_BATCH)
+            if line_count > 0:
+                due_line_count -= line_count
+                emit_lines(self.generate_lines(line_count))
+            stop_event.wait(batch_interval_s)
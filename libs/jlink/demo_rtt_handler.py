@@ -2,13 +2,22 @@ import threading
 import queue
 import time
 from libs.jlink.rtt_handler_interface import RTTHandlerInterface
+from libs.jlink.rtt_read_statistics import RTTReadStatistics
 
 class DemoRTTHandler(RTTHandlerInterface):
-    def __init__(self, log_processing_input_queue):
+    def __init__(self, log_processing_input_queue, load_generator=None):
+        """
+        Args:
+            log_processing_input_queue (queue.Queue): Queue receiving the demo lines.
+            load_generator (DemoLoadGenerator, optional): Generator of synthetic load,
+                by default the example log is emitted line by line.
+        """
         self._log_queue = log_processing_input_queue
         self._connected = True  # Demo mode is always "connected"
         self._demo_thread = None
         self._stop_demo = threading.Event()
+        self._load_generator = load_generator
+        self._read_statistics = RTTReadStatistics()
 
     def connect(self, mcu_name, interface='SWD', block_address=None, print_function=None):
         """
@@ -25,6 +34,7 @@ class DemoRTTHandler(RTTHandlerInterface):
             bool: Always returns True in demo mode
         """
         # Start the demo thread when connect is called
+        self._connected = True
         self._start_demo_thread()
         return True
 
@@ -43,8 +53,9 @@ class DemoRTTHandler(RTTHandlerInterface):
         """
         if self._demo_thread is None or not self._demo_thread.is_alive():
             self._stop_demo.clear()
+            self._read_statistics.reset()
             self._demo_thread = threading.Thread(
-                target=self._demo_loop,
+                target=self._demo_loop if self._load_generator is None else self._load_generator_loop,
                 daemon=True
             )
             self._demo_thread.start()
@@ -65,6 +76,28 @@ class DemoRTTHandler(RTTHandlerInterface):
             #if self._stop_demo.wait(timeout=0.001):  # Match original 0.01s cycle pause
             #    break
 
+    def _emit_generated_lines(self, lines):
+        self._read_statistics.record_read(sum(map(len, lines)) + len(lines), False)
+        self._log_queue.put({"lines" : lines, "read_time" : time.monotonic()})
+
+    def _load_generator_loop(self):
+        """
+        Emit synthetic lines of the load generator in batches.
+        """
+        self._load_generator.run(self._emit_generated_lines, self._stop_demo)
+        if self._load_generator.done:
+            self._log_queue.put({"line" : f"[RTT GUI] load generator finished after {self._load_generator.generated_line_count} lines\n"})
+            self._connected = False
+
+    def get_read_statistics(self):
+        """
+        Get statistics of the generated load.
+
+        Returns:
+            dict: bytes/s, batches/s and totals of the generated lines.
+        """
+        return self._read_statistics.snapshot()
+
     def _simple_demo_loop(self):
         """
         Generate demo messages at regular intervals.
@@ -0,0 +1,163 @@
+import struct
+
+# Constants
+ELF_MAGIC = b'\x7fELF'
+ELF_CLASS_32 = 1
+ELF_CLASS_64 = 2
+ELF_DATA_LITTLE_ENDIAN = 1
+ELF_DATA_BIG_ENDIAN = 2
+SECTION_TYPE_SYMTAB = 2
+SECTION_TYPE_DYNSYM = 11
+SECTION_INDEX_UNDEFINED = 0
+# Symbol of the RTT control block in the SEGGER RTT target sources
+RTT_CONTROL_BLOCK_SYMBOL = "_SEGGER_RTT"
+
+# Header field layouts and ELF header sizes per ELF class, without the byte order prefix
+_ELF_HEADER_FORMATS = {
+    # e_type, e_machine, e_version, e_entry, e_phoff, e_shoff, e_flags, e_ehsize, e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx
+    ELF_CLASS_32: ("16xHHIIIIIHHHHHH", 0x34),
+    ELF_CLASS_64: ("16xHHIQQQIHHHHHH", 0x40),
+}
+_SECTION_HEADER_FORMATS = {
+    # sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size, sh_link, sh_info, sh_addralign, sh_entsize
+    ELF_CLASS_32: "IIIIIIIIII",
+    ELF_CLASS_64: "IIQQQQIIQQ",
+}
+_SYMBOL_FORMATS = {
+    # 32 bit: st_name, st_value, st_size, st_info, st_other, st_shndx
+    ELF_CLASS_32: "IIIBBH",
+    # 64 bit: st_name, st_info, st_other, st_shndx, st_value, st_size
+    ELF_CLASS_64: "IBBHQQ",
+}
+
+
+class ELFFormatError(ValueError):
+    """
+    Raised for files that are no ELF files or have a damaged header or symbol table.
+    """
+    pass
+
+
+class ELFSymbolReader:
+    """
+    Minimal pure Python reader of ELF symbol tables.
+
+    Only the ELF header, the section headers and the symbol and string
+    tables are read, so looking up a symbol of a firmware image with debug
+    information stays fast. 32 and 64 bit files of both byte orders are
+    supported.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the ELF file, e.g. the firmware image.
+
+        Raises:
+            OSError: If the file can not be read.
+            ELFFormatError: If the file is no valid ELF file.
+        """
+        self._path = path
+        with open(path, "rb") as f:
+            self._read_headers(f)
+
+    def _read(self, f, offset, size):
+        f.seek(offset)
+        data = f.read(size)
+        if len(data) != size:
+            raise ELFFormatError(f"{self._path}: truncated ELF file")
+        return data
+
+    def _read_headers(self, f):
+        ident = f.read(16)
+        if len(ident) < 16 or ident[:4] != ELF_MAGIC:
+            raise ELFFormatError(f"{self._path}: not an ELF file")
+        self._elf_class = ident[4]
+        if self._elf_class not in _ELF_HEADER_FORMATS:
+            raise ELFFormatError(f"{self._path}: unknown ELF class {self._elf_class}")
+        if ident[5] == ELF_DATA_LITTLE_ENDIAN:
+            self._byte_order = "<"
+        elif ident[5] == ELF_DATA_BIG_ENDIAN:
+            self._byte_order = ">"
+        else:
+            raise ELFFormatError(f"{self._path}: unknown ELF byte order {ident[5]}")
+        header_format, header_size = _ELF_HEADER_FORMATS[self._elf_class]
+        header = struct.unpack(self._byte_order + header_format, self._read(f, 0, header_size))
+        section_header_offset, section_header_size, section_count = header[5], header[10], header[11]
+        section_format = self._byte_order + _SECTION_HEADER_FORMATS[self._elf_class]
+        if section_header_offset == 0:
+            raise ELFFormatError(f"{self._path}: ELF file without section headers")
+        if section_header_size < struct.calcsize(section_format):
+            raise ELFFormatError(f"{self._path}: invalid ELF section header size {section_header_size}")
+        if section_count == 0:
+            # more sections than fit the header field, the count is the size of section 0
+            section_count = self._unpack_section_header(f, section_format, section_header_offset)[5]
+        self._sections = [self._unpack_section_header(f, section_format, section_header_offset + section_no * section_header_size)
+                          for section_no in range(section_count)]
+
+    def _unpack_section_header(self, f, section_format, offset):
+        return struct.unpack(section_format, self._read(f, offset, struct.calcsize(section_format)))
+
+    def _get_symbol_tables(self):
+        """
+        Get the symbol table sections, the full symbol table before the dynamic one.
+        """
+        for section_type in (SECTION_TYPE_SYMTAB, SECTION_TYPE_DYNSYM):
+            for section in self._sections:
+                if section[1] == section_type:
+                    yield section
+
+    def _iterate_symbols(self, f, symbol_table):
+        """
+        Yield name, value and size of the defined symbols of a symbol table section.
+        """
+        symbol_format = struct.Struct(self._byte_order + _SYMBOL_FORMATS[self._elf_class])
+        offset, size, string_table_no, entry_size = symbol_table[4], symbol_table[5], symbol_table[6], symbol_table[9]
+        if entry_size < symbol_format.size or string_table_no >= len(self._sections):
+            raise ELFFormatError(f"{self._path}: invalid ELF symbol table")
+        string_table = self._sections[string_table_no]
+        strings = self._read(f, string_table[4], string_table[5])
+        symbols = self._read(f, offset, size)
+        for symbol_offset in range(0, size - symbol_format.size + 1, entry_size):
+            fields = symbol_format.unpack_from(symbols, symbol_offset)
+            if self._elf_class == ELF_CLASS_32:
+                name_offset, value, symbol_size, section_index = fields[0], fields[1], fields[2], fields[5]
+            else:
+                name_offset, section_index, value, symbol_size = fields[0], fields[3], fields[4], fields[5]
+            if section_index == SECTION_INDEX_UNDEFINED or name_offset >= len(strings):
+                continue
+            name_end = strings.find(b'\0', name_offset)
+            name = strings[name_offset:name_end if name_end >= 0 else len(strings)]
+            yield name, value, symbol_size
+
+    def find_symbol(self, name):
+        """
+        Get the value, e.g. the address, of a defined symbol.
+
+        Returns:
+            int: Symbol value, None if the file has no defined symbol of this name.
+
+        Raises:
+            ELFFormatError: If the symbol table is damaged.
+        """
+        encoded_name = name.encode()
+        with open(self._path, "rb") as f:
+            for symbol_table in self._get_symbol_tables():
+                for symbol_name, value, _ in self._iterate_symbols(f, symbol_table):
+                    if symbol_name == encoded_name:
+                        return value
+        return None
+
+
+def find_rtt_control_block_address(elf_path):
+    """
+    Get the address of the RTT control block from the symbol table of a firmware ELF file.
+
+    Returns:
+        int: Address of _SEGGER_RTT, None if the firmware has no such symbol.
+
+    Raises:
+        OSError: If the file can not be read.
+        ELFFormatError: If the file is no valid ELF file.
+    """
+    return ELFSymbolReader(elf_path).find_symbol(RTT_CONTROL_BLOCK_SYMBOL)
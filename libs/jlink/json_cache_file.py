@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+
+
+def read_json_cache(cache_path, format_version):
+    """
+    Read a JSON cache file.
+
+    Returns:
+        dict: Cache content, empty if the file is missing, damaged or of another format version.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("format_version") != format_version:
+        return {}
+    return cache
+
+
+def write_json_cache(cache_path, format_version, cache):
+    """
+    Write a JSON cache file.
+
+    The file is replaced atomically, so concurrently starting instances
+    never read a partially written cache. Errors are ignored, a cache is only
+    an optimization.
+    """
+    try:
+        cache_directory = os.path.dirname(cache_path) or "."
+        os.makedirs(cache_directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=cache_directory, suffix=".tmp", delete=False) as f:
+            json.dump(dict(cache, format_version=format_version), f)
+        os.replace(f.name, cache_path)
+    except OSError:
+        pass
@@ -0,0 +1,35 @@
+import os
+from libs.jlink.json_cache_file import read_json_cache, write_json_cache
+
+# Constants
+MCU_LIST_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rtt_python_gui", "mcu_list.json")
+MCU_LIST_CACHE_FORMAT_VERSION = 1
+
+
+def load_cached_mcu_list(dll_version, cache_path=MCU_LIST_CACHE_PATH):
+    """
+    Get the cached MCU list of a J-Link DLL version.
+
+    Returns:
+        list: MCU names, None if the list of this DLL version is not cached.
+    """
+    mcu_list = read_json_cache(cache_path, MCU_LIST_CACHE_FORMAT_VERSION).get("dll_versions", {}).get(dll_version)
+    if not isinstance(mcu_list, list):
+        return None
+    return mcu_list
+
+
+def save_mcu_list(dll_version, mcu_list, cache_path=MCU_LIST_CACHE_PATH):
+    """
+    Cache the MCU list of a J-Link DLL version, lists of other DLL versions are kept.
+    """
+    dll_versions = read_json_cache(cache_path, MCU_LIST_CACHE_FORMAT_VERSION).get("dll_versions", {})
+    dll_versions[dll_version] = list(mcu_list)
+    write_json_cache(cache_path, MCU_LIST_CACHE_FORMAT_VERSION, {"dll_versions": dll_versions})
+
+
+def enumerate_supported_mcus(jlink):
+    """
+    Get the names of all devices supported by the J-Link DLL, one DLL call per device.
+    """
+    return [jlink.supported_device(i).name.upper() for i in range(jlink.num_supported_devices())]
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+# Constants
+# Names are indexed by all substrings up to this length, longer queries intersect the postings of their n-grams
+MCU_SEARCH_NGRAM_LENGTH = 3
+# Ranks of a matching name, lower ranks are listed first
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+
+
+class MCUSearchIndex:
+    """
+    Substring search over the MCU names supported by the J-Link DLL.
+
+    All substrings of up to MCU_SEARCH_NGRAM_LENGTH characters of the names
+    are indexed, so a query only verifies the names containing all n-grams
+    of the query instead of scanning the complete list. While characters are
+    typed the query usually extends the previous one, then only the previous
+    matches are narrowed down. Matches are ranked: exact match, prefix
+    matches, other matches, each in the order of the name list.
+    """
+
+    def __init__(self, mcu_names, ngram_length=MCU_SEARCH_NGRAM_LENGTH):
+        """
+        Args:
+            mcu_names (list): MCU names in display order, e.g. the list of the J-Link DLL.
+            ngram_length (int): Maximum length of the indexed substrings.
+        """
+        self._names = list(mcu_names)
+        self._upper_names = [name.upper() for name in self._names]
+        self._ngram_length = ngram_length
+        postings = defaultdict(set)
+        for name_no, upper_name in enumerate(self._upper_names):
+            for length in range(1, ngram_length + 1):
+                for start in range(len(upper_name) - length + 1):
+                    postings[upper_name[start:start + length]].add(name_no)
+        self._postings = dict(postings)
+        # matches of the previous query, in name order
+        self._last_query = None
+        self._last_matches = None
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def names(self):
+        return self._names
+
+    def _get_ngrams(self, query):
+        length = min(len(query), self._ngram_length)
+        return {query[start:start + length] for start in range(len(query) - length + 1)}
+
+    def _find_matches(self, query):
+        """
+        Get the numbers of the names containing the query, in name order.
+        """
+        if self._last_query is not None and self._last_query in query:
+            # the query extends the previous one, its matches contain all new matches
+            return [name_no for name_no in self._last_matches if query in self._upper_names[name_no]]
+        candidates = None
+        for posting in sorted((self._postings.get(ngram, ()) for ngram in self._get_ngrams(query)), key=len):
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                return []
+        if len(query) > self._ngram_length:
+            # the n-grams can be at other positions than in the query
+            candidates = [name_no for name_no in candidates if query in self._upper_names[name_no]]
+        return sorted(candidates)
+
+    def _get_rank(self, name_no, query):
+        upper_name = self._upper_names[name_no]
+        if upper_name == query:
+            return RANK_EXACT
+        if upper_name.startswith(query):
+            return RANK_PREFIX
+        return RANK_SUBSTRING
+
+    def search(self, query):
+        """
+        Get the names containing the query, case insensitive.
+
+        Args:
+            query (str): Part of the MCU name, e.g. typed into the MCU combo.
+
+        Returns:
+            list: Ranked matching names, all names for an empty query.
+        """
+        query = query.strip().upper()
+        if not query:
+            self._last_query = None
+            self._last_matches = None
+            return list(self._names)
+        matches = self._find_matches(query)
+        self._last_query = query
+        self._last_matches = matches
+        ranked_matches = sorted(matches, key=lambda name_no: self._get_rank(name_no, query))
+        return [self._names[name_no] for name_no in ranked_matches]
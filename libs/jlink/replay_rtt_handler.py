@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from libs.jlink.rtt_handler_interface import RTTHandlerInterface
+from libs.jlink.rtt_line_framer import RTTLineFramer
+from libs.jlink.rtt_read_statistics import RTTReadStatistics
+from libs.jlink.rtt_recording import read_recording
+from libs.log.pipeline_metrics import pipeline_metrics
+
+# Constants
+# Replay speed factor, 0 replays as fast as the log processing accepts the lines
+REPLAY_SPEED_REALTIME = 1.0
+REPLAY_SPEED_MAX = 0.0
+# Waits shorter than this are skipped, records are replayed in bursts instead
+REPLAY_MIN_WAIT_TIME_s = 0.001
+
+
+class ReplayRTTHandler(RTTHandlerInterface):
+    """
+    RTT handler replaying a recording made by RTTRecordingWriter.
+
+    The recorded reads are fed through the same line framing as live RTT data
+    with their original timing, scaled by the replay speed.
+    """
+
+    def __init__(self, log_processing_input_queue, recording_path, speed=REPLAY_SPEED_REALTIME):
+        self._log_queue = log_processing_input_queue
+        self._supported_mcu_list = ["REPLAY"]
+        self._recording_path = recording_path
+        self._speed = speed
+        self._connected = False
+        self._replay_thread = None
+        self._stop_replay = threading.Event()
+        self._read_statistics = RTTReadStatistics()
+
+    def connect(self, mcu_name, interface='SWD', block_address=None, print_function=None):
+        """
+        Start the replay of the recording, the MCU and interface are not used.
+
+        Returns:
+            bool: True if the replay was started.
+        """
+        if not os.path.isfile(self._recording_path):
+            raise Exception(f'Connection failed: recording {self._recording_path} not found')
+        self.disconnect()
+        self._stop_replay.clear()
+        self._read_statistics.reset()
+        self._connected = True
+        self._log_queue.put({"line" : f"replaying {self._recording_path}...\n"})
+        self._replay_thread = threading.Thread(target=self._replay, daemon=True)
+        self._replay_thread.start()
+        return True
+
+    def disconnect(self):
+        """
+        Stop the replay.
+        """
+        self._stop_replay.set()
+        if self._replay_thread is not None and self._replay_thread.is_alive():
+            self._replay_thread.join(timeout=1)
+        self._connected = False
+
+    def _replay(self):
+        line_framers = {}
+        start_time = time.monotonic()
+        try:
+            for timestamp_ns, channel, payload in read_recording(self._recording_path):
+                if self._speed > 0:
+                    wait_time_s = start_time + timestamp_ns / 1e9 / self._speed - time.monotonic()
+                    if wait_time_s >= REPLAY_MIN_WAIT_TIME_s and self._stop_replay.wait(wait_time_s):
+                        return
+                elif self._stop_replay.is_set():
+                    return
+                self._read_statistics.record_read(len(payload), False)
+                line_framer = line_framers.setdefault(channel, RTTLineFramer())
+                framing_start_time = time.perf_counter()
+                lines = [line for line in line_framer.feed(payload) if line]
+                pipeline_metrics.record("framing", time.perf_counter() - framing_start_time, len(lines), len(payload))
+                if lines:
+                    # replayed lines are stamped with the replay time, like live reads
+                    self._log_queue.put({"lines" : lines, "read_time" : time.monotonic(), "channel" : channel})
+        except (OSError, ValueError) as e:
+            self._log_queue.put({"line" : f"[RTT GUI] replay failed: {e}\n"})
+            self._connected = False
+            return
+        for channel, line_framer in line_framers.items():
+            lines = [line for line in line_framer.flush() if line]
+            if lines:
+                self._log_queue.put({"lines" : lines, "read_time" : time.monotonic(), "channel" : channel})
+        self._log_queue.put({"line" : "[RTT GUI] replay finished\n"})
+        # the end of the recording ends the session like a disconnected probe
+        self._connected = False
+
+    def get_read_statistics(self):
+        """
+        Get statistics of the replayed reads.
+
+        Returns:
+            dict: bytes/s, reads/s and totals of the replayed reads.
+        """
+        return self._read_statistics.snapshot()
+
+    def get_supported_mcus(self):
+        """
+        Get the list of supported MCUs, a replay does not need an MCU.
+
+        Returns:
+            List of MCU strings.
+        """
+        return self._supported_mcu_list
+
+    @property
+    def is_connected(self):
+        """
+        Check if a replay was started and has neither been stopped nor finished.
+
+        Returns:
+            bool: True if connected, False otherwise.
+        """
+        return self._connected
@@ -0,0 +1,49 @@
+import hashlib
+import os
+from libs.jlink.json_cache_file import read_json_cache, write_json_cache
+
+# Constants
+RTT_BLOCK_ADDRESS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rtt_python_gui", "rtt_block_addresses.json")
+RTT_BLOCK_ADDRESS_CACHE_FORMAT_VERSION = 1
+FIRMWARE_HASH_CHUNK_SIZE_BYTES = 1024 * 1024
+
+
+def get_firmware_hash(firmware_path):
+    """
+    Get the SHA-256 hash of a firmware file, identifies the firmware build in the cache.
+
+    Raises:
+        OSError: If the file can not be read.
+    """
+    firmware_hash = hashlib.sha256()
+    with open(firmware_path, "rb") as f:
+        for chunk in iter(lambda: f.read(FIRMWARE_HASH_CHUNK_SIZE_BYTES), b""):
+            firmware_hash.update(chunk)
+    return firmware_hash.hexdigest()
+
+
+def _get_cache_key(mcu_name, firmware_hash):
+    return f"{mcu_name.upper()}/{firmware_hash}"
+
+
+def load_cached_block_address(mcu_name, firmware_hash, cache_path=RTT_BLOCK_ADDRESS_CACHE_PATH):
+    """
+    Get the cached RTT control block address of a firmware build on an MCU.
+
+    Returns:
+        int: Address of the control block, None if it is not cached.
+    """
+    block_address = read_json_cache(cache_path, RTT_BLOCK_ADDRESS_CACHE_FORMAT_VERSION).get("block_addresses", {}).get(
+        _get_cache_key(mcu_name, firmware_hash))
+    if not isinstance(block_address, int):
+        return None
+    return block_address
+
+
+def save_block_address(mcu_name, firmware_hash, block_address, cache_path=RTT_BLOCK_ADDRESS_CACHE_PATH):
+    """
+    Cache the RTT control block address of a firmware build on an MCU, other entries are kept.
+    """
+    block_addresses = read_json_cache(cache_path, RTT_BLOCK_ADDRESS_CACHE_FORMAT_VERSION).get("block_addresses", {})
+    block_addresses[_get_cache_key(mcu_name, firmware_hash)] = block_address
+    write_json_cache(cache_path, RTT_BLOCK_ADDRESS_CACHE_FORMAT_VERSION, {"block_addresses": block_addresses})
@@ -1,19 +1,134 @@
-import pylink
+import os
 import threading
 import queue
-import re
 import time
-from libs.jlink.rtt_handler_interface import RTTHandlerInterface
+from libs.jlink.elf_symbols import ELFFormatError, RTT_CONTROL_BLOCK_SYMBOL, find_rtt_control_block_address
+from libs.jlink.rtt_handler_interface import (RTTHandlerInterface, CONNECTION_STATE_CONNECTED, CONNECTION_STATE_DISCONNECTED,
+                                              CONNECTION_STATE_RECONNECTING)
+from libs.jlink.mcu_list_cache import MCU_LIST_CACHE_PATH, enumerate_supported_mcus, load_cached_mcu_list, save_mcu_list
+from libs.jlink.rtt_block_address_cache import RTT_BLOCK_ADDRESS_CACHE_PATH, get_firmware_hash, load_cached_block_address, save_block_address
+from libs.jlink.rtt_line_framer import RTTLineFramer
+from libs.jlink.rtt_read_statistics import RTTReadStatistics
+from libs.jlink.rtt_recording import RTTRecordingWriter
+from libs.log.pipeline_metrics import pipeline_metrics
+
+# Constants
+RTT_READ_SIZE_BYTES = 4096
+RTT_MIN_POLL_INTERVAL_s = 0.001
+RTT_MAX_POLL_INTERVAL_s = 0.1
+RTT_OVERFLOW_CHECK_INTERVAL_s = 1.0
+RTT_OVERFLOW_REPORT_INTERVAL_s = 1.0
+# Backoff between the attempts to restart RTT after the connection was lost, e.g. by a target reset
+RTT_RECONNECT_MIN_BACKOFF_s = 0.005
+RTT_RECONNECT_MAX_BACKOFF_s = 0.5
+# Maximum wait of connect for a running MCU list enumeration, connect is called from the GUI thread
+RTT_CONNECT_MCU_LIST_WAIT_s = 0.2
+
+# pylink is imported on first use, see _import_pylink
+pylink = None
+
+
+def _import_pylink():
+    """
+    Import pylink when the J-Link is needed the first time, so starting without a J-Link connection stays fast.
+    """
+    global pylink
+    if pylink is None:
+        import pylink as pylink_module
+        pylink = pylink_module
+    return pylink
+
+
+class RTTUpChannel:
+    """
+    RTT up-channel of the target read by the RTT handler.
+    """
+
+    def __init__(self, index, name="", buffer_size=None, max_read_size=RTT_READ_SIZE_BYTES):
+        """
+        Args:
+            index (int): Up-buffer index.
+            name (str): Name of the up-buffer set by the target firmware.
+            buffer_size (int, optional): Size of the up-buffer, None if unknown.
+            max_read_size (int): Maximum number of bytes per read.
+        """
+        self.index = index
+        self.name = name
+        self.buffer_size = buffer_size
+        # the buffer never holds more than its size, so one read of this size drains it
+        self.read_size = min(max_read_size, buffer_size) if buffer_size else max_read_size
+        # the ring buffer keeps one byte free, a read of this size means more data may be pending
+        self.full_read_size = min(self.read_size, buffer_size - 1) if buffer_size else self.read_size
+
+    def __repr__(self):
+        return f"{self.index} {self.name!r} ({self.buffer_size} bytes)"
+
 
 class RTTHandler(RTTHandlerInterface):
-    def __init__(self, log_processing_input_queue):
-        self._jlink = pylink.JLink()
-        self._supported_mcu_list = [self._jlink.supported_device(i).name.upper() for i in range(self._jlink.num_supported_devices())]
+    def __init__(self, log_processing_input_queue, read_size=RTT_READ_SIZE_BYTES,
+                 min_poll_interval_s=RTT_MIN_POLL_INTERVAL_s, max_poll_interval_s=RTT_MAX_POLL_INTERVAL_s,
+                 recording_path=None, jlink=None, mcu_list_cache_path=MCU_LIST_CACHE_PATH, elf_path=None,
+                 block_address_cache_path=RTT_BLOCK_ADDRESS_CACHE_PATH, reconnect_min_backoff_s=RTT_RECONNECT_MIN_BACKOFF_s,
+                 reconnect_max_backoff_s=RTT_RECONNECT_MAX_BACKOFF_s, channels=None):
+        """
+        Args:
+            log_processing_input_queue (queue.Queue): Queue receiving the RTT lines.
+            read_size (int): Maximum number of bytes per RTT read, reads of smaller up-buffers are sized by the buffer.
+            min_poll_interval_s (float): Poll interval while data is received.
+            max_poll_interval_s (float): Poll interval when the RTT buffer is idle.
+            recording_path (str, optional): File recording the raw RTT reads.
+            jlink (optional): J-Link backend, e.g. a SimulatedJLink, a pylink.JLink created on first use by default.
+            mcu_list_cache_path (str, optional): File caching the supported MCU list per J-Link DLL version, None disables the cache.
+            elf_path (str, optional): Firmware ELF file, the RTT control block address is resolved from its symbol table.
+            block_address_cache_path (str, optional): File caching the control block address per MCU and firmware, None disables the cache.
+            reconnect_min_backoff_s (float): Wait after the first failed reconnect attempt, doubled per attempt.
+            reconnect_max_backoff_s (float): Maximum wait between two reconnect attempts.
+            channels (list, optional): Indices of the up-channels to read, all up-channels of the target by default.
+        """
+        self._jlink = jlink
+        self._jlink_lock = threading.Lock()
+        # the supported MCU list is loaded in the background, see start_loading_supported_mcus
+        self._supported_mcu_list = []
+        self._mcu_list_cache_path = mcu_list_cache_path
+        self._mcu_list_lock = threading.Lock()
+        self._mcu_list_thread = None
+        self._mcu_list_loaded = threading.Event()
+        self._mcu_list_callbacks = []
+        # RTT control block address of the firmware ELF file, resolved on connect
+        self._elf_path = elf_path
+        self._block_address_cache_path = block_address_cache_path
+        self._block_address = None
         self._log_queue = log_processing_input_queue
         self._connected = False
         self._rtt_thread = None
-        self._buffer = ""
-        self._ansi_pattern = re.compile(rb'\x1b\[[0-9;]*[a-zA-Z]')
+        # connection parameters, reused by the reconnect after a lost connection
+        self._mcu_name = None
+        self._interface = None
+        self._reconnecting = False
+        self._reconnect_min_backoff_s = reconnect_min_backoff_s
+        self._reconnect_max_backoff_s = reconnect_max_backoff_s
+        # time the data stopped at a lost connection, the gap marker is inserted in front of the next data
+        self._gap_start_time = None
+        self._disconnect_event = threading.Event()
+        # up-channels to read, discovered once RTT runs, and a line framer per channel
+        self._channel_indices = channels
+        self._up_channels = None
+        self._logged_up_channels = None
+        self._line_framers = {}
+        # polling configuration
+        self._read_size = read_size
+        self._min_poll_interval_s = min_poll_interval_s
+        self._max_poll_interval_s = max_poll_interval_s
+        # read loop statistics
+        self._read_statistics = RTTReadStatistics()
+        self._host_overflow_count = 0
+        self._last_overflow_report_time = 0
+        # recording of the raw RTT reads, one file per connection
+        self._recording_path = recording_path
+        self._recording_count = 0
+        self._recording_writer = None
+        # the read thread may outlive the join timeout of disconnect, the writer is only used under this lock
+        self._recording_lock = threading.Lock()
 
     def connect(self, mcu_name, interface='SWD', block_address=None):
         """
@@ -22,25 +137,40 @@ class RTTHandler(RTTHandlerInterface):
         Args:
             mcu_name (str): Name of the MCU to connect to.
             interface (str): Interface to use ('SWD' or 'JTAG').
-            block_address (int, optional): Address of the RTT control block.
+            block_address (int, optional): Address of the RTT control block, resolved from the firmware ELF file by default.
 
         Returns:
             bool: True if connection was successful, False otherwise.
+
+        Raises:
+            Exception: If the connection failed or the MCU list is still enumerated.
         """
+        _import_pylink()
+        if self._mcu_list_thread is not None and not self._mcu_list_loaded.wait(RTT_CONNECT_MCU_LIST_WAIT_s):
+            # the J-Link is not shared with the MCU list enumeration, don't block the caller until it is done
+            raise Exception('Connection failed: the J-Link DLL is still listing the supported MCUs, connect again in a moment')
         try:
-            self._jlink.open()
+            self._get_jlink().open()
             line = "connecting to %s via %s...\n" % (mcu_name, interface)
             self._log_queue.put({"line" : line  + '\n'})
-            if interface == 'SWD':
-                self._jlink.set_tif(pylink.enums.JLinkInterfaces.SWD)
-            elif interface == 'JTAG':
-                self._jlink.set_tif(pylink.enums.JLinkInterfaces.JTAG)
-            else:
-                raise ValueError(f"Unsupported interface: {interface}")
+            self._set_interface(interface)
             self._jlink.connect(mcu_name)
+            self._mcu_name = mcu_name
+            self._interface = interface
             self._log_queue.put({"line" : "connected, starting RTT...\n"})
+            if block_address is None:
+                block_address = self._resolve_block_address(mcu_name)
             self._jlink.rtt_start(block_address)
+            self._block_address = block_address
+            self._disconnect_event.clear()
+            self._reconnecting = False
+            self._gap_start_time = None
             self._connected = True
+            self._read_statistics.reset()
+            self._up_channels = None
+            self._line_framers = {}
+            if self._recording_path:
+                self._start_recording()
 
             # Start RTT read thread
             self._rtt_thread = threading.Thread(
@@ -59,64 +189,354 @@ class RTTHandler(RTTHandlerInterface):
         Disconnect from the MCU and stop RTT.
         """
         if self._connected:
-            self._jlink.close()
             self._connected = False
+            # ends the wait of a pending reconnect
+            self._disconnect_event.set()
+            if self._rtt_thread is not None and self._rtt_thread is not threading.current_thread():
+                self._rtt_thread.join(timeout=1)
+            self._jlink.close()
+        self._stop_recording()
+
+    def _set_interface(self, interface):
+        if interface == 'SWD':
+            self._jlink.set_tif(pylink.enums.JLinkInterfaces.SWD)
+        elif interface == 'JTAG':
+            self._jlink.set_tif(pylink.enums.JLinkInterfaces.JTAG)
+        else:
+            raise ValueError(f"Unsupported interface: {interface}")
+
+    def _resolve_block_address(self, mcu_name):
+        """
+        Get the RTT control block address of the firmware ELF file, cached per MCU and firmware build.
 
-    def remove_ansi_bytes(self, byte_str: bytes) -> bytes:
+        Returns:
+            int: Address of the control block, None if the J-Link has to search the target RAM for it.
         """
-        Remove ANSI escape sequences from a byte string.
+        if not self._elf_path:
+            return None
+        try:
+            firmware_hash = get_firmware_hash(self._elf_path)
+            block_address = None
+            if self._block_address_cache_path:
+                block_address = load_cached_block_address(mcu_name, firmware_hash, self._block_address_cache_path)
+            if block_address is None:
+                block_address = find_rtt_control_block_address(self._elf_path)
+                if block_address is not None and self._block_address_cache_path:
+                    save_block_address(mcu_name, firmware_hash, block_address, self._block_address_cache_path)
+        except (OSError, ELFFormatError) as e:
+            self._log_queue.put({"line" : f"[RTT GUI] can not read the RTT control block address from the firmware: {e}\n"})
+            return None
+        if block_address is None:
+            self._log_queue.put({"line" : f"[RTT GUI] no {RTT_CONTROL_BLOCK_SYMBOL} symbol in {self._elf_path}, searching the target RAM\n"})
+            return None
+        self._log_queue.put({"line" : f"RTT control block at 0x{block_address:08X}\n"})
+        return block_address
+
+    def _get_jlink(self):
+        """
+        Get the J-Link, a pylink.JLink is created on first use.
+        """
+        with self._jlink_lock:
+            if self._jlink is None:
+                self._jlink = _import_pylink().JLink()
+            return self._jlink
+
+    def start_loading_supported_mcus(self, on_loaded=None):
+        """
+        Load the supported MCU list in a background thread.
+
+        The list is taken from the cache if the J-Link DLL version did not
+        change, otherwise it is enumerated from the DLL and cached.
 
         Args:
-            byte_str (bytes): Input byte string containing ANSI codes.
+            on_loaded (optional): Function called with the MCU list once it is loaded,
+                from the loading thread or right away if it is loaded already.
+        """
+        with self._mcu_list_lock:
+            if not self._mcu_list_loaded.is_set():
+                if on_loaded is not None:
+                    self._mcu_list_callbacks.append(on_loaded)
+                    on_loaded = None
+                if self._mcu_list_thread is None:
+                    self._mcu_list_thread = threading.Thread(target=self._load_supported_mcus, daemon=True)
+                    self._mcu_list_thread.start()
+        if on_loaded is not None:
+            on_loaded(self._supported_mcu_list)
+
+    def _load_supported_mcus(self):
+        mcu_list = []
+        try:
+            jlink = self._get_jlink()
+            # the DLL version is only known for a real J-Link
+            dll_version = getattr(jlink, "version", None) if self._mcu_list_cache_path else None
+            mcu_list = load_cached_mcu_list(dll_version, self._mcu_list_cache_path) if dll_version else None
+            if mcu_list is None:
+                mcu_list = enumerate_supported_mcus(jlink)
+                if dll_version:
+                    save_mcu_list(dll_version, mcu_list, self._mcu_list_cache_path)
+        except Exception:
+            # no J-Link DLL, connecting reports the error
+            mcu_list = mcu_list or []
+        with self._mcu_list_lock:
+            self._supported_mcu_list = mcu_list
+            self._mcu_list_loaded.set()
+            callbacks, self._mcu_list_callbacks = self._mcu_list_callbacks, []
+        for callback in callbacks:
+            callback(mcu_list)
+
+    def _start_recording(self):
+        """
+        Start recording the raw RTT reads, later connections are recorded to numbered files.
+        """
+        self._stop_recording()
+        path = self._recording_path
+        if self._recording_count > 0:
+            root, extension = os.path.splitext(path)
+            path = f"{root}-{self._recording_count + 1}{extension}"
+        self._recording_count += 1
+        with self._recording_lock:
+            self._recording_writer = RTTRecordingWriter(path)
+        self._log_queue.put({"line" : f"recording RTT data to {path}\n"})
+
+    def _stop_recording(self):
+        with self._recording_lock:
+            recording_writer, self._recording_writer = self._recording_writer, None
+        if recording_writer is not None:
+            recording_writer.close()
+
+    def _insert_lines_in_log_processing_queue(self, lines, read_time=None, channel=0):
+        """
+        Put all lines of one RTT read as a single batch into the log queue.
+
+        The batch carries the time.monotonic() time of the read, used to track the latency to the display,
+        and the up-channel the lines were read from.
+        """
+        lines = [line for line in lines if line]  # Skip empty lines
+        if lines:
+            self._log_queue.put({"lines" : lines, "read_time" : read_time, "channel" : channel})
+
+    def _process_rtt_data(self, data, read_time=None, channel=0):
+        """
+        Parse RTT data of an up-channel into lines and put them into the log queue.
+        """
+        line_framer = self._line_framers.get(channel)
+        if line_framer is None:
+            line_framer = self._line_framers[channel] = RTTLineFramer()
+        start_time = time.perf_counter()
+        lines = line_framer.feed(data)
+        pipeline_metrics.record("framing", time.perf_counter() - start_time, len(lines), len(data))
+        self._insert_lines_in_log_processing_queue(lines, read_time, channel)
+
+    def _discover_up_channels(self):
+        """
+        Get the up-channels to read from the RTT control block of the target.
+
+        Raises:
+            pylink.JLinkException: If the control block was not found yet.
+        """
+        up_buffer_count = self._jlink.rtt_get_num_up_buffers()
+        if self._channel_indices is None:
+            channel_indices = range(up_buffer_count)
+        else:
+            channel_indices = [index for index in self._channel_indices if index < up_buffer_count]
+        up_channels = []
+        for index in channel_indices:
+            descriptor = self._jlink.rtt_get_buf_descriptor(index, True)
+            if descriptor.SizeOfBuffer == 0 and self._channel_indices is None:
+                # channel not configured by the firmware
+                continue
+            name = descriptor.acName.decode(errors="replace") if isinstance(descriptor.acName, bytes) else str(descriptor.acName)
+            up_channels.append(RTTUpChannel(index, name, descriptor.SizeOfBuffer, self._read_size))
+        if repr(up_channels) != self._logged_up_channels:
+            self._logged_up_channels = repr(up_channels)
+            self._log_queue.put({"line" : f"RTT up-channels: {', '.join(repr(up_channel) for up_channel in up_channels)}\n"})
+        return up_channels
+
+    def _get_up_channels(self):
+        """
+        Get the up-channels to read, the requested channels or channel 0 as long as the control block was not found.
+        """
+        if self._up_channels is None:
+            try:
+                self._up_channels = self._discover_up_channels()
+            except pylink.JLinkException:
+                return [RTTUpChannel(index, max_read_size=self._read_size) for index in (self._channel_indices or [0])]
+        return self._up_channels
+
+    def _read_up_channel(self, up_channel):
+        """
+        Read the pending data of an up-channel.
 
         Returns:
-            bytes: Cleaned byte string without ANSI sequences.
+            int: Number of read bytes.
+        """
+        read_start_time = time.perf_counter()
+        data = self._jlink.rtt_read(up_channel.index, up_channel.read_size)
+        read_time = time.monotonic()
+        num_bytes = len(data)
+        pipeline_metrics.record("read", time.perf_counter() - read_start_time, byte_count=num_bytes)
+        self._read_statistics.record_read(num_bytes, num_bytes >= up_channel.full_read_size)
+        if data:
+            if self._gap_start_time is not None:
+                self._insert_gap_marker(read_time)
+            with self._recording_lock:
+                if self._recording_writer is not None:
+                    self._recording_writer.write(up_channel.index, data)
+            self._process_rtt_data(data, read_time, up_channel.index)
+        if up_channel.buffer_size and num_bytes >= up_channel.buffer_size - 1:
+            # the complete target buffer was filled since the last read, the ring buffer keeps one byte free
+            self._report_overflow(f"read returned the complete up-buffer {up_channel.index} ({num_bytes} bytes)")
+        return num_bytes
+
+    def _report_overflow(self, reason):
+        """
+        Count a suspected overflow and report it in the log, at most once per report interval.
         """
-        cleaned = self._ansi_pattern.sub(b'', byte_str)
-        return cleaned
+        self._read_statistics.record_overflow(reason)
+        current_time = time.monotonic()
+        if current_time - self._last_overflow_report_time >= RTT_OVERFLOW_REPORT_INTERVAL_s:
+            self._last_overflow_report_time = current_time
+            self._log_queue.put({"line" : f"[RTT GUI] suspected RTT buffer overflow: {reason}\n"})
 
-    def _insert_lines_in_log_processing_queue(self, lines):
-        for line in lines:
-            if line:  # Skip empty lines
-                self._log_queue.put({"line" : line  + '\n'})
+    def _check_host_overflow(self):
+        """
+        Check the J-Link RTT status for host side overflows.
+        """
+        try:
+            host_overflow_count = self._jlink.rtt_get_status().HostOverflowCount
+        except pylink.JLinkException:
+            return
+        if host_overflow_count > self._host_overflow_count:
+            self._report_overflow(f"J-Link host overflow count increased to {host_overflow_count}")
+        self._host_overflow_count = host_overflow_count
 
     def _read_rtt(self):
         """
-        Continuously read RTT data, parse into lines, and put each line into the log queue.
+        Continuously read RTT data, parse into lines, and put the lines into the log queue.
+
+        Each polling pass reads every up-channel once, with reads sized by the channel
+        buffers, so a busy channel can not starve the others. Polling adapts to the data
+        rate: while a read returns a full chunk the next pass starts immediately, while
+        all channels are idle the poll interval backs off up to the maximum poll interval.
         """
+        poll_interval_s = self._min_poll_interval_s
+        last_overflow_check_time = time.monotonic()
         while self._connected:
             try:
-                data = self._jlink.rtt_read(0, 4096)
-                if data:
-                    byte_string = bytes(data)
-                    ansi_clean_string = self.remove_ansi_bytes(byte_string)
-                    ff_clean_string = ansi_clean_string.replace(b'\n\xff0', b'\n').replace(b'\n\xff', b'\n')
-                    latin_string = ff_clean_string.decode('utf-8', errors='ignore') # first two bytes used in header?
-                    full_string = self._buffer + latin_string
-                    if full_string.endswith('\n'):
-                        # Complete data, process all lines
-                        lines = full_string.split('\n')
-                        self._insert_lines_in_log_processing_queue(lines)
-                        self._buffer = ""
-                    else:
-                        # Incomplete data, accumulate in buffer
-                        lines = full_string.split('\n')
-                        self._insert_lines_in_log_processing_queue(lines[:-1])
-                        self._buffer = lines[-1]
+                num_bytes = 0
+                read_full = False
+                for up_channel in self._get_up_channels():
+                    channel_byte_count = self._read_up_channel(up_channel)
+                    num_bytes += channel_byte_count
+                    read_full = read_full or channel_byte_count >= up_channel.full_read_size
+                current_time = time.monotonic()
+                if current_time - last_overflow_check_time >= RTT_OVERFLOW_CHECK_INTERVAL_s:
+                    self._check_host_overflow()
+                    last_overflow_check_time = current_time
+            except pylink.JLinkException as e:
+                if not self._reconnect(e):
+                    break
+                poll_interval_s = self._min_poll_interval_s
+                continue
+            if read_full:
+                # more data pending, read again immediately
+                poll_interval_s = self._min_poll_interval_s
+                continue
+            if num_bytes > 0:
+                poll_interval_s = self._min_poll_interval_s
+            else:
+                poll_interval_s = min(poll_interval_s * 2, self._max_poll_interval_s)
+            time.sleep(poll_interval_s)
+
+    def _restart_rtt(self):
+        """
+        Start RTT again on the open J-Link, the target is only connected again if the probe lost it.
+
+        Raises:
+            pylink.JLinkException: If RTT does not run yet, e.g. the target is still in reset.
+        """
+        try:
+            self._jlink.rtt_stop()
+        except pylink.JLinkException:
+            pass
+        if not self._jlink.target_connected():
+            if not self._jlink.opened():
+                self._jlink.open()
+                self._set_interface(self._interface)
+            self._jlink.connect(self._mcu_name)
+        self._jlink.rtt_start(self._block_address)
+        # fails until the target firmware initialized the control block
+        self._up_channels = self._discover_up_channels()
+        self._host_overflow_count = self._jlink.rtt_get_status().HostOverflowCount
+
+    def _reconnect(self, error):
+        """
+        Restart RTT after the connection was lost, e.g. by a target reset, with exponential backoff.
+
+        The open J-Link and the control block address of the connect are reused, so RTT
+        runs again right after the target is back. The log is kept, a gap marker with
+        the time without data is inserted in front of the first data after the reconnect.
 
+        Returns:
+            bool: True if RTT runs again, False if the handler was disconnected meanwhile.
+        """
+        lost_time = time.monotonic()
+        # without data since a previous reconnect the gap started at that loss
+        if self._gap_start_time is None:
+            self._gap_start_time = lost_time
+        self._reconnecting = True
+        # the rest of the incomplete last lines was lost with the target buffers
+        for channel, line_framer in self._line_framers.items():
+            self._insert_lines_in_log_processing_queue(line_framer.flush(), lost_time, channel)
+        self._log_queue.put({"line" : f"[RTT GUI] RTT connection lost ({error}), reconnecting...\n"})
+        backoff_s = self._reconnect_min_backoff_s
+        while self._connected:
+            try:
+                self._restart_rtt()
+                break
             except pylink.JLinkException:
+                pass
+            if self._disconnect_event.wait(backoff_s):
                 break
-            time.sleep(0.1)
+            backoff_s = min(backoff_s * 2, self._reconnect_max_backoff_s)
+        self._reconnecting = False
+        if not self._connected:
+            return False
+        self._read_statistics.record_reconnect(time.monotonic() - lost_time)
+        return True
+
+    def _insert_gap_marker(self, read_time):
+        """
+        Mark the gap in the log before the first data read after a reconnect.
+        """
+        gap_s = read_time - self._gap_start_time
+        self._gap_start_time = None
+        self._log_queue.put({"line" : f"[RTT GUI] ---------- reconnected, no data for {gap_s * 1000:.0f} ms ----------\n"})
+
+    def get_read_statistics(self):
+        """
+        Get statistics of the RTT read loop.
+
+        Returns:
+            dict: bytes/s, read calls/s, totals and suspected overflow events.
+        """
+        return self._read_statistics.snapshot()
 
     def get_supported_mcus(self):
         """
-        Get the list of supported MCUs.
+        Get the list of supported MCUs, waits until the list is loaded.
 
         Returns:
             List of MCU strings.
         """
+        self.start_loading_supported_mcus()
+        self._mcu_list_loaded.wait()
         return self._supported_mcu_list
 
+    @property
+    def supported_mcu_list(self):
+        return self.get_supported_mcus()
+
     @property
     def is_connected(self):
         """
@@ -127,6 +547,22 @@ class RTTHandler(RTTHandlerInterface):
         """
         return self._connected
 
+    @property
+    def up_channels(self):
+        """
+        Get the up-channels read from the target, empty until RTT runs.
+
+        Returns:
+            list: RTTUpChannel of each read up-channel.
+        """
+        return list(self._up_channels or [])
+
+    @property
+    def connection_state(self):
+        if not self._connected:
+            return CONNECTION_STATE_DISCONNECTED
+        return CONNECTION_STATE_RECONNECTING if self._reconnecting else CONNECTION_STATE_CONNECTED
+
     @property
     def log_queue(self):
         """
@@ -1,6 +1,12 @@
 from abc import ABC, abstractmethod
 import queue
 
+# Constants
+CONNECTION_STATE_DISCONNECTED = "disconnected"
+CONNECTION_STATE_CONNECTED = "connected"
+# connected, but the connection to the target was lost and is restored
+CONNECTION_STATE_RECONNECTING = "reconnecting"
+
 class RTTHandlerInterface(ABC):
     """
     Abstract base class for RTT handlers.
@@ -44,6 +50,27 @@ class RTTHandlerInterface(ABC):
         """
         pass
     
+    def start_loading_supported_mcus(self, on_loaded=None):
+        """
+        Start loading the list of supported MCUs without blocking.
+
+        Handlers with a static MCU list call on_loaded right away.
+
+        Args:
+            on_loaded (optional): Function called with the MCU list once it is loaded.
+        """
+        if on_loaded is not None:
+            on_loaded(self.get_supported_mcus())
+
+    def get_read_statistics(self):
+        """
+        Get statistics of the RTT read loop.
+
+        Returns:
+            dict: Statistics values, empty if the handler does not collect statistics.
+        """
+        return {}
+
     @property
     @abstractmethod
     def is_connected(self):
@@ -55,6 +82,16 @@ class RTTHandlerInterface(ABC):
         """
         pass
     
+    @property
+    def connection_state(self):
+        """
+        Get the connection state, handlers without automatic reconnect are connected or disconnected.
+
+        Returns:
+            str: One of the CONNECTION_STATE_* constants.
+        """
+        return CONNECTION_STATE_CONNECTED if self.is_connected else CONNECTION_STATE_DISCONNECTED
+
     @property
     def log_queue(self):
         """
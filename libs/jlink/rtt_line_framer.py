@@ -0,0 +1,95 @@
+import re
+
+# Constants
+RTT_MAX_LINE_LENGTH_BYTES = 64 * 1024
+
+# ANSI CSI escape sequences
+_ANSI_ESCAPE_PATTERN = re.compile(rb'\x1b\[[0-9;]*[a-zA-Z]')
+# SEGGER terminal switch markers (0xFF + terminal id)
+_TERMINAL_SWITCH_PATTERN = re.compile(rb'\xff[0-9A-Fa-f]?')
+
+
+class RTTLineFramer:
+    """
+    Incremental line framer for raw RTT data.
+
+    Received bytes are collected in a bytearray and only complete lines are
+    decoded. Escape sequences and UTF-8 characters can not contain a line feed,
+    so sequences split across two reads are kept in the pending partial line
+    until the rest arrives. Each chunk is cleaned, decoded and split in one pass.
+    """
+
+    def __init__(self, max_line_length=RTT_MAX_LINE_LENGTH_BYTES):
+        self._pending = bytearray()
+        self._max_line_length = max_line_length
+
+    @property
+    def pending_byte_count(self):
+        """
+        Number of bytes of the incomplete last line.
+        """
+        return len(self._pending)
+
+    def _decode_lines(self, data):
+        if b'\x1b' in data:
+            data = _ANSI_ESCAPE_PATTERN.sub(b'', data)
+        if b'\xff' in data:
+            data = _TERMINAL_SWITCH_PATTERN.sub(b'', data)
+        text = data.decode('utf-8', errors='ignore')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+        return text.split('\n')
+
+    def _split_overlong_line(self):
+        """
+        Emit the start of an overlong partial line, split at a UTF-8 character boundary.
+        """
+        split_index = self._max_line_length
+        while split_index > 0 and (self._pending[split_index] & 0xC0) == 0x80:
+            split_index -= 1
+        data = self._pending[:split_index]
+        del self._pending[:split_index]
+        return self._decode_lines(data)
+
+    def feed(self, data):
+        """
+        Add received RTT data and get the lines completed by it.
+
+        Args:
+            data: Received bytes (bytes, bytearray, memoryview or list of ints).
+
+        Returns:
+            list: Completed lines without line endings.
+        """
+        self._pending.extend(data)
+        end_index = self._pending.rfind(b'\n') + 1
+        if end_index == 0:
+            if len(self._pending) > self._max_line_length:
+                return self._split_overlong_line()
+            return []
+
+        complete_data = self._pending[:end_index]
+        del self._pending[:end_index]
+        lines = self._decode_lines(complete_data)
+        # drop the empty string following the last line feed
+        lines.pop()
+        return lines
+
+    def flush(self):
+        """
+        Get the incomplete last line and reset the framer.
+
+        Returns:
+            list: The pending partial line, empty if there is none.
+        """
+        data = self._pending
+        self._pending = bytearray()
+        if not data:
+            return []
+        return self._decode_lines(data)
+
+    def reset(self):
+        """
+        Drop all pending data.
+        """
+        self._pending = bytearray()
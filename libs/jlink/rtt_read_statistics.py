@@ -0,0 +1,108 @@
+import threading
+import time
+
+# Constants
+STATISTICS_RATE_INTERVAL_s = 1.0
+
+
+class RTTReadStatistics:
+    """
+    Thread safe statistics of the RTT read loop.
+
+    Counts read calls, received bytes, suspected overflow events and
+    reconnects and derives bytes/s and read calls/s over the last rate
+    interval.
+    """
+
+    def __init__(self, rate_interval_s=STATISTICS_RATE_INTERVAL_s):
+        self._lock = threading.Lock()
+        self._rate_interval_s = rate_interval_s
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._total_bytes = 0
+            self._total_reads = 0
+            self._full_reads = 0
+            self._overflow_events = 0
+            self._last_overflow_reason = ""
+            self._reconnects = 0
+            self._last_reconnect_downtime_s = 0.0
+            self._interval_start_time = time.monotonic()
+            self._interval_bytes = 0
+            self._interval_reads = 0
+            self._bytes_per_s = 0.0
+            self._reads_per_s = 0.0
+
+    def _update_rates(self, current_time):
+        elapsed_time = current_time - self._interval_start_time
+        if elapsed_time >= self._rate_interval_s:
+            self._bytes_per_s = self._interval_bytes / elapsed_time
+            self._reads_per_s = self._interval_reads / elapsed_time
+            self._interval_start_time = current_time
+            self._interval_bytes = 0
+            self._interval_reads = 0
+
+    def record_read(self, num_bytes, full=False):
+        """
+        Record one RTT read call.
+
+        Args:
+            num_bytes (int): Number of bytes returned by the read.
+            full (bool): True if the read returned the maximum requested size.
+        """
+        with self._lock:
+            self._total_bytes += num_bytes
+            self._total_reads += 1
+            self._interval_bytes += num_bytes
+            self._interval_reads += 1
+            if full:
+                self._full_reads += 1
+            self._update_rates(time.monotonic())
+
+    def record_overflow(self, reason):
+        """
+        Record a suspected overflow of the target RTT buffer.
+
+        Args:
+            reason (str): Description of why an overflow is suspected.
+        """
+        with self._lock:
+            self._overflow_events += 1
+            self._last_overflow_reason = reason
+
+    def record_reconnect(self, downtime_s):
+        """
+        Record a restored connection.
+
+        Args:
+            downtime_s (float): Time without RTT data between the lost and the restored connection.
+        """
+        with self._lock:
+            self._reconnects += 1
+            self._last_reconnect_downtime_s = downtime_s
+
+    @property
+    def overflow_events(self):
+        return self._overflow_events
+
+    def snapshot(self):
+        """
+        Get the current statistics.
+
+        Returns:
+            dict: Statistics values.
+        """
+        with self._lock:
+            self._update_rates(time.monotonic())
+            return {
+                "bytes_per_s": self._bytes_per_s,
+                "reads_per_s": self._reads_per_s,
+                "total_bytes": self._total_bytes,
+                "total_reads": self._total_reads,
+                "full_reads": self._full_reads,
+                "overflow_events": self._overflow_events,
+                "last_overflow_reason": self._last_overflow_reason,
+                "reconnects": self._reconnects,
+                "last_reconnect_downtime_s": self._last_reconnect_downtime_s,
+            }
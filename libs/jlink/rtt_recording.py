@@ -0,0 +1,100 @@
+import queue
+import struct
+import threading
+import time
+
+# Constants
+# File header: magic, format version, wall clock start time in ns since the epoch
+RECORDING_MAGIC = b"RTTREC"
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct("<6sHQ")
+# Record header: timestamp in ns since the start of the recording, channel, payload length
+RECORDING_RECORD_HEADER = struct.Struct("<QBI")
+RECORDING_WRITE_BUFFER_BYTES = 256 * 1024
+RECORDING_FILE_EXTENSION = ".rttrec"
+
+
+class RecordingFormatError(ValueError):
+    """
+    Raised for files which are not RTT recordings or have an unsupported version.
+    """
+    pass
+
+
+class RTTRecordingWriter:
+    """
+    Append-only writer of raw RTT reads.
+
+    The RTT read loop only timestamps the data and puts it into a queue, a
+    background thread packs the records and writes them with buffered I/O, so
+    the read loop does not wait for the disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._start_time_ns = time.monotonic_ns()
+        self._file = open(path, "wb", buffering=RECORDING_WRITE_BUFFER_BYTES)
+        self._file.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, time.time_ns()))
+        self._record_queue = queue.SimpleQueue()
+        self._writer_thread = threading.Thread(target=self._write_records, daemon=True)
+        self._writer_thread.start()
+
+    def write(self, channel, data):
+        """
+        Record the data of one RTT read.
+
+        Args:
+            channel (int): RTT up-buffer index.
+            data: Read bytes (bytes, bytearray or list of ints).
+        """
+        self._record_queue.put((time.monotonic_ns() - self._start_time_ns, channel, bytes(data)))
+
+    def _write_records(self):
+        while True:
+            record = self._record_queue.get()
+            if record is None:
+                break
+            timestamp_ns, channel, payload = record
+            self._file.write(RECORDING_RECORD_HEADER.pack(timestamp_ns, channel, len(payload)))
+            self._file.write(payload)
+        self._file.close()
+
+    def close(self):
+        """
+        Write all queued records and close the file.
+        """
+        if self._writer_thread.is_alive():
+            self._record_queue.put(None)
+            self._writer_thread.join()
+
+
+def read_recording(path):
+    """
+    Read the records of an RTT recording.
+
+    A record truncated by an interrupted recording ends the recording.
+
+    Yields:
+        tuple: (timestamp in ns since the start of the recording, channel, payload bytes)
+
+    Raises:
+        RecordingFormatError: If the file is not a supported RTT recording.
+    """
+    with open(path, "rb") as f:
+        header = f.read(RECORDING_HEADER.size)
+        if len(header) < RECORDING_HEADER.size:
+            raise RecordingFormatError(f"{path} is not an RTT recording")
+        magic, version, _ = RECORDING_HEADER.unpack(header)
+        if magic != RECORDING_MAGIC:
+            raise RecordingFormatError(f"{path} is not an RTT recording")
+        if version != RECORDING_VERSION:
+            raise RecordingFormatError(f"unsupported RTT recording version {version}")
+        while True:
+            record_header = f.read(RECORDING_RECORD_HEADER.size)
+            if len(record_header) < RECORDING_RECORD_HEADER.size:
+                return
+            timestamp_ns, channel, length = RECORDING_RECORD_HEADER.unpack(record_header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield timestamp_ns, channel, payload
@@ -0,0 +1,118 @@
+from libs.jlink.demo_load_generator import DemoLoadGenerator, DEMO_LINE_LENGTH_DISTRIBUTIONS, DEMO_MEAN_LINE_LENGTH, parse_level_weights
+from libs.jlink.demo_rtt_handler import DemoRTTHandler
+from libs.jlink.mcu_list_cache import MCU_LIST_CACHE_PATH
+from libs.jlink.replay_rtt_handler import ReplayRTTHandler, REPLAY_SPEED_REALTIME
+from libs.jlink.rtt_block_address_cache import RTT_BLOCK_ADDRESS_CACHE_PATH
+from libs.jlink.rtt_handler import RTTHandler, RTT_READ_SIZE_BYTES, RTT_MIN_POLL_INTERVAL_s, RTT_MAX_POLL_INTERVAL_s
+from libs.jlink.simulated_jlink import SimulatedJLink, SimulatedUpBuffer, SIMULATED_BYTES_PER_s, SIMULATED_OVERFLOW_MODES, SIMULATED_UP_BUFFER_SIZE
+
+
+def parse_rtt_channels(text):
+    """
+    Parse a comma separated list of RTT up-channel indices, "all" for all channels.
+
+    Returns:
+        list: Channel indices, None for all channels.
+
+    Raises:
+        ValueError: If the text is not a valid channel list.
+    """
+    if text.strip().lower() == "all":
+        return None
+    channels = sorted({int(channel) for channel in text.split(',')})
+    if any(channel < 0 for channel in channels):
+        raise ValueError(f"invalid RTT channel list {text!r}, channels must not be negative")
+    return channels
+
+
+def add_rtt_source_arguments(parser):
+    """
+    Add the command line arguments selecting and configuring the RTT data source.
+
+    Shared by the GUI and the headless CLI.
+    """
+    parser.add_argument('--demo-messages', action='store_true', help='Enable demo mode with sample log messages')
+    parser.add_argument('--demo-lines-per-s', type=float, default=None, help='Demo mode with synthetic lines at this rate')
+    parser.add_argument('--demo-bytes-per-s', type=float, default=None, help='Demo mode with synthetic lines at this data rate')
+    parser.add_argument('--demo-line-length', type=int, default=DEMO_MEAN_LINE_LENGTH, help='Mean length of the synthetic lines')
+    parser.add_argument('--demo-line-length-distribution', choices=DEMO_LINE_LENGTH_DISTRIBUTIONS, default="uniform", help='Length distribution of the synthetic lines')
+    parser.add_argument('--demo-burst-factor', type=float, default=1.0, help='Rate multiplier of the synthetic lines during bursts')
+    parser.add_argument('--demo-burst-period-s', type=float, default=0.0, help='Period of the synthetic line bursts, 0 disables bursts')
+    parser.add_argument('--demo-burst-duty', type=float, default=0.1, help='Fraction of each burst period with the burst rate')
+    parser.add_argument('--demo-levels', type=parse_level_weights, default=None, help='Log level mix of the synthetic lines, e.g. INFO=70,WARN=20,ERROR=10')
+    parser.add_argument('--demo-total-lines', type=int, default=None, help='Stop the synthetic lines after this many lines')
+    parser.add_argument('--simulated-jlink', action='store_true', help='Read RTT data from a simulated J-Link probe instead of hardware')
+    parser.add_argument('--simulated-bytes-per-s', type=float, default=SIMULATED_BYTES_PER_s, help='Data rate of the simulated target')
+    parser.add_argument('--simulated-up-buffer-size', type=int, default=SIMULATED_UP_BUFFER_SIZE, help='RTT up-buffer size of the simulated target')
+    parser.add_argument('--simulated-up-channels', type=int, default=1, help='Number of RTT up-channels of the simulated target, each with its own up-buffer and data rate')
+    parser.add_argument('--simulated-overflow-mode', choices=SIMULATED_OVERFLOW_MODES, default="skip", help='Behaviour of the simulated target when the up-buffer is full')
+    parser.add_argument('--rtt-read-size', type=int, default=RTT_READ_SIZE_BYTES, help='Maximum number of bytes per RTT read')
+    parser.add_argument('--rtt-channels', type=parse_rtt_channels, default=None, help='RTT up-channels to read, e.g. 0,1 (default: all channels of the target)')
+    parser.add_argument('--rtt-min-poll-interval-ms', type=float, default=RTT_MIN_POLL_INTERVAL_s * 1000, help='RTT poll interval while data is received')
+    parser.add_argument('--rtt-max-poll-interval-ms', type=float, default=RTT_MAX_POLL_INTERVAL_s * 1000, help='RTT poll interval when the RTT buffer is idle')
+    parser.add_argument('--mcu-list-cache', default=MCU_LIST_CACHE_PATH, metavar='FILE', help='File caching the J-Link MCU list per DLL version, empty disables the cache')
+    parser.add_argument('--elf', default=None, metavar='FILE', help='Firmware ELF file, the RTT control block address is read from its _SEGGER_RTT symbol instead of searching the target RAM')
+    parser.add_argument('--block-address-cache', default=RTT_BLOCK_ADDRESS_CACHE_PATH, metavar='FILE', help='File caching the RTT control block address per MCU and firmware, empty disables the cache')
+    parser.add_argument('--record', default=None, metavar='FILE', help='Record the raw RTT data to a file for later replay')
+    parser.add_argument('--replay', default=None, metavar='FILE', help='Replay a recorded RTT session instead of connecting to a J-Link')
+    parser.add_argument('--replay-speed', type=float, default=REPLAY_SPEED_REALTIME, help='Replay speed factor, e.g. 10 for 10x, 0 replays as fast as possible')
+
+
+def get_rtt_source_settings(args):
+    """
+    Get the RTT source settings of parsed command line arguments.
+
+    Returns:
+        dict: Keyword arguments of create_rtt_handler, without the queue.
+    """
+    rtt_handler_options = {
+        "read_size": args.rtt_read_size,
+        "channels": args.rtt_channels,
+        "min_poll_interval_s": args.rtt_min_poll_interval_ms / 1000.0,
+        "max_poll_interval_s": args.rtt_max_poll_interval_ms / 1000.0,
+        "recording_path": args.record,
+        "mcu_list_cache_path": args.mcu_list_cache or None,
+        "elf_path": args.elf,
+        "block_address_cache_path": args.block_address_cache or None,
+    }
+    if args.simulated_jlink:
+        rtt_handler_options["jlink"] = SimulatedJLink(up_buffer_size=args.simulated_up_buffer_size, bytes_per_s=args.simulated_bytes_per_s,
+                                                      overflow_mode=args.simulated_overflow_mode,
+                                                      additional_up_buffers=[SimulatedUpBuffer(args.simulated_up_buffer_size, args.simulated_bytes_per_s,
+                                                                                               args.simulated_overflow_mode, name=f"Channel{index}")
+                                                                             for index in range(1, args.simulated_up_channels)])
+    demo_load_generator = None
+    if args.demo_lines_per_s is not None or args.demo_bytes_per_s is not None:
+        demo_load_generator = DemoLoadGenerator(
+            lines_per_s=args.demo_lines_per_s,
+            bytes_per_s=args.demo_bytes_per_s,
+            mean_line_length=args.demo_line_length,
+            line_length_distribution=args.demo_line_length_distribution,
+            burst_factor=args.demo_burst_factor,
+            burst_period_s=args.demo_burst_period_s,
+            burst_duty=args.demo_burst_duty,
+            level_weights=args.demo_levels,
+            total_lines=args.demo_total_lines,
+        )
+    return {
+        "demo": args.demo_messages or demo_load_generator is not None,
+        "rtt_handler_options": rtt_handler_options,
+        "replay_path": args.replay,
+        "replay_speed": args.replay_speed,
+        "demo_load_generator": demo_load_generator,
+    }
+
+
+def create_rtt_handler(log_processing_input_queue, demo=False, rtt_handler_options=None, replay_path=None,
+                       replay_speed=REPLAY_SPEED_REALTIME, demo_load_generator=None):
+    """
+    Create the RTT handler of the selected data source.
+
+    Returns:
+        RTTHandlerInterface: Replay, demo or J-Link RTT handler.
+    """
+    if replay_path:
+        return ReplayRTTHandler(log_processing_input_queue, replay_path, replay_speed)
+    if demo:
+        return DemoRTTHandler(log_processing_input_queue, demo_load_generator)
+    return RTTHandler(log_processing_input_queue, **(rtt_handler_options or {}))
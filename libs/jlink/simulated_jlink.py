@@ -0,0 +1,320 @@
+import threading
+import time
+from types import SimpleNamespace
+from libs.jlink.demo_load_generator import DemoLoadGenerator
+
+# Constants
+SIMULATED_UP_BUFFER_SIZE = 1024
+SIMULATED_BYTES_PER_s = 100000
+# Overflow behaviour of the target like the SEGGER_RTT_MODE_* settings:
+# "skip" drops a write not fitting completely, "trim" writes the part that fits,
+# "block" stalls the producer until the host has read enough data
+SIMULATED_OVERFLOW_MODES = ("skip", "trim", "block")
+SIMULATED_SUPPORTED_DEVICES = ("STM32F427II", "STM32F769NI", "NRF52840", "SIMULATED_MCU")
+_SIMULATED_LINE_BATCH_SIZE = 256
+
+
+def _create_jlink_exception(message):
+    """
+    Create the exception pylink raises, pylink is only imported when the simulation fails like a J-Link.
+    """
+    import pylink
+    return pylink.JLinkException(message)
+
+
+class SimulatedUpBuffer:
+    """
+    Simulated RTT up-buffer of the target with the producer writing into it.
+
+    A ring buffer with the read/write offset semantics of SEGGER RTT (one
+    byte always stays free), filled by a producer writing log lines at a
+    fixed data rate. Not thread safe, SimulatedJLink serializes the accesses.
+    """
+
+    def __init__(self, size=SIMULATED_UP_BUFFER_SIZE, bytes_per_s=SIMULATED_BYTES_PER_s, overflow_mode="skip",
+                 line_generator=None, name="Terminal"):
+        """
+        Args:
+            size (int): Size of the up-buffer in bytes.
+            bytes_per_s (float): Data rate of the producer.
+            overflow_mode (str): "skip", "trim" or "block", see SIMULATED_OVERFLOW_MODES.
+            line_generator (DemoLoadGenerator, optional): Source of the produced lines.
+            name (str): Name of the up-buffer reported by its descriptor.
+        """
+        if overflow_mode not in SIMULATED_OVERFLOW_MODES:
+            raise ValueError(f"unknown overflow mode {overflow_mode!r}")
+        self.size = size
+        self.bytes_per_s = bytes_per_s
+        self.overflow_mode = overflow_mode
+        self.name = name
+        self._line_generator = line_generator or DemoLoadGenerator(lines_per_s=0, seed=0)
+        # statistics of the simulation
+        self.produced_byte_count = 0
+        self.dropped_byte_count = 0
+        self.dropped_write_count = 0
+        self.read_byte_count = 0
+        self.reset(0.0)
+
+    def reset(self, current_time):
+        self._buffer = bytearray(self.size)
+        self._write_offset = 0
+        self._read_offset = 0
+        self._pending_lines = []
+        self._pending_record = b""
+        self._production_budget = 0.0
+        self._last_production_time = current_time
+
+    def restart_production(self, current_time):
+        """
+        Restart the production clock, e.g. when RTT is started, time before does not produce data.
+        """
+        self._last_production_time = current_time
+
+    # ring buffer
+
+    def _get_used_byte_count(self):
+        return (self._write_offset - self._read_offset) % self.size
+
+    def _get_free_byte_count(self):
+        return self.size - 1 - self._get_used_byte_count()
+
+    def _write_to_buffer(self, data):
+        first_part_size = min(len(data), self.size - self._write_offset)
+        self._buffer[self._write_offset:self._write_offset + first_part_size] = data[:first_part_size]
+        self._buffer[:len(data) - first_part_size] = data[first_part_size:]
+        self._write_offset = (self._write_offset + len(data)) % self.size
+
+    def read(self, max_byte_count):
+        byte_count = min(max_byte_count, self._get_used_byte_count())
+        first_part_size = min(byte_count, self.size - self._read_offset)
+        data = self._buffer[self._read_offset:self._read_offset + first_part_size] + self._buffer[:byte_count - first_part_size]
+        self._read_offset = (self._read_offset + byte_count) % self.size
+        self.read_byte_count += len(data)
+        return data
+
+    # target producer
+
+    def _next_record(self):
+        if not self._pending_lines:
+            self._pending_lines = self._line_generator.generate_lines(_SIMULATED_LINE_BATCH_SIZE)
+            self._pending_lines.reverse()
+            if not self._pending_lines:
+                # line generator finished
+                return None
+        return (self._pending_lines.pop() + '\n').encode('utf-8')
+
+    def produce(self, current_time):
+        """
+        Write the records the target produced since the last call into the up-buffer.
+        """
+        self._production_budget += (current_time - self._last_production_time) * self.bytes_per_s
+        self._last_production_time = current_time
+        while True:
+            if not self._pending_record:
+                self._pending_record = self._next_record()
+                if self._pending_record is None:
+                    self._pending_record = b""
+                    self._production_budget = 0.0
+                    return
+            record = self._pending_record
+            if self._production_budget < len(record):
+                return
+            free_byte_count = self._get_free_byte_count()
+            if len(record) > free_byte_count:
+                if self.overflow_mode == "block":
+                    # the producer waits for the host, no production while it is stalled
+                    self._production_budget = 0.0
+                    return
+                self.dropped_write_count += 1
+                self.dropped_byte_count += len(record) - (free_byte_count if self.overflow_mode == "trim" else 0)
+                record = record[:free_byte_count] if self.overflow_mode == "trim" else b""
+            self._write_to_buffer(record)
+            self.produced_byte_count += len(self._pending_record)
+            self._production_budget -= len(self._pending_record)
+            self._pending_record = b""
+
+
+class SimulatedJLink:
+    """
+    Simulated J-Link probe with target RTT up-buffers, a drop-in for pylink.JLink in RTTHandler.
+
+    Implements the subset of the pylink.JLink API used by RTTHandler. The
+    target firmware is modelled by producers writing log lines at a fixed
+    data rate into the up-buffers, see SimulatedUpBuffer. Production is
+    evaluated lazily on each API call from the elapsed time, so no thread is
+    needed and a fake clock makes the simulation deterministic.
+
+    Writes dropped by the target are reported as host overflows by
+    rtt_get_status, so the overflow reporting of the reader can be tested.
+    The statistics attributes of the probe are the ones of up-buffer 0.
+    """
+
+    def __init__(self, up_buffer_size=SIMULATED_UP_BUFFER_SIZE, bytes_per_s=SIMULATED_BYTES_PER_s, overflow_mode="skip",
+                 line_generator=None, supported_devices=SIMULATED_SUPPORTED_DEVICES, clock=time.monotonic,
+                 additional_up_buffers=()):
+        """
+        Args:
+            up_buffer_size (int): Size of the target up-buffer 0 in bytes.
+            bytes_per_s (float): Data rate of the target producer of up-buffer 0.
+            overflow_mode (str): "skip", "trim" or "block", see SIMULATED_OVERFLOW_MODES.
+            line_generator (DemoLoadGenerator, optional): Source of the lines produced into up-buffer 0.
+            supported_devices: Device names reported as supported.
+            clock: Function returning the current time in seconds.
+            additional_up_buffers: SimulatedUpBuffer instances of the up-channels from 1 on.
+        """
+        self._clock = clock
+        self.up_buffers = [SimulatedUpBuffer(up_buffer_size, bytes_per_s, overflow_mode, line_generator)] + list(additional_up_buffers)
+        self._supported_devices = list(supported_devices)
+        self._lock = threading.Lock()
+        self._opened = False
+        self._connected_device = None
+        self._rtt_running = False
+        # control block address of the last rtt_start, None if the J-Link had to search for it
+        self.rtt_block_address = None
+        self._reset_target()
+
+    def _reset_target(self):
+        current_time = self._clock()
+        for up_buffer in self.up_buffers:
+            up_buffer.reset(current_time)
+
+    def _produce(self):
+        current_time = self._clock()
+        for up_buffer in self.up_buffers:
+            up_buffer.produce(current_time)
+
+    # statistics of up-buffer 0
+
+    @property
+    def up_buffer_size(self):
+        return self.up_buffers[0].size
+
+    @property
+    def produced_byte_count(self):
+        return self.up_buffers[0].produced_byte_count
+
+    @property
+    def dropped_byte_count(self):
+        return self.up_buffers[0].dropped_byte_count
+
+    @property
+    def dropped_write_count(self):
+        return self.up_buffers[0].dropped_write_count
+
+    @property
+    def read_byte_count(self):
+        return self.up_buffers[0].read_byte_count
+
+    # simulation control
+
+    def simulate_reset(self):
+        """
+        Simulate a target reset: the up-buffer contents are lost and RTT has to be started again.
+        """
+        with self._lock:
+            self._reset_target()
+            self._rtt_running = False
+
+    def simulate_disconnect(self):
+        """
+        Simulate a lost probe connection, further target accesses fail until connect is called.
+        """
+        with self._lock:
+            self._connected_device = None
+            self._rtt_running = False
+
+    # pylink.JLink API subset
+
+    def num_supported_devices(self):
+        return len(self._supported_devices)
+
+    def supported_device(self, index=0):
+        return SimpleNamespace(name=self._supported_devices[index])
+
+    def open(self, serial_no=None, ip_addr=None):
+        self._opened = True
+
+    def opened(self):
+        return self._opened
+
+    def close(self):
+        with self._lock:
+            self._opened = False
+            self._connected_device = None
+            self._rtt_running = False
+
+    def set_tif(self, interface):
+        if not self._opened:
+            raise _create_jlink_exception("J-Link is not open")
+        return True
+
+    def connect(self, chip_name, speed='auto', verbose=False):
+        if not self._opened:
+            raise _create_jlink_exception("J-Link is not open")
+        if chip_name.upper() not in (name.upper() for name in self._supported_devices):
+            raise _create_jlink_exception(f"unsupported device {chip_name}")
+        with self._lock:
+            self._connected_device = chip_name
+            self._reset_target()
+
+    def connected(self):
+        return self._connected_device is not None
+
+    def target_connected(self):
+        return self._connected_device is not None
+
+    def rtt_start(self, block_address=None):
+        if self._connected_device is None:
+            raise _create_jlink_exception("no target connected")
+        self.rtt_block_address = block_address
+        with self._lock:
+            self._rtt_running = True
+            current_time = self._clock()
+            for up_buffer in self.up_buffers:
+                up_buffer.restart_production(current_time)
+
+    def rtt_stop(self):
+        self._rtt_running = False
+
+    def _check_rtt_running(self):
+        if self._connected_device is None:
+            raise _create_jlink_exception("no target connected")
+        if not self._rtt_running:
+            raise _create_jlink_exception("RTT is not running")
+
+    def _get_up_buffer(self, buffer_index):
+        if not 0 <= buffer_index < len(self.up_buffers):
+            raise _create_jlink_exception(f"invalid up-buffer index {buffer_index}")
+        return self.up_buffers[buffer_index]
+
+    def rtt_read(self, buffer_index, num_bytes):
+        with self._lock:
+            self._check_rtt_running()
+            up_buffer = self._get_up_buffer(buffer_index)
+            self._produce()
+            data = up_buffer.read(num_bytes)
+        # pylink returns a list of ints
+        return list(data)
+
+    def rtt_get_num_up_buffers(self):
+        with self._lock:
+            self._check_rtt_running()
+            return len(self.up_buffers)
+
+    def rtt_get_buf_descriptor(self, buffer_index, up):
+        with self._lock:
+            self._check_rtt_running()
+            if not up:
+                raise _create_jlink_exception("no down-buffers")
+            up_buffer = self._get_up_buffer(buffer_index)
+        return SimpleNamespace(BufferIndex=buffer_index, Direction=0, acName=up_buffer.name,
+                               SizeOfBuffer=up_buffer.size, Flags=0)
+
+    def rtt_get_status(self):
+        with self._lock:
+            self._check_rtt_running()
+            self._produce()
+            read_byte_count = sum(up_buffer.read_byte_count for up_buffer in self.up_buffers)
+            return SimpleNamespace(NumBytesTransferred=read_byte_count, NumBytesRead=read_byte_count,
+                                   HostOverflowCount=sum(up_buffer.dropped_write_count for up_buffer in self.up_buffers),
+                                   IsRunning=1, NumUpBuffers=len(self.up_buffers), NumDownBuffers=0)
@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+from collections import deque
+
+# Constants
+# "block" stalls the producer until there is room, "drop_oldest" drops the oldest queued items,
+# "collapse" drops new lines while the queue is full and queues a "N lines skipped" marker instead
+QUEUE_POLICIES = ("block", "drop_oldest", "collapse")
+INPUT_QUEUE_MAX_LINES = 500000
+INPUT_QUEUE_POLICY = "block"
+DISPLAY_QUEUE_MAX_UPDATES = 1000
+DISPLAY_QUEUE_POLICY = "drop_oldest"
+
+
+def get_log_input_line_count(item):
+    """
+    Get the number of log lines of a log processing queue item, 0 for control items like filter changes.
+    """
+    if "lines" in item:
+        return len(item["lines"])
+    if "line" in item:
+        return 1
+    return 0
+
+
+def create_skip_marker(skipped_line_count):
+    return {"line": f"[RTT GUI] {skipped_line_count} lines skipped\n"}
+
+
+class BoundedLogQueue:
+    """
+    Bounded queue between two stages of the log pipeline.
+
+    The capacity is counted in units of an item weight function, e.g. the
+    lines of a batch, so memory is bounded independent of the batch sizes.
+    Items of weight 0 (control items) are always accepted and never dropped.
+    What happens when the queue is full depends on the policy, see
+    QUEUE_POLICIES. Dropped items and lines are counted.
+
+    The interface is the subset of queue.Queue used by the pipeline.
+    """
+
+    def __init__(self, max_size, policy="block", item_weight=None, create_marker=create_skip_marker):
+        """
+        Args:
+            max_size (int): Capacity in units of the item weight.
+            policy (str): "block", "drop_oldest" or "collapse".
+            item_weight (optional): Function returning the weight of an item, 1 per item by default.
+            create_marker: Function creating the item queued for a number of collapsed lines.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"unknown queue policy {policy!r}")
+        self.max_size = max_size
+        self.policy = policy
+        self._item_weight = item_weight or (lambda item: 1)
+        self._create_marker = create_marker
+        self._items = deque()
+        self._size = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        # drop counters
+        self.dropped_item_count = 0
+        self.dropped_line_count = 0
+        self._collapsed_line_count = 0
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    @property
+    def size(self):
+        """
+        Queued units of the item weight, e.g. lines.
+        """
+        return self._size
+
+    def _append(self, item, weight):
+        self._items.append((item, weight))
+        self._size += weight
+        self._not_empty.notify()
+
+    def _drop_oldest(self, weight):
+        """
+        Drop the oldest weighted items until an item of the given weight fits, control items stay queued.
+        """
+        kept_items = deque()
+        while self._items and self._size + weight > self.max_size:
+            item, item_weight = self._items.popleft()
+            if item_weight == 0:
+                kept_items.append((item, item_weight))
+                continue
+            self._size -= item_weight
+            self.dropped_item_count += 1
+            self.dropped_line_count += item_weight
+        self._items.extendleft(reversed(kept_items))
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Queue an item according to the policy.
+
+        Returns:
+            bool: True if the item was queued, False if it was dropped.
+
+        Raises:
+            queue.Full: If the policy is "block" and there was no room within the timeout.
+        """
+        weight = self._item_weight(item)
+        with self._mutex:
+            if weight == 0:
+                self._append(item, weight)
+                return True
+            # a single item larger than the queue is accepted into an empty queue
+            fits = lambda: self._size + weight <= self.max_size or self._size == 0
+            if self.policy == "block":
+                if not fits():
+                    if not block:
+                        raise queue.Full
+                    if not self._not_full.wait_for(fits, timeout):
+                        raise queue.Full
+            elif self.policy == "drop_oldest":
+                self._drop_oldest(weight)
+            elif not fits():
+                # collapse
+                self._collapsed_line_count += weight
+                self.dropped_item_count += 1
+                self.dropped_line_count += weight
+                return False
+            if self._collapsed_line_count:
+                self._append(self._create_marker(self._collapsed_line_count), 0)
+                self._collapsed_line_count = 0
+            self._append(item, weight)
+            return True
+
+    def get(self, block=True, timeout=None):
+        """
+        Get the oldest item.
+
+        Raises:
+            queue.Empty: If no item was queued within the timeout.
+        """
+        with self._mutex:
+            if not self._items:
+                if not block:
+                    raise queue.Empty
+                end_time = None if timeout is None else time.monotonic() + timeout
+                while not self._items:
+                    remaining_time = None if end_time is None else end_time - time.monotonic()
+                    if remaining_time is not None and remaining_time <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining_time)
+            item, weight = self._items.popleft()
+            self._size -= weight
+            self._not_full.notify_all()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def get_statistics(self):
+        """
+        Get fill level and drop counters.
+
+        Returns:
+            dict: Queued items and units, capacity, policy and drop counters.
+        """
+        with self._mutex:
+            return {
+                "items": len(self._items),
+                "size": self._size,
+                "max_size": self.max_size,
+                "policy": self.policy,
+                "dropped_items": self.dropped_item_count,
+                "dropped_lines": self.dropped_line_count,
+            }
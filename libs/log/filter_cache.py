@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from libs.log.filter_expression import filter_refines
+
+# Constants
+FILTER_CACHE_SIZE = 8
+
+
+class FilterResult:
+    """
+    Result of a filter over the raw log lines [0, scanned_line_count).
+    """
+
+    def __init__(self, line_indices, scanned_line_count):
+        self.line_indices = line_indices
+        self.scanned_line_count = scanned_line_count
+
+
+class FilterResultCache:
+    """
+    Small LRU cache of recent filter results.
+
+    The result of the active filter is updated by the log processing as new
+    lines arrive. Results of previous filters only have to be extended by the
+    lines received since they were active, so switching back to a recent filter
+    does not rescan the history.
+    """
+
+    def __init__(self, max_entries=FILTER_CACHE_SIZE):
+        self._max_entries = max_entries
+        self._results = OrderedDict()
+
+    def get(self, filter_string):
+        """
+        Get the cached result of a filter, None if it is not cached.
+        """
+        result = self._results.get(filter_string)
+        if result is not None:
+            self._results.move_to_end(filter_string)
+        return result
+
+    def put(self, filter_string, line_indices, scanned_line_count):
+        """
+        Store the result of a filter, the least recently used result is dropped if the cache is full.
+        """
+        self._results[filter_string] = FilterResult(line_indices, scanned_line_count)
+        self._results.move_to_end(filter_string)
+        while len(self._results) > self._max_entries:
+            self._results.popitem(last=False)
+
+    def find_refinable_result(self, filter_string):
+        """
+        Find the smallest cached result of a filter the given filter refines.
+
+        A filter refining another filter (e.g. a substring containing the other
+        substring) only matches lines matched by that filter, so it can be
+        evaluated on that result instead of the complete log.
+
+        Returns:
+            tuple: (filter string, FilterResult) or (None, None).
+        """
+        best_filter_string, best_result = None, None
+        for cached_filter_string, result in self._results.items():
+            if not filter_refines(filter_string, cached_filter_string):
+                continue
+            if best_result is None or len(result.line_indices) < len(best_result.line_indices):
+                best_filter_string, best_result = cached_filter_string, result
+        return best_filter_string, best_result
+
+    def clear(self):
+        self._results.clear()
@@ -0,0 +1,280 @@
+import functools
+import re
+
+# Characters switching a filter from plain substring to expression mode, keywords alone keep
+# uppercase log text like "NOT READY" a substring
+_EXPRESSION_CHARACTERS_PATTERN = re.compile(r'[|&()!"]|(?:^|\s)/.+/(?:\s|$)')
+
+_TOKEN_PATTERN = re.compile(r'''
+    \s*(?:
+        (?P<lparen>\() |
+        (?P<rparen>\)) |
+        (?P<or>\|\|?) |
+        (?P<and>&&?) |
+        (?P<not>!) |
+        (?P<quoted>"(?:[^"\\]|\\.)*") |
+        (?P<regex>/(?:[^/\\]|\\.)+/) |
+        (?P<field>[A-Za-z_][\w.-]*:(?:"(?:[^"\\]|\\.)*"|[^\s()|&"]+)) |
+        (?P<word>[^\s()|&!"][^\s()|&"]*)
+    )''', re.VERBOSE)
+
+_KEYWORDS = {"and": "and", "or": "or", "not": "not"}
+
+
+class FilterExpressionError(ValueError):
+    """
+    Raised for filter expressions that can not be parsed.
+    """
+    pass
+
+
+def is_plain_filter(filter_string):
+    """
+    Check if a filter is a plain case-insensitive substring.
+
+    Filters without operator characters (| & ( ) ! ") or /regex/ terms are
+    plain substrings, so e.g. "ADC channel: 9" or "NOT READY" keep matching
+    the literal text. The keywords and, or, not are only operators within
+    an expression.
+    """
+    return _EXPRESSION_CHARACTERS_PATTERN.search(filter_string) is None
+
+
+def _unquote(text):
+    return re.sub(r'\\(.)', r'\1', text[1:-1])
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN_PATTERN.match(expression, position)
+        if match is None or match.end() == position:
+            raise FilterExpressionError(f"unexpected character at position {position}: {expression[position:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word" and value.lower() in _KEYWORDS:
+            kind = _KEYWORDS[value.lower()]
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser for filter expressions
+
+    expression := and_expression (("or" | "|") and_expression)*
+    and_expression := not_expression (["and" | "&"] not_expression)*
+    not_expression := ("not" | "!") not_expression | "(" expression ")" | term
+    term := word | "quoted text" | /regex/ | field:value
+    """
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._position = 0
+
+    def _peek(self):
+        return self._tokens[self._position][0] if self._position < len(self._tokens) else None
+
+    def _next(self):
+        token = self._tokens[self._position]
+        self._position += 1
+        return token
+
+    def parse(self):
+        if not self._tokens:
+            raise FilterExpressionError("empty filter expression")
+        node = self._parse_or()
+        if self._peek() is not None:
+            raise FilterExpressionError(f"unexpected {self._tokens[self._position][1]!r}")
+        return node
+
+    def _parse_or(self):
+        children = [self._parse_and()]
+        while self._peek() == "or":
+            self._next()
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else ("or", tuple(children))
+
+    def _parse_and(self):
+        children = [self._parse_not()]
+        while self._peek() not in (None, "or", "rparen"):
+            if self._peek() == "and":
+                self._next()
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else ("and", tuple(children))
+
+    def _parse_not(self):
+        kind = self._peek()
+        if kind is None:
+            raise FilterExpressionError("unexpected end of filter expression")
+        if kind == "not":
+            self._next()
+            return ("not", self._parse_not())
+        if kind == "lparen":
+            self._next()
+            node = self._parse_or()
+            if self._peek() != "rparen":
+                raise FilterExpressionError("missing closing parenthesis")
+            self._next()
+            return node
+        kind, value = self._next()
+        if kind == "word":
+            return ("term", "text", value)
+        if kind == "quoted":
+            return ("term", "text", _unquote(value))
+        if kind == "regex":
+            return ("term", "regex", value[1:-1].replace('\\/', '/'))
+        if kind == "field":
+            field_name, field_value = value.split(':', 1)
+            if field_value.startswith('"'):
+                field_value = _unquote(field_value)
+            return ("term", "field", (field_name, field_value))
+        raise FilterExpressionError(f"unexpected {value!r}")
+
+
+def parse_filter(filter_string):
+    """
+    Parse a filter into a syntax tree of nested tuples.
+
+    Plain filters are a single text term. Nodes are ("term", kind, value),
+    ("not", node), ("and", nodes) and ("or", nodes).
+
+    Raises:
+        FilterExpressionError: If the expression is invalid.
+    """
+    if is_plain_filter(filter_string):
+        return ("term", "text", filter_string)
+    return _Parser(_tokenize(filter_string)).parse()
+
+
+def _get_term_pattern(node):
+    _, term_kind, value = node
+    if term_kind == "text":
+        return re.escape(value.lower())
+    if term_kind == "regex":
+        return value
+    field_name, field_value = value
+    return rf'\b{re.escape(field_name.lower())}\s*[:=]\s*{re.escape(field_value.lower())}(?!\w)'
+
+
+def _compile_regex(pattern):
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        raise FilterExpressionError(f"invalid regular expression {pattern!r}: {e}")
+
+
+def _match_any_needle(needles):
+    def matcher(line):
+        for needle in needles:
+            if needle in line:
+                return True
+        return False
+    return matcher
+
+
+def _match_all(child_matchers):
+    def matcher(line):
+        for child_matcher in child_matchers:
+            if not child_matcher(line):
+                return False
+        return True
+    return matcher
+
+
+def _match_any(child_matchers):
+    def matcher(line):
+        for child_matcher in child_matchers:
+            if child_matcher(line):
+                return True
+        return False
+    return matcher
+
+
+def _compile_node(node):
+    kind = node[0]
+    if kind == "term":
+        if node[1] == "text":
+            needle = node[2].lower()
+            return lambda line: needle in line
+        search = _compile_regex(_get_term_pattern(node)).search
+        return lambda line: search(line) is not None
+    if kind == "not":
+        child_matcher = _compile_node(node[1])
+        return lambda line: not child_matcher(line)
+    if kind == "or" and all(child[0] == "term" for child in node[1]):
+        if all(child[1] == "text" for child in node[1]):
+            # substring tests are faster than a regex alternation of literals
+            return _match_any_needle(tuple(child[2].lower() for child in node[1]))
+        # one combined regex, each line is scanned once for all alternatives
+        search = _compile_regex('|'.join(f'(?:{_get_term_pattern(child)})' for child in node[1])).search
+        return lambda line: search(line) is not None
+    child_matchers = tuple(_compile_node(child) for child in node[1])
+    if kind == "and":
+        return _match_all(child_matchers)
+    return _match_any(child_matchers)
+
+
+@functools.lru_cache(maxsize=32)
+def compile_filter(filter_string):
+    """
+    Compile a filter into a single matcher function.
+
+    The matcher takes the lowercase copy of a log line and returns True if
+    it matches. All terms are case-insensitive. An empty filter matches all lines.
+
+    Raises:
+        FilterExpressionError: If the expression is invalid.
+    """
+    if not filter_string:
+        return lambda line: True
+    return _compile_node(parse_filter(filter_string))
+
+
+def compile_filter_or_substring(filter_string):
+    """
+    Compile a filter, invalid expressions (e.g. while typing) are matched as plain substring.
+    """
+    try:
+        return compile_filter(filter_string)
+    except FilterExpressionError:
+        needle = filter_string.lower()
+        return lambda line: needle in line
+
+
+def get_filter_error(filter_string):
+    """
+    Get the error message of an invalid filter expression, None for valid filters.
+    """
+    try:
+        compile_filter(filter_string)
+    except FilterExpressionError as e:
+        return str(e)
+    return None
+
+
+def filter_refines(filter_string, base_filter_string):
+    """
+    Check if every line matched by filter_string is also matched by base_filter_string.
+
+    True for plain substrings containing the base substring and for expressions
+    which are a conjunction containing the base expression, e.g. "ERROR and not ADC"
+    refines "ERROR".
+    """
+    if not base_filter_string:
+        return True
+    if is_plain_filter(filter_string) and is_plain_filter(base_filter_string):
+        return base_filter_string.lower() in filter_string.lower()
+    try:
+        node = parse_filter(filter_string)
+        base_node = parse_filter(base_filter_string)
+    except FilterExpressionError:
+        return False
+    if node == base_node:
+        return True
+    conjuncts = node[1] if node[0] == "and" else (node,)
+    base_conjuncts = base_node[1] if base_node[0] == "and" else (base_node,)
+    return all(base_conjunct in conjuncts for base_conjunct in base_conjuncts)
@@ -0,0 +1,178 @@
+import queue
+import time
+from libs.log.highlighted_log_lines import ChainedLogLines
+from libs.log.pipeline_metrics import pipeline_metrics
+
+# Constants
+# Rendering time per frame after which deferrable work (older lines of a filter pass) waits for the next frame
+FRAME_TIME_BUDGET_s = 0.03
+MIN_FRAME_INTERVAL_s = 0.02
+MAX_FRAME_INTERVAL_s = 0.25
+# The frame interval is this multiple of the last frame's rendering time, so rendering
+# takes at most about 1 / FRAME_LOAD_FACTOR of the GUI thread and input stays responsive
+FRAME_LOAD_FACTOR = 4
+
+
+class FrameScheduler:
+    """
+    Renders the log updates of the processing thread in frames.
+
+    All queued updates are coalesced per frame: a reprint makes all earlier
+    pending updates obsolete, appends are merged into one insert and older
+    lines of progressive filter passes into one prepend. The latest append
+    or reprint is always rendered in the next frame, so the view never lags
+    behind the data; prepends are deferred while the frame budget is used up.
+    The frame interval adapts to the rendering time.
+
+    If the display queue dropped updates (see BoundedLogQueue) the next frame
+    reprints the tail of the latest filtered log, so the view stays consistent.
+    """
+
+    def __init__(self, log_view, frame_time_budget_s=FRAME_TIME_BUDGET_s, min_frame_interval_s=MIN_FRAME_INTERVAL_s,
+                 max_frame_interval_s=MAX_FRAME_INTERVAL_s, clock=time.monotonic):
+        """
+        Args:
+            log_view (LogView): View rendering the updates.
+            frame_time_budget_s (float): Rendering time per frame.
+            min_frame_interval_s (float): Minimum time between two frames.
+            max_frame_interval_s (float): Maximum time between two frames under load.
+            clock: Function returning the current time in seconds.
+        """
+        self._log_view = log_view
+        self._frame_time_budget_s = frame_time_budget_s
+        self._min_frame_interval_s = min_frame_interval_s
+        self._max_frame_interval_s = max_frame_interval_s
+        self._clock = clock
+        self.frame_interval_s = min_frame_interval_s
+        self._next_frame_time = 0.0
+        # number of updates made obsolete by a later reprint
+        self.coalesced_reprint_count = 0
+        self._dropped_update_count = 0
+        self._reset_pending_updates()
+
+    def _reset_pending_updates(self):
+        # latest append or reprint update, its lines are replaced by the merged lines
+        self._pending_update = None
+        self._pending_lines = ChainedLogLines()
+        self._pending_prepend_update = None
+        self._pending_prepend_lines = ChainedLogLines()
+        self._latest_filtered_lines = None
+        # read time of the oldest pending line
+        self._pending_read_time = None
+
+    @property
+    def has_pending_updates(self):
+        return self._pending_update is not None or self._pending_prepend_update is not None
+
+    def add_update(self, update_info):
+        """
+        Coalesce an update of the processing thread with the pending updates.
+        """
+        self._latest_filtered_lines = update_info['filtered_lines']
+        if update_info.get("prepend", False):
+            # older lines of a progressive filter pass, later passes contain older lines
+            self._pending_prepend_lines.prepend(update_info['highlighted_text_list'])
+            self._pending_prepend_update = update_info
+            return
+        if update_info["append"] == False:
+            # a reprint contains all previous lines
+            if self.has_pending_updates:
+                self.coalesced_reprint_count += 1
+            self._reset_pending_updates()
+            self._latest_filtered_lines = update_info['filtered_lines']
+            self._pending_lines = ChainedLogLines([update_info['highlighted_text_list']])
+        else:
+            self._pending_lines.append(update_info['highlighted_text_list'])
+            if self._pending_update is not None and self._pending_update["append"] == False:
+                # appends to a pending reprint extend the reprint
+                update_info = dict(update_info, append=False)
+        self._pending_update = update_info
+        if self._pending_read_time is None:
+            self._pending_read_time = update_info.get("read_time")
+
+    def collect(self, display_output_queue):
+        """
+        Coalesce all queued updates, the updates are lazy views so draining the queue is cheap.
+
+        Returns:
+            int: Number of collected updates.
+        """
+        count = 0
+        while True:
+            try:
+                self.add_update(display_output_queue.get_nowait())
+            except queue.Empty:
+                break
+            count += 1
+        dropped_update_count = getattr(display_output_queue, "dropped_item_count", 0)
+        if dropped_update_count != self._dropped_update_count:
+            self._dropped_update_count = dropped_update_count
+            self._add_tail_reprint()
+        return count
+
+    def _add_tail_reprint(self):
+        """
+        Reprint the lines of the latest filtered log the log view can hold, replaces lost updates.
+        """
+        if self._latest_filtered_lines is None:
+            return
+        tail_lines = self._latest_filtered_lines
+        if self._log_view.max_displayed_lines:
+            tail_lines = tail_lines[-self._log_view.max_displayed_lines:]
+        self.add_update({
+            "highlighted_text_list": tail_lines,
+            "append": False,
+            "prepend": False,
+            "filtered_lines": self._latest_filtered_lines,
+            "read_time": None,
+        })
+
+    def is_frame_due(self, current_time=None):
+        current_time = self._clock() if current_time is None else current_time
+        return self.has_pending_updates and current_time >= self._next_frame_time
+
+    def get_time_until_next_frame(self, current_time=None):
+        """
+        Get the time until the next frame is due, None if there is nothing to render.
+        """
+        if not self.has_pending_updates:
+            return None
+        current_time = self._clock() if current_time is None else current_time
+        return max(0.0, self._next_frame_time - current_time)
+
+    def _display(self, update_info, lines):
+        start_time = time.perf_counter()
+        self._log_view.display_log_update(dict(update_info, highlighted_text_list=lines, filtered_lines=self._latest_filtered_lines))
+        render_time = time.perf_counter() - start_time
+        pipeline_metrics.record("rendering", render_time, len(lines))
+        return render_time
+
+    def render_frame(self):
+        """
+        Render the pending updates.
+
+        Returns:
+            float: Rendering time of the frame.
+        """
+        frame_start_time = self._clock()
+        render_time = 0.0
+        rendered_update = self._pending_update is not None
+        if rendered_update:
+            update_info, lines, read_time = self._pending_update, self._pending_lines, self._pending_read_time
+            self._pending_update = None
+            self._pending_lines = ChainedLogLines()
+            self._pending_read_time = None
+            render_time += self._display(update_info, lines)
+            if read_time is not None:
+                # staleness of the screen, the oldest line of the frame waited longest
+                pipeline_metrics.record_latency("read_to_display", time.monotonic() - read_time, len(lines))
+        if self._pending_prepend_update is not None and (not rendered_update or render_time < self._frame_time_budget_s):
+            update_info, lines = self._pending_prepend_update, self._pending_prepend_lines
+            self._pending_prepend_update = None
+            self._pending_prepend_lines = ChainedLogLines()
+            render_time += self._display(update_info, lines)
+        # adapt the frame rate to the rendering load
+        self.frame_interval_s = min(self._max_frame_interval_s,
+                                    max(self._min_frame_interval_s, render_time * FRAME_LOAD_FACTOR))
+        self._next_frame_time = frame_start_time + self.frame_interval_s
+        return render_time
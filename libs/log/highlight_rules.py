@@ -0,0 +1,109 @@
+from libs.log.filter_expression import compile_filter_or_substring
+
+# Constants
+# Widget tag of the highlight string entered by the user
+USER_HIGHLIGHT_TAG = "highlight"
+# Default rules (tag, filter expression, color), earlier rules take precedence
+DEFAULT_HIGHLIGHT_RULES = [
+    ("error", r"/\b(?:error|err|fatal|fault|fail(?:ed|ure)?|assert(?:ion)? failed)\b/", "tomato"),
+    ("warning", r"/\bwarn(?:ing)?\b/", "gold"),
+]
+USER_HIGHLIGHT_COLOR = "LightGreen"
+# Memoized matches per rule, the memo is cleared once it holds more lines
+HIGHLIGHT_MATCH_CACHE_SIZE = 200000
+
+
+class HighlightRule:
+    """
+    Highlight rule, lines matching a filter expression are shown in a color.
+
+    Matches are memoized per global log line index, so lines scrolled into
+    view again are not matched again. The memo belongs to a log store and is
+    dropped when the log is cleared.
+    """
+
+    def __init__(self, tag, filter_string, color):
+        self.tag = tag
+        self.filter_string = filter_string
+        self.color = color
+        self._matcher = compile_filter_or_substring(filter_string)
+        self._log_store = None
+        self._matches = {}
+
+    def get_memoized_match(self, log_store, index):
+        """
+        Get the memoized match of a line, None if the line was not matched yet.
+        """
+        if log_store is not self._log_store:
+            return None
+        return self._matches.get(index)
+
+    def match(self, log_store, index, lower_line):
+        """
+        Match the lowercase copy of a line and memoize the result.
+        """
+        if log_store is not self._log_store:
+            self._log_store = log_store
+            self._matches = {}
+        elif len(self._matches) >= HIGHLIGHT_MATCH_CACHE_SIZE:
+            self._matches = {}
+        matched = self._matcher(lower_line)
+        self._matches[index] = matched
+        return matched
+
+
+class HighlightRuleSet:
+    """
+    Ordered, immutable set of highlight rules.
+
+    Changing the user highlight string creates a new set sharing the other
+    rules, so their memoized matches are kept.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)
+
+    def get_tag(self, log_store, index, line):
+        """
+        Get the tag of the first rule matching a line, None if no rule matches.
+        """
+        lower_line = None
+        for rule in self.rules:
+            matched = rule.get_memoized_match(log_store, index)
+            if matched is None:
+                if lower_line is None:
+                    lower_line = line.lower()
+                matched = rule.match(log_store, index, lower_line)
+            if matched:
+                return rule.tag
+        return None
+
+    def with_user_highlight(self, highlight_string):
+        """
+        Get a rule set with the user highlight rule replaced, an empty string removes it.
+        """
+        rules = [rule for rule in self.rules if rule.tag != USER_HIGHLIGHT_TAG]
+        if highlight_string:
+            # the user rule takes precedence over the default rules
+            rules.insert(0, HighlightRule(USER_HIGHLIGHT_TAG, highlight_string, USER_HIGHLIGHT_COLOR))
+        return HighlightRuleSet(rules)
+
+
+def create_default_highlight_rules(highlight_string=""):
+    """
+    Create the default rule set, errors and warnings plus an optional user highlight string.
+    """
+    rule_set = HighlightRuleSet(HighlightRule(tag, filter_string, color) for tag, filter_string, color in DEFAULT_HIGHLIGHT_RULES)
+    return rule_set.with_user_highlight(highlight_string)
+
+
+def get_highlight_tag_colors():
+    """
+    Get the colors of all highlight tags, used to configure the log widget.
+
+    Returns:
+        dict: Tag name to color.
+    """
+    tag_colors = {tag: color for tag, _, color in DEFAULT_HIGHLIGHT_RULES}
+    tag_colors[USER_HIGHLIGHT_TAG] = USER_HIGHLIGHT_COLOR
+    return tag_colors
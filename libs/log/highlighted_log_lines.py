@@ -0,0 +1,187 @@
+import time
+from collections.abc import Sequence
+from libs.log.highlight_rules import HighlightRuleSet
+
+# Constants
+LINE_FETCH_CHUNK_SIZE = 4096
+# Read time column, wall clock time with milliseconds
+READ_TIME_COLUMN_FORMAT = "%H:%M:%S"
+READ_TIME_COLUMN_WIDTH = 13
+# RTT channel column, e.g. " 1> "
+CHANNEL_COLUMN_WIDTH = 4
+# Offset of the wall clock to the time.monotonic() read times
+_WALL_CLOCK_OFFSET_s = time.time() - time.monotonic()
+
+
+def format_read_time(read_time):
+    """
+    Format a time.monotonic() read time as read time column, blank if the read time is unknown.
+    """
+    if read_time is None:
+        return " " * READ_TIME_COLUMN_WIDTH
+    wall_clock_time = read_time + _WALL_CLOCK_OFFSET_s
+    milliseconds = int(wall_clock_time * 1000) % 1000
+    return f"{time.strftime(READ_TIME_COLUMN_FORMAT, time.localtime(wall_clock_time))}.{milliseconds:03d} "
+
+
+def format_channel(channel):
+    """
+    Format an RTT channel as channel column, blank for lines without channel like status messages.
+    """
+    if channel is None:
+        return " " * CHANNEL_COLUMN_WIDTH
+    return f"{channel:>{CHANNEL_COLUMN_WIDTH - 2}}> "
+
+
+class HighlightedLogLines(Sequence):
+    """
+    Lazy sequence of (line, highlight tag) tuples over a part of the filtered log.
+
+    The sequence references the log store and the filtered line indices instead
+    of copying lines. The length is fixed on creation, so the sequence is a
+    consistent snapshot even while the processing thread appends new lines.
+    Lines and highlighting are only evaluated for the items actually accessed,
+    the tag is None for lines not matched by any highlight rule.
+
+    With show_read_times the lines are prefixed with their read time column,
+    with show_channels with their RTT channel column. Highlight rules are
+    still evaluated on the lines without the columns.
+    """
+
+    def __init__(self, log_store, line_indices, highlight_rules=None, start=0, stop=None, show_read_times=False,
+                 show_channels=False):
+        self._log_store = log_store
+        self._line_indices = line_indices
+        self._highlight_rules = highlight_rules if highlight_rules is not None else HighlightRuleSet()
+        self._start = start
+        self._stop = len(line_indices) if stop is None else stop
+        self._show_read_times = show_read_times
+        self._show_channels = show_channels
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return HighlightedLogLines(self._log_store, self._line_indices, self._highlight_rules,
+                                       self._start + start, self._start + max(start, stop), self._show_read_times,
+                                       self._show_channels)
+        if item < 0:
+            item += len(self)
+        if item < 0 or item >= len(self):
+            raise IndexError("log line index out of range")
+        index = self._line_indices[self._start + item]
+        line = self._log_store[index]
+        tag = self._highlight_rules.get_tag(self._log_store, index, line)
+        if self._show_read_times or self._show_channels:
+            line = self._get_columns((index,))[0] + line
+        return (line, tag)
+
+    def _iter_chunks(self):
+        for chunk_start in range(self._start, self._stop, LINE_FETCH_CHUNK_SIZE):
+            chunk_indices = self._line_indices[chunk_start:min(chunk_start + LINE_FETCH_CHUNK_SIZE, self._stop)]
+            yield chunk_indices, self._log_store.get_lines(chunk_indices)
+
+    def _get_columns(self, chunk_indices):
+        """
+        Get the column prefixes of lines, lines of one read batch share the formatted columns.
+        """
+        read_times = self._log_store.get_read_times(chunk_indices) if self._show_read_times else [None] * len(chunk_indices)
+        channels = self._log_store.get_channels(chunk_indices) if self._show_channels else [None] * len(chunk_indices)
+        last_batch = object()
+        columns = ""
+        line_columns = []
+        for batch in zip(read_times, channels):
+            if batch != last_batch:
+                last_batch = batch
+                read_time, channel = batch
+                columns = ((format_read_time(read_time) if self._show_read_times else "")
+                           + (format_channel(channel) if self._show_channels else ""))
+            line_columns.append(columns)
+        return line_columns
+
+    def _with_columns(self, chunk_indices, lines):
+        return [columns + line for columns, line in zip(self._get_columns(chunk_indices), lines)]
+
+    def __iter__(self):
+        for chunk_indices, lines in self._iter_chunks():
+            tags = [self._highlight_rules.get_tag(self._log_store, index, line) for index, line in zip(chunk_indices, lines)]
+            if self._show_read_times or self._show_channels:
+                lines = self._with_columns(chunk_indices, lines)
+            yield from zip(lines, tags)
+
+    def texts(self):
+        """
+        Iterate over the lines without evaluating the highlight rules.
+        """
+        for chunk_indices, lines in self._iter_chunks():
+            if self._show_read_times or self._show_channels:
+                lines = self._with_columns(chunk_indices, lines)
+            yield from lines
+
+    def line_index(self, item):
+        """
+        Get the global log store index of an item.
+        """
+        return self._line_indices[self._start + item]
+
+
+class ChainedLogLines(Sequence):
+    """
+    Sequence of (line, highlight tag) tuples over several consecutive log line sequences.
+
+    Used to merge several log updates without evaluating their lines.
+    """
+
+    def __init__(self, parts=()):
+        self._parts = [part for part in parts if len(part)]
+
+    def __len__(self):
+        return sum(len(part) for part in self._parts)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            parts = []
+            part_start = 0
+            for part in self._parts:
+                part_stop = part_start + len(part)
+                if part_stop > start and part_start < stop:
+                    parts.append(part[max(0, start - part_start):min(len(part), stop - part_start)])
+                part_start = part_stop
+            return ChainedLogLines(parts)
+        if item < 0:
+            item += len(self)
+        if item >= 0:
+            for part in self._parts:
+                if item < len(part):
+                    return part[item]
+                item -= len(part)
+        raise IndexError("log line index out of range")
+
+    def __iter__(self):
+        for part in self._parts:
+            yield from part
+
+    def append(self, part):
+        if len(part):
+            self._parts.append(part)
+
+    def prepend(self, part):
+        if len(part):
+            self._parts.insert(0, part)
+
+    def texts(self):
+        """
+        Iterate over the lines without evaluating the highlight rules.
+        """
+        for part in self._parts:
+            if hasattr(part, 'texts'):
+                yield from part.texts()
+            else:
+                yield from (text for text, _ in part)
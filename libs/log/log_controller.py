@@ -1,16 +1,81 @@
 import datetime
 import time
 import traceback
+from libs.log.filter_cache import FilterResultCache
+from libs.log.filter_expression import compile_filter_or_substring
+from libs.log.highlight_rules import create_default_highlight_rules
+from libs.log.highlighted_log_lines import ChainedLogLines, HighlightedLogLines
+from libs.log.log_store import LogStore, create_line_index_array
+from libs.log.parallel_filter import ParallelFilterEngine, ParallelFilterPass
+from libs.log.pipeline_metrics import pipeline_metrics
+from libs.log.progressive_filter import ProgressiveFilterPass
 
 # Global variables to track the last log filter and highlight change times
 last_filter_change_time = 0
 last_highlight_change_time = 0
 last_log_gui_filter_update_date = datetime.datetime.now()
-old_raw_log_lines = []
-old_filtered_lines = []
-old_lines_after_pausing = []
+# Append-only store of all received log lines
+log_store = LogStore()
+# Global line indices of the log lines passing the filter, a range while unfiltered
+filtered_line_indices = range(0)
+# Number of raw log lines already passed to filtering (pause cursor)
+processed_line_count = 0
+# Results of recently used filters
+filter_cache = FilterResultCache()
+# Process pool for filtering large histories
+parallel_filter_engine = ParallelFilterEngine()
+# Show the read time of each line in front of the line
+show_read_time_column = False
+# Show the RTT channel of each line in front of the line, see CHANNEL_COLUMN_MODES
+channel_column_mode = "auto"
 
 GUI_MINIMUM_REFRESH_INTERVAL_s = 0.5
+# Histories of at least this many lines are filtered progressively, newest lines first
+PROGRESSIVE_FILTER_MIN_LINES = 100000
+# Matches shown immediately after a filter change, about a screenful
+PROGRESSIVE_FILTER_FIRST_MATCH_COUNT = 200
+PROGRESSIVE_FILTER_FIRST_SLICE_TIME_s = 0.02
+PROGRESSIVE_FILTER_SLICE_TIME_s = 0.02
+# Older histories of at least this many lines are filtered by a process pool
+PARALLEL_FILTER_MIN_LINES = 500000
+# Raw lines received during a pause processed per step after unpausing
+UNPAUSE_BACKLOG_BATCH_LINES = 10000
+# Default scrollback lines kept in memory, older lines are spilled to disk
+MAX_SCROLLBACK_MEMORY_LINES = 1000000
+MAX_SCROLLBACK_MEMORY_MB = 256
+# "auto" shows the channel column once lines of more than one RTT channel were received
+CHANNEL_COLUMN_MODES = ("auto", "always", "never")
+
+log_store.set_memory_limits(MAX_SCROLLBACK_MEMORY_LINES, MAX_SCROLLBACK_MEMORY_MB * 1024 * 1024)
+
+def configure_scrollback(max_memory_lines=MAX_SCROLLBACK_MEMORY_LINES, max_memory_mb=MAX_SCROLLBACK_MEMORY_MB, spill_directory=None):
+    """
+    Configure the in-memory scrollback, older lines are spilled to a file in spill_directory
+    """
+    max_memory_bytes = None if max_memory_mb is None else int(max_memory_mb * 1024 * 1024)
+    log_store.set_memory_limits(max_memory_lines, max_memory_bytes, spill_directory)
+
+def configure_parallel_filtering(max_workers):
+    """
+    Configure the number of processes filtering large histories, less than 2 disables parallel filtering
+    """
+    parallel_filter_engine.configure(max_workers)
+
+def configure_read_time_column(enabled):
+    """
+    Show the host read time of each line as a column in front of the line
+    """
+    global show_read_time_column
+    show_read_time_column = enabled
+
+def configure_channel_column(mode):
+    """
+    Configure when the RTT channel of each line is shown as a column in front of the line
+    """
+    global channel_column_mode
+    if mode not in CHANNEL_COLUMN_MODES:
+        raise ValueError(f"unknown channel column mode {mode!r}")
+    channel_column_mode = mode
 
 def create_log_processor_and_displayer(log_view):
     """
@@ -22,160 +87,233 @@ def create_log_processor_and_displayer(log_view):
     last_applied_filter_string = ""
     old_highlight_string = ""
     last_applied_highlight_string = ""
-    old_pause_text_state = False
     active_pause_string = ""
     active_filter_string = ""
     active_highlight_string = ""
+    # highlight rules of the applied highlight string, rule matches are memoized
+    highlight_rules = create_default_highlight_rules()
+    # in-flight progressive filter pass over older history and the store it filters
+    filter_pass = None
+    filter_pass_log_store = None
+    # filtered older history of the in-flight pass, one index array per slice, newest first,
+    # joined with filtered_line_indices once when the pass is done
+    filter_pass_older_indices = []
+    # pause state of the last processing step and whether lines received during a pause are still unprocessed
+    paused = False
+    rendering_backlog = False
+    # whether the lines are shown with the channel column
+    channel_column_shown = False
 
-    def _parse_new_text(new_text):
-        pass
-
-    def _apply_text_filter(filter_str, unfiltered_content):
+    def _apply_text_filter(filter_str, start, stop):
         """
-        Text log filter function
+        Text log filter function, supports plain substrings and filter expressions
+
+        Returns the global line indices in the range [start, stop) matching the filter
         """
         if not filter_str:
-            return unfiltered_content.copy()
+            return range(start, stop)
 
-        filtered_lines = []
-        filter_str_lower = filter_str.lower()
-        for line_tuple in unfiltered_content:
-            line = line_tuple[0]
-            if filter_str_lower in line.lower():
-                filtered_lines.append(line_tuple)
-        return filtered_lines
+        line_matcher = compile_filter_or_substring(filter_str)
+        return create_line_index_array(
+            index for index, lower_line in log_store.iter_lines(start, stop, lower=True)
+            if line_matcher(lower_line)
+        )
 
-    def _handle_pausing(raw_log_lines, new_lines, pause_text_state):
+    def _refine_text_filter(filter_str, line_indices):
         """
-        Handle freezing of log text
+        Apply a filter to the lines of a previous filter result it refines
         """
-        nonlocal old_pause_text_state
-        global old_lines_after_pausing
-        if pause_text_state != old_pause_text_state:
-            ### Pause state changed
-            if pause_text_state == False:
-                # Pause released
-                new_lines_f = [tuple(line) for line in raw_log_lines[len(old_lines_after_pausing):]]
-                old_lines_after_pausing = raw_log_lines[:len(old_lines_after_pausing)]
-                old_pause_text_state = False
-            else:
-                # Pause pressed
-                old_lines_after_pausing = raw_log_lines.copy()
-                old_pause_text_state = True
-                old_lines_after_pausing = raw_log_lines.copy()
-                new_lines_f = new_lines.copy()
+        line_matcher = compile_filter_or_substring(filter_str)
+        lower_lines = log_store.get_lines(line_indices, lower=True)
+        return create_line_index_array(
+            index for index, lower_line in zip(line_indices, lower_lines)
+            if line_matcher(lower_line)
+        )
+
+    def _evaluate_filter(filter_str, visible_line_count):
+        """
+        Get the indices of all visible lines matching the filter,
+        None if the filter has to be applied by a progressive filter pass
+
+        Cached results are only extended by the lines received since they were
+        cached. A filter refining a cached filter (e.g. "ADC ch" after "ADC" or
+        "ERROR and not ADC" after "ERROR") is evaluated on the cached result
+        instead of the complete log.
+        """
+        cached_result = filter_cache.get(filter_str)
+        if cached_result is not None:
+            line_indices = cached_result.line_indices
+            scanned_line_count = cached_result.scanned_line_count
         else:
-            ### Pause state stays the same
-            if pause_text_state == False:
-                # log not paused
-                old_lines_after_pausing = raw_log_lines.copy()
-                new_lines_f = new_lines.copy()
+            refined_filter_str, refinable_result = filter_cache.find_refinable_result(filter_str)
+            if filter_str and refinable_result is not None and not isinstance(refinable_result.line_indices, range):
+                line_indices = _refine_text_filter(filter_str, refinable_result.line_indices)
+                scanned_line_count = refinable_result.scanned_line_count
+            elif filter_str and visible_line_count >= PROGRESSIVE_FILTER_MIN_LINES:
+                # large history without usable cached result, filter progressively
+                return None
             else:
-                # pause ongoing
-                old_lines_after_pausing = old_lines_after_pausing.copy()
-                new_lines_f = []
-        return old_lines_after_pausing, new_lines_f
+                line_indices = range(0) if not filter_str else create_line_index_array()
+                scanned_line_count = 0
+        return _extend_line_indices(line_indices, _apply_text_filter(filter_str, scanned_line_count, visible_line_count))
+
+    def _handle_pausing(pause_text_state):
+        """
+        Handle freezing of log text
+
+        Returns the end of the raw log line range visible to filtering.
+        While paused the pause cursor stays where it is, new lines are only stored.
+        After unpausing the lines received during the pause are processed as new
+        lines in batches of UNPAUSE_BACKLOG_BATCH_LINES, further batches are
+        processed as pending work.
+        """
+        nonlocal paused, rendering_backlog
+
+        if pause_text_state:
+            paused = True
+            rendering_backlog = False
+            return processed_line_count
+        if paused:
+            paused = False
+            rendering_backlog = True
+        if rendering_backlog:
+            visible_line_count = min(len(log_store), processed_line_count + UNPAUSE_BACKLOG_BATCH_LINES)
+            rendering_backlog = visible_line_count < len(log_store)
+            return visible_line_count
+        return len(log_store)
+
+    def _extend_line_indices(line_indices, new_line_indices):
+        """
+        Extend filtered line indices, unfiltered views stay a range instead of an index per line
+        """
+        if len(new_line_indices) == 0:
+            return line_indices
+        if isinstance(line_indices, range) and isinstance(new_line_indices, range) \
+           and line_indices.stop == new_line_indices.start:
+            return range(line_indices.start, new_line_indices.stop)
+        if isinstance(line_indices, range):
+            line_indices = create_line_index_array(line_indices)
+        line_indices.extend(new_line_indices)
+        return line_indices
 
-    def _handle_filtering(old_log_lines, new_log_lines, old_filtered_lines, filter_string):
+    def _handle_filtering(visible_line_count, filter_string):
         """
         Handle filtering of log text
+
+        Returns the indices of the new filtered lines and whether a reprint is needed
         """
-        nonlocal old_filter_string, last_applied_filter_string
-        global last_filter_change_time
+        nonlocal old_filter_string, last_applied_filter_string, filter_pass, filter_pass_log_store, filter_pass_older_indices
+        global filtered_line_indices, last_filter_change_time
 
         filter_reprint = False
         if last_applied_filter_string != filter_string:
-            # change filter string apply timeout expired
+            # change filter string apply timeout expired, cancel an in-flight filter pass
             last_applied_filter_string = filter_string
-            new_filtered_lines = _apply_text_filter(last_applied_filter_string, old_log_lines + new_log_lines)
-            old_filtered_lines = []
+            if filter_pass is not None:
+                filter_pass.cancel()
+                filter_pass = None
+            filter_pass_older_indices = []
+            filtered_line_indices = _evaluate_filter(last_applied_filter_string, visible_line_count)
+            if filtered_line_indices is None:
+                # filter the most recent screenful first, older history in later slices
+                filter_pass = ProgressiveFilterPass(last_applied_filter_string, visible_line_count, _apply_text_filter)
+                filter_pass_log_store = log_store
+                filtered_line_indices = filter_pass.run_slice(PROGRESSIVE_FILTER_FIRST_SLICE_TIME_s, PROGRESSIVE_FILTER_FIRST_MATCH_COUNT)
+                if filter_pass.done:
+                    filter_pass = None
+                elif parallel_filter_engine.enabled and filter_pass.remaining_line_count >= PARALLEL_FILTER_MIN_LINES:
+                    # filter large older history on all cores
+                    filter_pass = ParallelFilterPass(last_applied_filter_string, filter_pass.remaining_line_count,
+                                                     log_store, parallel_filter_engine, _apply_text_filter)
+            new_filtered_indices = filtered_line_indices
             filter_reprint = True
+        elif visible_line_count > processed_line_count:
+            # filter string did not change, filter new lines only
+            new_filtered_indices = _apply_text_filter(last_applied_filter_string, processed_line_count, visible_line_count)
+            filtered_line_indices = _extend_line_indices(filtered_line_indices, new_filtered_indices)
         else:
-            # filter string did not change
-            if new_log_lines != []:
-                new_filtered_lines = _apply_text_filter(last_applied_filter_string, new_log_lines)
-                old_filtered_lines = old_filtered_lines.copy()
-            else:
-                new_filtered_lines = []
-                old_filtered_lines = old_filtered_lines.copy()
+            new_filtered_indices = create_line_index_array()
 
-        return new_filtered_lines, old_filtered_lines, filter_reprint
+        # keep the cached result of the active filter up to date, incomplete results are not cached
+        if filter_pass is None:
+            filter_cache.put(last_applied_filter_string, filtered_line_indices, visible_line_count)
 
-    def _clear_log_text():
-        global old_lines_after_pausing
-        filtered_text = []
-        old_lines_after_pausing = []
-        return filtered_text
+        return new_filtered_indices, filter_reprint
 
-    def _create_highlighted_text_list(highlight_string, text_to_highlight):
+    def _create_highlighted_text_list(line_indices):
         """
-        Get highlighted text list
+        Get highlighted text list, lines and highlighting are evaluated lazily on access
         """
-        if highlight_string == "":
-            return [(line[0], False) for line in text_to_highlight]
-        else:
-            highlighted_list = []
-            for line in text_to_highlight:
-                line_text = line[0]
-                highlighted = highlight_string.lower() in line_text.lower()
-                highlighted_list.append((line_text, highlighted))
-            return highlighted_list
-
-    def _assemble_changed_highlighted_list(old_log_lines, new_log_lines, applied_highlight_string, highlight_string_changed):
-        if old_log_lines == []:
-            if new_log_lines == []:
-                # no filtered log messages left
-                highlighted_list = []
-            else:
-                # only new filtered log messages
-                highlighted_list = _create_highlighted_text_list(applied_highlight_string, new_log_lines)
+        return HighlightedLogLines(log_store, line_indices, highlight_rules, show_read_times=show_read_time_column,
+                                   show_channels=channel_column_shown)
+
+    def _get_filtered_lines():
+        """
+        Get the highlighted text list of the complete filtered log, including the older history filtered so far
+        """
+        if not filter_pass_older_indices:
+            return _create_highlighted_text_list(filtered_line_indices)
+        return ChainedLogLines([_create_highlighted_text_list(line_indices) for line_indices in reversed(filter_pass_older_indices)]
+                               + [_create_highlighted_text_list(filtered_line_indices)])
+
+    def _update_channel_column():
+        """
+        Update whether the channel column is shown
+
+        Returns True if it changed, the log has to be reprinted then
+        """
+        nonlocal channel_column_shown
+        if channel_column_mode == "auto":
+            shown = len(log_store.channel_numbers) > 1
         else:
-            if new_log_lines == []:
-                # old filtered messages but no new filtered messages
-                if highlight_string_changed == True:
-                    highlighted_list = _create_highlighted_text_list(applied_highlight_string, old_log_lines)
-                else:
-                    highlighted_list = old_log_lines
-            else:
-                # old filtered messages and new filtered messages
-                if highlight_string_changed == True:
-                    highlighted_list = _create_highlighted_text_list(applied_highlight_string, old_log_lines + new_log_lines)
-                else:
-                    highlighted_list =  old_log_lines +_create_highlighted_text_list(applied_highlight_string, new_log_lines)
-        return highlighted_list
+            shown = channel_column_mode == "always"
+        if shown == channel_column_shown:
+            return False
+        channel_column_shown = shown
+        return True
 
-    def _highlight_text(highlight_string, old_log_lines, new_log_lines):
+    def _highlight_text(highlight_string, new_filtered_indices, filter_reprint):
         """
         Highlight matching text in the log and determine append mode
+
+        A changed highlight string only replaces the highlight rules, the log
+        view re-tags the visible lines from the filtered lines of the update.
         """
         # access variables of outer scopes
-        nonlocal old_highlight_string, last_applied_highlight_string
+        nonlocal old_highlight_string, last_applied_highlight_string, highlight_rules
         global last_highlight_change_time
 
-        # init variables
-        highlighted_list = []
-        append = True
-
         if last_applied_highlight_string != highlight_string:
             # change timer expired for new highlight string
             last_applied_highlight_string = highlight_string
-            highlighted_list = _assemble_changed_highlighted_list(old_log_lines, new_log_lines, last_applied_highlight_string, True)
+            highlight_rules = highlight_rules.with_user_highlight(last_applied_highlight_string)
+
+        if filter_reprint:
+            # filter changed, reprint the filtered lines
+            highlighted_list = _get_filtered_lines()
+            # only the lines the log view can hold are reprinted
+            if log_view.max_displayed_lines:
+                highlighted_list = highlighted_list[-log_view.max_displayed_lines:]
             append = False
-        elif new_log_lines != []:
-            # old highlight string, new lines added, highlight them
-            highlighted_list = _assemble_changed_highlighted_list([], new_log_lines, last_applied_highlight_string, False)
-            append = True
         else:
-            # old highlight string, no change
-            pass
+            # append new lines only
+            highlighted_list = _create_highlighted_text_list(new_filtered_indices)
+            append = True
 
         return highlighted_list, append
 
-    def process_log_text(new_text = "", filter_string = None, highlight_string = None, pause_string = None):
+    def process_log_text(new_text = "", filter_string = None, highlight_string = None, pause_string = None, new_lines = None, read_times = None,
+                         channels = None):
         """
         Process new log text and return update info
+
+        New lines can be passed as text (new_text) or as a batch of lines (new_lines),
+        read_times are (offset, time.monotonic() read time) tuples of the batch,
+        channels (offset, RTT channel) tuples.
+        The update info carries the read time of the oldest newly visible line,
+        None if there is none or the lines were held back by a pause.
         """
-        global old_raw_log_lines, old_filtered_lines, last_log_gui_filter_update_date
+        global processed_line_count, last_log_gui_filter_update_date
         nonlocal active_pause_string, active_filter_string, active_highlight_string
 
         # parse input parameter
@@ -187,40 +325,117 @@ def create_log_processor_and_displayer(log_view):
             active_pause_string = pause_string
 
         # add new text lines to raw log
-        new_lines = [(line, False) for line in new_text.split('\n') if line]
+        if new_text:
+            log_store.append_lines([line for line in new_text.split('\n') if line])
+        if new_lines:
+            log_store.append_lines(new_lines, read_times, channels)
 
         # handle pausing
         current_pause_state = True if active_pause_string == "Unpause" else False
-        old_lines_after_pausing, new_lines_after_pausing = _handle_pausing(old_raw_log_lines, new_lines, current_pause_state)
+        held_back_by_pause = paused or rendering_backlog
+        visible_line_count = _handle_pausing(current_pause_state)
+        read_time = None
+        if visible_line_count > processed_line_count and not held_back_by_pause:
+            read_time = log_store.get_read_time(processed_line_count)
 
         # filter text with filter string
-        new_filtered_lines, old_filtered_lines, filter_reprint = _handle_filtering(old_lines_after_pausing, new_lines_after_pausing, old_filtered_lines, active_filter_string)
+        filtering_start_time = time.perf_counter()
+        new_filtered_indices, filter_reprint = _handle_filtering(visible_line_count, active_filter_string)
+        pipeline_metrics.record("filtering", time.perf_counter() - filtering_start_time,
+                                visible_line_count if filter_reprint else visible_line_count - processed_line_count)
 
-        # add highlighting information with highlight string
-        highlighted_text_list, append = _highlight_text(active_highlight_string, old_filtered_lines, new_filtered_lines)
-
-        # determine final append
-        append = False if filter_reprint == True else append
+        # add highlighting information with highlight string, showing the channel column needs a reprint
+        column_reprint = _update_channel_column()
+        highlighted_text_list, append = _highlight_text(active_highlight_string, new_filtered_indices, filter_reprint or column_reprint)
 
         # update state
-        old_raw_log_lines = old_raw_log_lines.copy() + new_lines
-        old_filtered_lines = old_filtered_lines.copy() + new_filtered_lines
+        processed_line_count = visible_line_count
         last_log_gui_filter_update_date = datetime.datetime.now()
 
         return {
             "highlighted_text_list": highlighted_text_list,
             "append": append,
+            "prepend": False,
+            # complete filtered log, used by the log view to render and tag the visible lines
+            "filtered_lines": _get_filtered_lines(),
+            "read_time": read_time,
+        }
+
+    def has_pending_work():
+        """
+        Check if lines received during a pause are unprocessed or a progressive filter pass is in flight
+        """
+        return rendering_backlog or filter_pass is not None
+
+    def process_pending_work():
+        """
+        Process the next batch of lines received during a pause or
+        filter the next slice of older history of an in-flight filter pass
+
+        Returns update info appending the next batch or prepending the older
+        filtered lines, None if there is no pending work
+        """
+        nonlocal filter_pass, filter_pass_older_indices
+        global filtered_line_indices
+
+        if rendering_backlog:
+            return process_log_text()
+        if filter_pass is None:
+            return None
+        if filter_pass_log_store is not log_store:
+            # log was cleared
+            filter_pass.cancel()
+            filter_pass = None
+            filter_pass_older_indices = []
+            return None
+
+        filtering_start_time = time.perf_counter()
+        older_filtered_indices = filter_pass.run_slice(PROGRESSIVE_FILTER_SLICE_TIME_s)
+        pipeline_metrics.record("filtering", time.perf_counter() - filtering_start_time, len(older_filtered_indices))
+        filter_pass_older_indices.append(older_filtered_indices)
+        if filter_pass.done:
+            # join the slices once, oldest first
+            line_indices = create_line_index_array()
+            for slice_indices in reversed(filter_pass_older_indices):
+                line_indices.extend(slice_indices)
+            line_indices.extend(filtered_line_indices)
+            filtered_line_indices = line_indices
+            filter_pass = None
+            filter_pass_older_indices = []
+            filter_cache.put(last_applied_filter_string, filtered_line_indices, processed_line_count)
+
+        return {
+            "highlighted_text_list": _create_highlighted_text_list(older_filtered_indices),
+            "append": True,
+            "prepend": True,
+            "filtered_lines": _get_filtered_lines(),
+            "read_time": None,
         }
 
     def clear_log():
-        global old_raw_log_lines, old_filtered_lines, old_lines_after_pausing
-        old_raw_log_lines = []
-        old_filtered_lines = []
-        old_lines_after_pausing = []
-        log_view.update_log("", append=False)
+        """
+        Clear the log, must run on the thread processing the log like process_log_text
+
+        Returns update info reprinting the empty log
+        """
+        nonlocal filter_pass, filter_pass_older_indices
+        if filter_pass is not None:
+            filter_pass.cancel()
+            filter_pass = None
+        filter_pass_older_indices = []
+        clear_log_data()
+        return {
+            "highlighted_text_list": _create_highlighted_text_list(filtered_line_indices),
+            "append": False,
+            "prepend": False,
+            "filtered_lines": _create_highlighted_text_list(filtered_line_indices),
+            "read_time": None,
+        }
 
     return {
         "process": process_log_text,
+        "has_pending_work": has_pending_work,
+        "process_pending_work": process_pending_work,
         "clear": clear_log
     }
 
@@ -228,7 +443,9 @@ def get_last_log_gui_filter_update_date():
     return last_log_gui_filter_update_date
 
 def clear_log_data():
-    global old_raw_log_lines, old_filtered_lines, old_lines_after_pausing
-    old_raw_log_lines = []
-    old_filtered_lines = []
-    old_lines_after_pausing = []
+    global log_store, filtered_line_indices, processed_line_count
+    # replace instead of clearing the store, so queued display updates stay valid
+    log_store = log_store.create_empty_copy()
+    filtered_line_indices = range(0)
+    processed_line_count = 0
+    filter_cache.clear()
@@ -0,0 +1,371 @@
+import bisect
+import tempfile
+import threading
+from array import array
+
+# Constants
+LOG_STORE_BLOCK_SIZE = 4096
+# Estimated memory overhead of a stored Python string in bytes
+LINE_MEMORY_OVERHEAD_BYTES = 50
+# Stored read time of lines without read time
+NO_READ_TIME = float('nan')
+# Stored RTT channel of lines without channel, e.g. status messages
+NO_CHANNEL = -1
+
+
+class _BatchValues:
+    """
+    Values stored per batch of consecutive lines instead of per line, e.g. read times.
+
+    A value is only stored when it differs from the value of the previous
+    batch, lookups of consecutive indices of one batch only cost a comparison.
+    """
+
+    def __init__(self, typecode, missing_value):
+        # lines from line_indices[n] on have values[n]
+        self._line_indices = array('q')
+        self._values = array(typecode)
+        self._missing_value = missing_value
+
+    def _is_missing(self, value):
+        # NaN is not equal to itself
+        return value == self._missing_value or value != value
+
+    def _is_equal(self, value, other_value):
+        return value == other_value or (self._is_missing(value) and self._is_missing(other_value))
+
+    def append(self, first_index, batch_values):
+        """
+        Append (offset, value) tuples of lines appended at first_index, None for missing values.
+        """
+        for offset, value in batch_values:
+            value = self._missing_value if value is None else value
+            if self._values and self._is_equal(self._values[-1], value):
+                # same value as the previous lines
+                continue
+            if self._line_indices and self._line_indices[-1] == first_index + offset:
+                self._values[-1] = value
+            else:
+                self._line_indices.append(first_index + offset)
+                self._values.append(value)
+
+    def get(self, indices, line_count):
+        """
+        Get the values of a sequence of global line indices, None for missing values.
+        """
+        line_indices = self._line_indices
+        batch_start = batch_stop = 0
+        value = None
+        values = []
+        for index in indices:
+            if not batch_start <= index < batch_stop:
+                batch_no = bisect.bisect_right(line_indices, index) - 1
+                if batch_no < 0:
+                    values.append(None)
+                    continue
+                batch_start = line_indices[batch_no]
+                batch_stop = line_indices[batch_no + 1] if batch_no + 1 < len(line_indices) else line_count
+                value = self._values[batch_no]
+                if self._is_missing(value):
+                    value = None
+            values.append(value)
+        return values
+
+
+class LogStore:
+    """
+    Append-only store for log lines.
+
+    Lines are kept in fixed-size blocks and addressed by a global line index.
+    Appending never copies lines that are already stored, so the cost of an
+    append only depends on the number of new lines, not on the history size.
+    Views on the log (filtered lines, paused lines) are index arrays or
+    offsets into the store.
+
+    A lowercase copy of each line is created once on append, so
+    case-insensitive filters do not have to lower the lines on every pass.
+
+    Optionally the number of lines kept in memory is bounded. When the limit is
+    exceeded the oldest blocks are spilled to a temporary segment file. Spilled
+    lines keep their global line index and can still be read, filtered and
+    searched, they are just read back from disk.
+
+    Lines can carry the host time they were read from the probe and the RTT
+    channel they were read from. Both are stored per batch of lines read
+    together, not per line.
+    """
+
+    def __init__(self, block_size=LOG_STORE_BLOCK_SIZE, max_memory_lines=None, max_memory_bytes=None, spill_directory=None):
+        self._block_size = block_size
+        self._blocks = []
+        self._lower_blocks = []
+        self._block_memory_bytes = []
+        self._line_count = 0
+        # memory limits
+        self._max_memory_lines = max_memory_lines
+        self._max_memory_bytes = max_memory_bytes
+        self._spill_directory = spill_directory
+        self._memory_bytes = 0
+        # spilled blocks, block n is stored at [offsets[n], offsets[n + 1]) of the spill file
+        self._spilled_block_count = 0
+        self._spill_offsets = [0]
+        self._spill_file = None
+        self._spill_lock = threading.Lock()
+        self._spilled_block_cache = (None, None, None)
+        self._read_times = _BatchValues('d', NO_READ_TIME)
+        self._channels = _BatchValues('h', NO_CHANNEL)
+        self._channel_numbers = set()
+
+    def __len__(self):
+        return self._line_count
+
+    def __getitem__(self, index):
+        """
+        Get a single line by its global line index.
+        """
+        if index < 0:
+            index += self._line_count
+        if index < 0 or index >= self._line_count:
+            raise IndexError("log line index out of range")
+        block_no, offset = divmod(index, self._block_size)
+        return self._get_block(block_no)[offset]
+
+    @property
+    def block_size(self):
+        return self._block_size
+
+    @property
+    def spilled_line_count(self):
+        """
+        Number of lines moved from memory to the spill file.
+        """
+        return self._spilled_block_count * self._block_size
+
+    @property
+    def memory_line_count(self):
+        """
+        Number of lines kept in memory.
+        """
+        return self._line_count - self.spilled_line_count
+
+    def set_memory_limits(self, max_memory_lines=None, max_memory_bytes=None, spill_directory=None):
+        """
+        Bound the lines kept in memory, older lines are spilled to disk.
+
+        Args:
+            max_memory_lines (int, optional): Maximum number of lines in memory.
+            max_memory_bytes (int, optional): Maximum estimated memory of the stored lines.
+            spill_directory (str, optional): Directory of the spill file, system temp dir by default.
+        """
+        self._max_memory_lines = max_memory_lines
+        self._max_memory_bytes = max_memory_bytes
+        self._spill_directory = spill_directory
+        self._spill_blocks()
+
+    def _get_block(self, block_no, lower=False):
+        block = self._lower_blocks[block_no] if lower else self._blocks[block_no]
+        if block is None:
+            return self._read_spilled_block(block_no, lower)
+        return block
+
+    def _read_spilled_block(self, block_no, lower=False):
+        with self._spill_lock:
+            cached_block_no, cached_block, cached_lower_block = self._spilled_block_cache
+            if cached_block_no != block_no:
+                self._spill_file.seek(self._spill_offsets[block_no])
+                data = self._spill_file.read(self._spill_offsets[block_no + 1] - self._spill_offsets[block_no])
+                cached_block = data.decode('utf-8').split('\n')
+                cached_block.pop()
+                cached_lower_block = None
+            if lower and cached_lower_block is None:
+                cached_lower_block = [line.lower() for line in cached_block]
+            self._spilled_block_cache = (block_no, cached_block, cached_lower_block)
+            return cached_lower_block if lower else cached_block
+
+    def _is_memory_limit_exceeded(self):
+        if self._max_memory_lines is not None and self.memory_line_count > self._max_memory_lines:
+            return True
+        if self._max_memory_bytes is not None and self._memory_bytes > self._max_memory_bytes:
+            return True
+        return False
+
+    def _spill_blocks(self):
+        """
+        Move the oldest blocks to the spill file until the memory limits are met.
+        The block currently filled is never spilled.
+        """
+        while self._is_memory_limit_exceeded() and self._spilled_block_count < len(self._blocks) - 1:
+            block_no = self._spilled_block_count
+            data = ('\n'.join(self._blocks[block_no]) + '\n').encode('utf-8', errors='replace')
+            with self._spill_lock:
+                if self._spill_file is None:
+                    self._spill_file = tempfile.TemporaryFile(prefix='rtt_log_', suffix='.spill', dir=self._spill_directory)
+                self._spill_file.seek(self._spill_offsets[-1])
+                self._spill_file.write(data)
+                self._spill_offsets.append(self._spill_offsets[-1] + len(data))
+            self._blocks[block_no] = None
+            self._lower_blocks[block_no] = None
+            self._memory_bytes -= self._block_memory_bytes[block_no]
+            self._block_memory_bytes[block_no] = 0
+            self._spilled_block_count += 1
+
+    def append_lines(self, lines, read_times=None, channels=None):
+        """
+        Append lines to the store.
+
+        Args:
+            lines (list): Lines (str) to append.
+            read_times (list, optional): (offset, read time) tuples, the lines from
+                offset on were read at the time.monotonic() read time.
+            channels (list, optional): (offset, channel) tuples, the lines from
+                offset on were read from the RTT up-channel.
+
+        Returns:
+            int: Global index of the first appended line.
+        """
+        first_index = self._line_count
+        if lines:
+            self._read_times.append(first_index, read_times or ((0, None),))
+            channels = channels or ((0, None),)
+            self._channels.append(first_index, channels)
+            self._channel_numbers.update(channel for _, channel in channels if channel is not None)
+        position = 0
+        while position < len(lines):
+            if not self._blocks or len(self._blocks[-1]) >= self._block_size:
+                self._blocks.append([])
+                self._lower_blocks.append([])
+                self._block_memory_bytes.append(0)
+            block = self._blocks[-1]
+            new_lines = lines[position:position + self._block_size - len(block)]
+            new_lower_lines = []
+            memory_bytes = 0
+            for line in new_lines:
+                lower_line = line.lower()
+                memory_bytes += len(line) + LINE_MEMORY_OVERHEAD_BYTES
+                if lower_line == line:
+                    # share the line object if it is lowercase already
+                    lower_line = line
+                else:
+                    memory_bytes += len(lower_line) + LINE_MEMORY_OVERHEAD_BYTES
+                new_lower_lines.append(lower_line)
+            block.extend(new_lines)
+            self._lower_blocks[-1].extend(new_lower_lines)
+            self._block_memory_bytes[-1] += memory_bytes
+            self._memory_bytes += memory_bytes
+            position += len(new_lines)
+        # update the line count last, readers only access lines below it
+        self._line_count += len(lines)
+        self._spill_blocks()
+        return first_index
+
+    def get_read_time(self, index):
+        """
+        Get the time.monotonic() time a line was read, None if unknown.
+        """
+        return self.get_read_times((index,))[0]
+
+    def get_read_times(self, indices):
+        """
+        Get the read times of a sequence of global line indices, None for unknown read times.
+
+        Consecutive indices of the same read batch only cost a comparison.
+        """
+        return self._read_times.get(indices, self._line_count)
+
+    def get_channels(self, indices):
+        """
+        Get the RTT channels of a sequence of global line indices, None for lines without channel.
+        """
+        return self._channels.get(indices, self._line_count)
+
+    @property
+    def channel_numbers(self):
+        """
+        RTT channels of the stored lines.
+        """
+        return frozenset(self._channel_numbers)
+
+    def iter_lines(self, start=0, stop=None, lower=False):
+        """
+        Iterate over (index, line) tuples of a global line index range.
+
+        Args:
+            start (int): First global line index.
+            stop (int, optional): End of the range, the end of the log by default.
+            lower (bool): Iterate over the lowercase copies of the lines.
+        """
+        stop = self._line_count if stop is None else min(stop, self._line_count)
+        index = max(start, 0)
+        while index < stop:
+            block_no, offset = divmod(index, self._block_size)
+            block = self._get_block(block_no, lower)
+            end = min(len(block), offset + stop - index)
+            for line in block[offset:end]:
+                yield index, line
+                index += 1
+
+    def get_text(self, start, stop, lower=False):
+        """
+        Get the lines of a global line index range joined by line feeds.
+        """
+        stop = min(stop, self._line_count)
+        parts = []
+        index = max(start, 0)
+        while index < stop:
+            block_no, offset = divmod(index, self._block_size)
+            block = self._get_block(block_no, lower)
+            end = min(len(block), offset + stop - index)
+            parts.append('\n'.join(block[offset:end]))
+            index += end - offset
+        return '\n'.join(parts)
+
+    def get_lines(self, indices, lower=False):
+        """
+        Get the lines (or their lowercase copies) for a sequence of global line indices.
+        """
+        block_size = self._block_size
+        blocks = self._lower_blocks if lower else self._blocks
+        lines = []
+        for index in indices:
+            block_no, offset = divmod(index, block_size)
+            block = blocks[block_no]
+            if block is None:
+                block = self._read_spilled_block(block_no, lower)
+            lines.append(block[offset])
+        return lines
+
+    def create_empty_copy(self):
+        """
+        Create an empty store with the same block size and memory limits.
+
+        Unlike clear() this keeps lazy views on the lines of this store valid,
+        e.g. updates still queued for display.
+        """
+        return LogStore(self._block_size, self._max_memory_lines, self._max_memory_bytes, self._spill_directory)
+
+    def clear(self):
+        """
+        Remove all lines from the store.
+        """
+        self._line_count = 0
+        self._blocks = []
+        self._lower_blocks = []
+        self._block_memory_bytes = []
+        self._memory_bytes = 0
+        with self._spill_lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+            self._spilled_block_count = 0
+            self._spill_offsets = [0]
+            self._spilled_block_cache = (None, None, None)
+        self._read_times = _BatchValues('d', NO_READ_TIME)
+        self._channels = _BatchValues('h', NO_CHANNEL)
+        self._channel_numbers = set()
+
+
+def create_line_index_array(indices=()):
+    """
+    Create a compact array for global line indices (e.g. filter results).
+    """
+    return array('q', indices)
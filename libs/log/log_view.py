@@ -1,17 +1,30 @@
 import time
 import tkinter as tk
+import tkinter.font as tkfont
 import FreeSimpleGUI as sg
+from libs.log.filter_expression import get_filter_error
+from libs.log.highlight_rules import get_highlight_tag_colors
 
 # Constants
-FILTER_APPLICATION_WAIT_TIME_s = 1
+FILTER_APPLICATION_WAIT_TIME_s = 0.3
 COLOR_BLUE = 'blue'
 COLOR_HIGHLIGHT = 'LightGreen'
 COLOR_BLACK = 'black'
 COLOR_LIGHT_GREY = "LightGray"
+COLOR_INVALID_INPUT = "LightCoral"
+# Maximum number of lines held by the log widget, older lines are trimmed
+MAX_DISPLAYED_LINES = 100000
+# Lines rendered above and below the viewport in virtual view mode
+VIRTUAL_VIEW_MARGIN_LINES = 100
+MOUSE_WHEEL_SCROLL_LINES = 3
+# Lines tagged above and below the viewport, so scrolling shows tagged lines right away
+HIGHLIGHT_MARGIN_LINES = 100
 
 class LogView:
-    def __init__(self, log_widget, filter_widget, highlight_widget, pause_button, window):
+    def __init__(self, log_widget, filter_widget, highlight_widget, pause_button, window, max_displayed_lines=MAX_DISPLAYED_LINES, virtual=False):
         self.window = window
+        self.max_displayed_lines = max_displayed_lines
+        self.virtual = virtual
         # store widgets
         self.log_widget = log_widget
         self.filter_input_widget = filter_widget
@@ -23,45 +36,213 @@ class LogView:
         # input fields
         self.last_filter_change_time = 0
         self.last_highlight_change_time = 0
-        self.last_mcu_change_time = 0
         self.last_filter_input = ""
         self.last_highlight_input = ""
-        self.last_mcu_input = ""
         self.active_highlight_string = ""
         self.active_filter_string = ""
-        self.active_mcu_string = ""
         # configure tags
-        self.log_widget.Widget.tag_config("highlight", foreground="LightGreen")
+        self.highlight_tag_colors = get_highlight_tag_colors()
+        for tag, color in self.highlight_tag_colors.items():
+            self.log_widget.Widget.tag_config(tag, foreground=color)
         # log state
         self.current_line_no = 1
+        # filtered log the widget shows the last lines of, used to tag the visible lines
+        self._displayed_lines = []
+        self._tagging_scheduled = False
+        # virtual view state
+        if self.virtual:
+            self._init_virtual_view()
+        else:
+            self.log_widget.Widget.configure(yscrollcommand=self._on_log_scrolled)
+
+    def _init_virtual_view(self):
+        """
+        Set up the virtual view mode
+
+        The log widget only holds the lines of the viewport plus a margin,
+        the scrollbar is mapped to the line count of the complete filtered log.
+        """
+        text_widget = self.log_widget.Widget
+        self._virtual_lines = []
+        self._virtual_top_line = 0
+        self._virtual_follow_tail = True
+        self._line_height_px = max(1, tkfont.Font(font=text_widget.cget('font')).metrics('linespace'))
+        # detach the scrollbar from the widget content
+        text_widget.configure(yscrollcommand=lambda first, last: None)
+        if self.log_widget.vsb is not None:
+            self.log_widget.vsb.configure(command=self._on_virtual_scrollbar)
+        text_widget.bind('<MouseWheel>', self._on_virtual_mouse_wheel)
+        text_widget.bind('<Button-4>', self._on_virtual_mouse_wheel)
+        text_widget.bind('<Button-5>', self._on_virtual_mouse_wheel)
+        text_widget.bind('<Prior>', lambda event: self._on_virtual_page_key(-1))
+        text_widget.bind('<Next>', lambda event: self._on_virtual_page_key(1))
+        text_widget.bind('<Configure>', lambda event: self.render_virtual_view())
+
+    def _on_log_scrolled(self, first, last):
+        if self.log_widget.vsb is not None:
+            self.log_widget.vsb.set(first, last)
+        if not self._tagging_scheduled:
+            # tag once the widget is idle, scrolling generates many events
+            self._tagging_scheduled = True
+            self.log_widget.Widget.after_idle(self.tag_visible_lines)
+
+    def tag_visible_lines(self):
+        """
+        Apply the highlight tags to the lines around the viewport
+
+        The highlight rules are only evaluated for these lines, so the cost of a
+        new highlight string or a reprint does not depend on the log size.
+        """
+        self._tagging_scheduled = False
+        text_widget = self.log_widget.Widget
+        displayed_line_count = self.current_line_no - 1
+        # the widget shows the last lines of the filtered log
+        first_line_offset = len(self._displayed_lines) - displayed_line_count
+        if displayed_line_count <= 0 or first_line_offset < 0:
+            return
+        first_visible_line_no = int(text_widget.index("@0,0").split('.')[0])
+        last_visible_line_no = int(text_widget.index(f"@0,{text_widget.winfo_height()}").split('.')[0])
+        start_line_no = max(1, first_visible_line_no - HIGHLIGHT_MARGIN_LINES)
+        stop_line_no = min(displayed_line_count, last_visible_line_no + HIGHLIGHT_MARGIN_LINES)
+        for tag in self.highlight_tag_colors:
+            text_widget.tag_remove(tag, f"{start_line_no}.0", f"{stop_line_no + 1}.0")
+        visible_lines = self._displayed_lines[first_line_offset + start_line_no - 1:first_line_offset + stop_line_no]
+        for line_no, (_, tag) in enumerate(visible_lines, start_line_no):
+            if tag is not None:
+                text_widget.tag_add(tag, f"{line_no}.0", f"{line_no}.0 lineend")
+
+    def _get_viewport_line_count(self):
+        return max(1, self.log_widget.Widget.winfo_height() // self._line_height_px)
+
+    def _on_virtual_scrollbar(self, *args):
+        viewport_line_count = self._get_viewport_line_count()
+        if args[0] == 'moveto':
+            self.scroll_virtual_view_to(int(float(args[1]) * len(self._virtual_lines)))
+        elif args[0] == 'scroll':
+            line_delta = int(args[1]) * (viewport_line_count if args[2] == 'pages' else 1)
+            self.scroll_virtual_view_to(self._virtual_top_line + line_delta)
+
+    def _on_virtual_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_virtual_view_to(self._virtual_top_line - MOUSE_WHEEL_SCROLL_LINES)
+        else:
+            self.scroll_virtual_view_to(self._virtual_top_line + MOUSE_WHEEL_SCROLL_LINES)
+        return "break"
+
+    def _on_virtual_page_key(self, direction):
+        self.scroll_virtual_view_to(self._virtual_top_line + direction * self._get_viewport_line_count())
+        return "break"
+
+    def scroll_virtual_view_to(self, top_line):
+        """
+        Show the filtered log starting at top_line, scrolling to the end follows new lines
+        """
+        max_top_line = max(0, len(self._virtual_lines) - self._get_viewport_line_count())
+        self._virtual_top_line = min(max(0, top_line), max_top_line)
+        self._virtual_follow_tail = self._virtual_top_line >= max_top_line
+        self.render_virtual_view()
+
+    def render_virtual_view(self):
+        """
+        Render the viewport of the virtual view, the cost only depends on the viewport size
+        """
+        text_widget = self.log_widget.Widget
+        line_count = len(self._virtual_lines)
+        viewport_line_count = self._get_viewport_line_count()
+        max_top_line = max(0, line_count - viewport_line_count)
+        top_line = max_top_line if self._virtual_follow_tail else min(self._virtual_top_line, max_top_line)
+        self._virtual_top_line = top_line
+
+        # render viewport with margin
+        start = max(0, top_line - VIRTUAL_VIEW_MARGIN_LINES)
+        stop = min(line_count, top_line + viewport_line_count + VIRTUAL_VIEW_MARGIN_LINES)
+        text_widget.delete("1.0", tk.END)
+        self.current_line_no = 1
+        self._insert_highlighted_lines(self._virtual_lines[start:stop], tagged=True)
+        text_widget.yview(f"{top_line - start + 1}.0")
+
+        # map scrollbar to the complete filtered log
+        if self.log_widget.vsb is not None:
+            if line_count:
+                self.log_widget.vsb.set(top_line / line_count, min(1.0, (top_line + viewport_line_count) / line_count))
+            else:
+                self.log_widget.vsb.set(0.0, 1.0)
 
     def clear_log(self):
         self.update_log("", append=False)
         self.current_line_no = 1
+        self._displayed_lines = []
+        if self.virtual:
+            self._virtual_lines = []
+            self._virtual_top_line = 0
+            self._virtual_follow_tail = True
 
-    def insert_highlighted_text(self, highlighted_text_list):
-        if not highlighted_text_list:
+    def trim_log(self):
+        """
+        Remove the oldest lines from the log widget if it holds more than the maximum displayed lines
+        """
+        displayed_line_count = self.current_line_no - 1
+        if not self.max_displayed_lines or displayed_line_count <= self.max_displayed_lines:
             return
+        excess_line_count = displayed_line_count - self.max_displayed_lines
+        self.log_widget.Widget.delete("1.0", f"{excess_line_count + 1}.0")
+        self.current_line_no -= excess_line_count
 
-        # Get start position before insertion
-        start_index = "0.0" #self.log_widget.Widget.index(tk.END)
+    def _insert_highlighted_lines(self, highlighted_text_list, index=tk.END, first_line_no=None, tagged=False):
+        """
+        Insert lines at a widget index, the highlight tags are applied if tagged is set
 
+        Untagged lines are tagged by tag_visible_lines once they are visible.
+        Returns the number of inserted lines
+        """
+        first_line_no = self.current_line_no if first_line_no is None else first_line_no
         # Build single string and tag ranges
-        full_text = ""
-        tag_ranges = []
-        for text, highlighted in highlighted_text_list:
-            line_text = text + '\n'
-            full_text += line_text
-            if highlighted:
-                start = f"{self.current_line_no}.0"
-                end = f"{self.current_line_no}.0 lineend" #f"{start}+{len(text)}c"
-                tag_ranges.append((start, end))
-            self.current_line_no += 1
+        if not tagged:
+            if hasattr(highlighted_text_list, 'texts'):
+                text_lines = list(highlighted_text_list.texts())
+            else:
+                text_lines = [text for text, _ in highlighted_text_list]
+            tag_ranges = []
+        else:
+            text_lines = []
+            tag_ranges = []
+            for text, tag in highlighted_text_list:
+                if tag is not None:
+                    line_no = first_line_no + len(text_lines)
+                    tag_ranges.append((tag, f"{line_no}.0", f"{line_no}.0 lineend"))
+                text_lines.append(text)
+        if not text_lines:
+            return 0
 
         # Bulk insert and apply tags
-        self.log_widget.Widget.insert(tk.END, full_text)
-        for start, end in tag_ranges:
-            self.log_widget.Widget.tag_add("highlight", start, end)
+        self.log_widget.Widget.insert(index, '\n'.join(text_lines) + '\n')
+        for tag, start, end in tag_ranges:
+            self.log_widget.Widget.tag_add(tag, start, end)
+        self.current_line_no += len(text_lines)
+        return len(text_lines)
+
+    def prepend_highlighted_text(self, highlighted_text_list):
+        """
+        Insert older lines at the top of the log, as far as the log widget has room for them
+        """
+        if self.max_displayed_lines:
+            free_line_count = self.max_displayed_lines - (self.current_line_no - 1)
+            if free_line_count <= 0:
+                return
+            highlighted_text_list = highlighted_text_list[-free_line_count:]
+        scrolled_to_end = self.log_widget.Widget.yview()[1] >= 1.0
+        self._insert_highlighted_lines(highlighted_text_list, index="1.0", first_line_no=1)
+        if scrolled_to_end:
+            self.log_widget.Widget.see(tk.END)
+
+    def insert_highlighted_text(self, highlighted_text_list):
+        if not highlighted_text_list:
+            return
+        if self.max_displayed_lines and len(highlighted_text_list) > self.max_displayed_lines:
+            highlighted_text_list = highlighted_text_list[-self.max_displayed_lines:]
+
+        self._insert_highlighted_lines(highlighted_text_list)
+        self.trim_log()
 
         # Scroll only once
         self.log_widget.Widget.see(tk.END)
@@ -77,13 +258,17 @@ class LogView:
         self.window[gui_element_label].update(background_color=self.default_background_color)
         self.window[gui_element_label].update(text_color=self.default_text_color)
 
+    def set_invalid_color_for_input_widget(self, gui_element_label):
+        self.window[gui_element_label].update(background_color=COLOR_INVALID_INPUT)
+        self.window[gui_element_label].update(text_color=COLOR_BLACK)
+
     def handle_coloring_of_input_widget(self, input_active, input_label):
         if input_active:
             self.set_highlight_color_for_input_widget(input_label)
         else:
             self.set_default_color_for_input_widget(input_label)
     
-    def handle_widget_highlighting(self, filter_input, highlight_input, mcu_input):
+    def handle_widget_highlighting(self, filter_input, highlight_input):
         retVal = {}
         current_time = time.time()
 
@@ -96,10 +281,6 @@ class LogView:
             self.last_highlight_input = highlight_input
             self.last_highlight_change_time = current_time
             self.handle_coloring_of_input_widget(True, "-HIGHLIGHT-")
-        if self.last_mcu_input != mcu_input:
-            self.last_mcu_input = mcu_input
-            self.last_mcu_change_time = current_time
-            self.handle_coloring_of_input_widget(True, "-MCU-")
 
         # Handle application of changed input stings
         ## highlight input widget
@@ -107,22 +288,22 @@ class LogView:
            and (self.active_filter_string != self.last_filter_input):
             # change timer expired for new filter string
             self.active_filter_string = self.last_filter_input
-            self.handle_coloring_of_input_widget(False, "-FILTER-")
+            if get_filter_error(self.active_filter_string) is not None:
+                # invalid expressions are applied as plain substring
+                self.set_invalid_color_for_input_widget("-FILTER-")
+            else:
+                self.handle_coloring_of_input_widget(False, "-FILTER-")
             retVal["filter_string"] = self.active_filter_string
         ## highlight input widget
         if (current_time - self.last_highlight_change_time > FILTER_APPLICATION_WAIT_TIME_s) \
            and (self.active_highlight_string != self.last_highlight_input):
             # change timer expired for new highlight string
             self.active_highlight_string = self.last_highlight_input
-            self.handle_coloring_of_input_widget(False, "-HIGHLIGHT-")
+            if get_filter_error(self.active_highlight_string) is not None:
+                self.set_invalid_color_for_input_widget("-HIGHLIGHT-")
+            else:
+                self.handle_coloring_of_input_widget(False, "-HIGHLIGHT-")
             retVal["highlight_string"] = self.active_highlight_string
-        ## highlight mcu widget
-        if (current_time - self.last_mcu_change_time > FILTER_APPLICATION_WAIT_TIME_s) \
-           and (self.active_mcu_string != self.last_mcu_input):
-            # change timer expired for new mcu string
-            self.active_mcu_string = self.last_mcu_input
-            self.handle_coloring_of_input_widget(False, "-MCU-")
-            retVal["mcu_string"] = self.active_mcu_string
 
         return retVal
 
@@ -130,13 +311,27 @@ class LogView:
         """
         Display the processed log update
         """
+        if self.virtual:
+            # render the viewport of the complete filtered log
+            self._virtual_lines = update_info['filtered_lines']
+            self.render_virtual_view()
+            return
+
         # parse input dict
         highlighted_text_list = update_info['highlighted_text_list']
         append = update_info['append']
 
-        # Reset log
-        if append == False:
-            self.clear_log()
+        if update_info.get('prepend', False):
+            # Older lines of a progressive filter pass
+            self.prepend_highlighted_text(highlighted_text_list)
+        else:
+            # Reset log
+            if append == False:
+                self.clear_log()
+
+            # Inset log lines in log widget
+            self.insert_highlighted_text(highlighted_text_list)
 
-        # Inset log lines in log widget
-        self.insert_highlighted_text(highlighted_text_list)
\ No newline at end of file
+        # Tag the visible lines, the filtered lines carry the current highlight rules
+        self._displayed_lines = update_info['filtered_lines']
+        self.tag_visible_lines()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from libs.log.filter_expression import compile_filter_or_substring
+from libs.log.log_store import create_line_index_array
+
+# Constants
+PARALLEL_FILTER_CHUNK_LINES = 65536
+# Chunks submitted to the pool per worker ahead of the collected results
+PARALLEL_FILTER_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+# Workers are started fresh instead of forked, a fork of the GUI process could inherit locks
+# held by the Tk, RTT reader or recording threads and deadlock
+PARALLEL_FILTER_START_METHOD = "spawn"
+
+
+def filter_text_chunk(filter_string, first_line_index, lower_text):
+    """
+    Worker function, filter a chunk of lowercase log lines joined by line feeds.
+
+    Returns:
+        array: Global line indices of the matching lines.
+    """
+    line_matcher = compile_filter_or_substring(filter_string)
+    return create_line_index_array(
+        first_line_index + line_no
+        for line_no, lower_line in enumerate(lower_text.split('\n'))
+        if line_matcher(lower_line)
+    )
+
+
+class ParallelFilterEngine:
+    """
+    Process pool for filtering large log histories on several cores.
+
+    The pool is started on first use. Filtering runs in worker processes, so
+    it neither holds the GIL of the GUI and RTT reader threads nor is limited
+    to a single core.
+    """
+
+    def __init__(self, max_workers=None):
+        self._max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self._executor = None
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    @property
+    def enabled(self):
+        return self._max_workers > 1
+
+    def configure(self, max_workers):
+        """
+        Set the number of worker processes, parallel filtering is disabled for less than 2 workers.
+        """
+        self.shutdown()
+        self._max_workers = max_workers
+
+    def submit(self, filter_string, first_line_index, lower_text):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers,
+                                                 mp_context=multiprocessing.get_context(PARALLEL_FILTER_START_METHOD))
+        return self._executor.submit(filter_text_chunk, filter_string, first_line_index, lower_text)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ParallelFilterPass:
+    """
+    Filter pass over the log history evaluated by a ParallelFilterEngine.
+
+    Works like ProgressiveFilterPass: the raw log lines [0, end) are filtered
+    backwards in chunks and each slice returns the matches of the chunks
+    finished so far, merged in log order. Only a few chunks per worker are in
+    flight, so preparing chunks does not stall the processing thread.
+    """
+
+    def __init__(self, filter_string, end, log_store, engine, apply_filter, chunk_lines=PARALLEL_FILTER_CHUNK_LINES):
+        """
+        Args:
+            filter_string (str): Filter to apply.
+            end (int): End of the raw log line range to filter.
+            log_store (LogStore): Store of the log lines.
+            engine (ParallelFilterEngine): Pool evaluating the chunks.
+            apply_filter: Function (filter_string, start, stop) used if a worker fails.
+            chunk_lines (int): Number of lines per chunk.
+        """
+        self.filter_string = filter_string
+        self._position = end
+        self._log_store = log_store
+        self._engine = engine
+        self._apply_filter = apply_filter
+        self._chunk_lines = chunk_lines
+        # (start, stop, future) of submitted chunks, newest chunk first
+        self._chunks_in_flight = deque()
+
+    @property
+    def done(self):
+        return self._position == 0 and not self._chunks_in_flight
+
+    @property
+    def remaining_line_count(self):
+        return self._position + sum(stop - start for start, stop, _ in self._chunks_in_flight)
+
+    def _submit_chunks(self):
+        max_chunks_in_flight = self._engine.max_workers * PARALLEL_FILTER_CHUNKS_IN_FLIGHT_PER_WORKER
+        while self._position > 0 and len(self._chunks_in_flight) < max_chunks_in_flight:
+            start = max(0, self._position - self._chunk_lines)
+            lower_text = self._log_store.get_text(start, self._position, lower=True)
+            future = self._engine.submit(self.filter_string, start, lower_text)
+            self._chunks_in_flight.append((start, self._position, future))
+            self._position = start
+
+    def _get_chunk_result(self, start, stop, future, timeout):
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            raise
+        except Exception:
+            # worker failed, e.g. the pool was terminated, filter the chunk here
+            return self._apply_filter(self.filter_string, start, stop)
+
+    def run_slice(self, time_budget_s, max_match_count=None):
+        """
+        Collect the results of finished chunks, waiting at most time_budget_s.
+
+        Returns:
+            array: Indices of the matching lines of the collected chunks, in log order.
+        """
+        start_time = time.perf_counter()
+        chunks = []
+        match_count = 0
+        self._submit_chunks()
+        while self._chunks_in_flight:
+            start, stop, future = self._chunks_in_flight[0]
+            remaining_time_s = time_budget_s - (time.perf_counter() - start_time)
+            try:
+                chunk = self._get_chunk_result(start, stop, future, max(0.0, remaining_time_s))
+            except TimeoutError:
+                break
+            self._chunks_in_flight.popleft()
+            chunks.append(chunk)
+            match_count += len(chunk)
+            self._submit_chunks()
+            if max_match_count is not None and match_count >= max_match_count:
+                break
+
+        line_indices = create_line_index_array()
+        for chunk in reversed(chunks):
+            line_indices.extend(chunk)
+        return line_indices
+
+    def cancel(self):
+        """
+        Cancel chunks not started by the pool yet.
+        """
+        for _, _, future in self._chunks_in_flight:
+            future.cancel()
+        self._chunks_in_flight.clear()
+        self._position = 0
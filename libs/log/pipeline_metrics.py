@@ -0,0 +1,356 @@
+import bisect
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Constants
+METRICS_RATE_INTERVAL_s = 1.0
+METRICS_EXPORT_INTERVAL_s = 1.0
+METRICS_EXPORT_FORMATS = ("json", "csv")
+# Upper bounds of the duration histogram buckets, 10 us to about 10 s in steps of 2
+DURATION_BUCKET_BOUNDS_s = tuple(10e-6 * 2 ** exponent for exponent in range(21))
+DURATION_PERCENTILES = (50, 95, 99)
+# Durations are reported over this sliding window, so the percentiles show current latency spikes
+DURATION_WINDOW_s = 10.0
+# The window is made of histograms of this time span, the oldest one is dropped as a whole
+DURATION_WINDOW_SLICE_s = 1.0
+# Stages of the log pipeline in data flow order
+PIPELINE_STAGES = ("read", "framing", "processing", "filtering", "rendering")
+# End-to-end latencies, from the probe read of a line to its display
+PIPELINE_LATENCIES = ("read_to_display",)
+
+
+class DurationHistogram:
+    """
+    Histogram of durations with fixed logarithmic buckets.
+
+    Recording is a bisect and an increment, so it can be done per batch in the
+    hot path. Percentiles are estimated as the upper bound of their bucket.
+    """
+
+    def __init__(self, bucket_bounds=DURATION_BUCKET_BOUNDS_s):
+        self._bucket_bounds = bucket_bounds
+        # the last bucket counts the durations above the last bound
+        self.bucket_counts = [0] * (len(bucket_bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration_s):
+        self.bucket_counts[bisect.bisect_left(self._bucket_bounds, duration_s)] += 1
+        self.count += 1
+        self.total += duration_s
+        if duration_s > self.max:
+            self.max = duration_s
+
+    def merge(self, histogram):
+        """
+        Add the durations of a histogram with the same buckets.
+        """
+        for bucket_no, bucket_count in enumerate(histogram.bucket_counts):
+            self.bucket_counts[bucket_no] += bucket_count
+        self.count += histogram.count
+        self.total += histogram.total
+        self.max = max(self.max, histogram.max)
+
+    def get_percentile(self, percentile):
+        """
+        Get the estimated duration below which the given percentage of the recorded durations are.
+
+        Returns:
+            float: Duration in seconds, 0 if nothing was recorded.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = self.count * percentile / 100.0
+        cumulative_count = 0
+        for bucket_no, bucket_count in enumerate(self.bucket_counts):
+            cumulative_count += bucket_count
+            if cumulative_count >= rank and bucket_count:
+                if bucket_no < len(self._bucket_bounds):
+                    return min(self._bucket_bounds[bucket_no], self.max)
+                break
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_s": self.total / self.count if self.count else 0.0,
+            "max_s": self.max,
+            **{f"p{percentile}_s": self.get_percentile(percentile) for percentile in DURATION_PERCENTILES},
+        }
+
+
+class StageMetrics:
+    """
+    Thread safe counters and duration histogram of one pipeline stage.
+
+    A stage records one call per processed batch with its duration, the
+    number of lines and optionally bytes. Line and call rates are derived over
+    the last rate interval like RTTReadStatistics. Durations are kept in a
+    sliding window of histograms, one per window slice, so the percentiles
+    follow the current load instead of the complete run.
+    """
+
+    def __init__(self, name, rate_interval_s=METRICS_RATE_INTERVAL_s, window_s=DURATION_WINDOW_s,
+                 window_slice_s=DURATION_WINDOW_SLICE_s, clock=time.monotonic):
+        """
+        Args:
+            name (str): Name of the stage.
+            rate_interval_s (float): Interval the rates are derived over.
+            window_s (float): Time span of the reported durations.
+            window_slice_s (float): Time span of one histogram of the window.
+            clock: Function returning the current time in seconds.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._rate_interval_s = rate_interval_s
+        self._window_s = window_s
+        self._window_slice_s = window_slice_s
+        self._clock = clock
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (start time, DurationHistogram) of the window slices, oldest first
+            self._duration_slices = deque()
+            self._total_calls = 0
+            self._total_lines = 0
+            self._total_bytes = 0
+            self._interval_start_time = self._clock()
+            self._interval_calls = 0
+            self._interval_lines = 0
+            self._interval_bytes = 0
+            self._calls_per_s = 0.0
+            self._lines_per_s = 0.0
+            self._bytes_per_s = 0.0
+
+    def _update_rates(self, current_time):
+        elapsed_time = current_time - self._interval_start_time
+        if elapsed_time >= self._rate_interval_s:
+            self._calls_per_s = self._interval_calls / elapsed_time
+            self._lines_per_s = self._interval_lines / elapsed_time
+            self._bytes_per_s = self._interval_bytes / elapsed_time
+            self._interval_start_time = current_time
+            self._interval_calls = 0
+            self._interval_lines = 0
+            self._interval_bytes = 0
+
+    def _drop_old_duration_slices(self, current_time):
+        while self._duration_slices and self._duration_slices[0][0] <= current_time - self._window_s:
+            self._duration_slices.popleft()
+
+    def _get_window_durations(self, current_time):
+        self._drop_old_duration_slices(current_time)
+        durations = DurationHistogram()
+        for _, duration_slice in self._duration_slices:
+            durations.merge(duration_slice)
+        return durations
+
+    def record(self, duration_s, line_count=0, byte_count=0):
+        """
+        Record one processed batch.
+
+        Args:
+            duration_s (float): Processing time of the batch.
+            line_count (int): Number of lines of the batch.
+            byte_count (int): Number of bytes of the batch.
+        """
+        with self._lock:
+            current_time = self._clock()
+            if not self._duration_slices or current_time - self._duration_slices[-1][0] >= self._window_slice_s:
+                self._drop_old_duration_slices(current_time)
+                self._duration_slices.append((current_time, DurationHistogram()))
+            self._duration_slices[-1][1].record(duration_s)
+            self._total_calls += 1
+            self._total_lines += line_count
+            self._total_bytes += byte_count
+            self._interval_calls += 1
+            self._interval_lines += line_count
+            self._interval_bytes += byte_count
+            self._update_rates(current_time)
+
+    def snapshot(self):
+        with self._lock:
+            current_time = self._clock()
+            self._update_rates(current_time)
+            return {
+                "calls_per_s": self._calls_per_s,
+                "lines_per_s": self._lines_per_s,
+                "bytes_per_s": self._bytes_per_s,
+                "total_calls": self._total_calls,
+                "total_lines": self._total_lines,
+                "total_bytes": self._total_bytes,
+                # durations of the last window
+                "duration": self._get_window_durations(current_time).snapshot(),
+            }
+
+
+class PipelineMetrics:
+    """
+    Metrics of all stages of the log pipeline and gauges like queue depths.
+
+    Stages are created on first use, gauges are functions evaluated when a
+    snapshot is taken, e.g. queue.Queue.qsize. Latencies are recorded like
+    stages, with the latency as duration.
+    """
+
+    def __init__(self, stage_names=PIPELINE_STAGES, latency_names=PIPELINE_LATENCIES):
+        self._lock = threading.Lock()
+        self._stages = {name: StageMetrics(name) for name in stage_names}
+        self._latencies = {name: StageMetrics(name) for name in latency_names}
+        self._gauges = {}
+
+    def stage(self, name):
+        """
+        Get the metrics of a stage, created on first use.
+
+        Returns:
+            StageMetrics: Metrics of the stage.
+        """
+        stage_metrics = self._stages.get(name)
+        if stage_metrics is None:
+            with self._lock:
+                stage_metrics = self._stages.setdefault(name, StageMetrics(name))
+        return stage_metrics
+
+    def record(self, stage_name, duration_s, line_count=0, byte_count=0):
+        self.stage(stage_name).record(duration_s, line_count, byte_count)
+
+    def record_latency(self, latency_name, latency_s, line_count=0):
+        """
+        Record the latency of a batch of lines, e.g. from the read to the display of the oldest line.
+        """
+        latency_metrics = self._latencies.get(latency_name)
+        if latency_metrics is None:
+            with self._lock:
+                latency_metrics = self._latencies.setdefault(latency_name, StageMetrics(latency_name))
+        latency_metrics.record(latency_s, line_count)
+
+    def register_gauge(self, name, value_function):
+        """
+        Register a gauge, value_function is called for each snapshot.
+        """
+        with self._lock:
+            self._gauges[name] = value_function
+
+    def reset(self):
+        for stage_metrics in list(self._stages.values()) + list(self._latencies.values()):
+            stage_metrics.reset()
+
+    def snapshot(self):
+        """
+        Get the current values of all stages and gauges.
+
+        Returns:
+            dict: Wall clock time, gauge values, stage and latency metrics by name.
+        """
+        with self._lock:
+            gauges = dict(self._gauges)
+            stages = dict(self._stages)
+            latencies = dict(self._latencies)
+        return {
+            "time": time.time(),
+            "gauges": {name: value_function() for name, value_function in gauges.items()},
+            "stages": {name: stage_metrics.snapshot() for name, stage_metrics in stages.items()},
+            "latencies": {name: latency_metrics.snapshot() for name, latency_metrics in latencies.items()},
+        }
+
+
+def flatten_snapshot(snapshot, prefix=""):
+    """
+    Flatten a nested snapshot into a dict with dotted keys, e.g. "stages.read.lines_per_s".
+    """
+    flat_snapshot = {}
+    for key, value in snapshot.items():
+        if isinstance(value, dict):
+            flat_snapshot.update(flatten_snapshot(value, f"{prefix}{key}."))
+        else:
+            flat_snapshot[f"{prefix}{key}"] = value
+    return flat_snapshot
+
+
+def format_status_line(snapshot):
+    """
+    Format a snapshot as compact status line, e.g. for the GUI.
+    """
+    parts = [f"{name} {value}" for name, value in snapshot["gauges"].items()]
+    for name, stage_snapshot in snapshot["stages"].items():
+        if stage_snapshot["total_calls"] == 0:
+            continue
+        parts.append(f"{name} {stage_snapshot['lines_per_s'] / 1000:.1f}k l/s "
+                     f"p95 {stage_snapshot['duration']['p95_s'] * 1000:.1f} ms")
+    for name, latency_snapshot in snapshot.get("latencies", {}).items():
+        if latency_snapshot["total_calls"] == 0:
+            continue
+        latency = latency_snapshot["duration"]
+        parts.append(f"{name} p50 {latency['p50_s'] * 1000:.0f} / p99 {latency['p99_s'] * 1000:.0f} / "
+                     f"max {latency['max_s'] * 1000:.0f} ms")
+    return " | ".join(parts)
+
+
+class MetricsExporter:
+    """
+    Background writer of periodic metrics snapshots.
+
+    JSON snapshots are written as one JSON object per line, CSV snapshots as
+    one row per snapshot with the flattened keys of the first snapshot as
+    header.
+    """
+
+    def __init__(self, metrics, path, export_format=None, interval_s=METRICS_EXPORT_INTERVAL_s):
+        """
+        Args:
+            metrics (PipelineMetrics): Metrics to export.
+            path (str): Path of the export file.
+            export_format (str, optional): "json" or "csv", derived from the file extension by default.
+            interval_s (float): Time between two snapshots.
+        """
+        if export_format is None:
+            export_format = "csv" if os.path.splitext(path)[1].lower() == ".csv" else "json"
+        if export_format not in METRICS_EXPORT_FORMATS:
+            raise ValueError(f"unknown metrics export format {export_format!r}")
+        self._metrics = metrics
+        self._path = path
+        self._export_format = export_format
+        self._interval_s = interval_s
+        self._stop_event = threading.Event()
+        self._csv_writer = None
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write_snapshot(self):
+        snapshot = self._metrics.snapshot()
+        if self._export_format == "json":
+            self._file.write(json.dumps(snapshot) + "\n")
+        else:
+            flat_snapshot = flatten_snapshot(snapshot)
+            if self._csv_writer is None:
+                self._csv_writer = csv.DictWriter(self._file, fieldnames=list(flat_snapshot), extrasaction="ignore")
+                self._csv_writer.writeheader()
+            self._csv_writer.writerow(flat_snapshot)
+        self._file.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval_s):
+            self.write_snapshot()
+
+    def close(self):
+        """
+        Stop the exporter, a final snapshot is written.
+        """
+        if self._file is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self.write_snapshot()
+        self._file.close()
+        self._file = None
+
+
+# Metrics of the log pipeline of this process
+pipeline_metrics = PipelineMetrics()
@@ -0,0 +1,76 @@
+import time
+from libs.log.log_store import create_line_index_array
+
+# Constants
+PROGRESSIVE_FILTER_CHUNK_LINES = 8192
+
+
+class ProgressiveFilterPass:
+    """
+    Filter pass over the log history, evaluated in time-bounded slices.
+
+    The pass scans the raw log lines [0, end) backwards, so the most recent
+    lines are filtered first and can be displayed right away. Older history is
+    filtered in further slices between the processing of new lines. A pass is
+    cancelled by simply dropping it.
+    """
+
+    def __init__(self, filter_string, end, apply_filter, chunk_lines=PROGRESSIVE_FILTER_CHUNK_LINES):
+        """
+        Args:
+            filter_string (str): Filter to apply.
+            end (int): End of the raw log line range to filter.
+            apply_filter: Function (filter_string, start, stop) returning the matching line indices.
+            chunk_lines (int): Number of lines filtered between time budget checks.
+        """
+        self.filter_string = filter_string
+        self._position = end
+        self._apply_filter = apply_filter
+        self._chunk_lines = chunk_lines
+
+    @property
+    def done(self):
+        return self._position == 0
+
+    @property
+    def remaining_line_count(self):
+        """
+        Number of raw log lines not filtered yet.
+        """
+        return self._position
+
+    def run_slice(self, time_budget_s, max_match_count=None):
+        """
+        Filter the next older part of the history.
+
+        Args:
+            time_budget_s (float): Time after which the slice ends.
+            max_match_count (int, optional): End the slice once this many lines matched.
+
+        Returns:
+            array: Indices of the matching lines of the filtered part, in log order.
+        """
+        start_time = time.perf_counter()
+        chunks = []
+        match_count = 0
+        while self._position > 0:
+            start = max(0, self._position - self._chunk_lines)
+            chunk = self._apply_filter(self.filter_string, start, self._position)
+            chunks.append(chunk)
+            match_count += len(chunk)
+            self._position = start
+            if max_match_count is not None and match_count >= max_match_count:
+                break
+            if time.perf_counter() - start_time >= time_budget_s:
+                break
+
+        line_indices = create_line_index_array()
+        for chunk in reversed(chunks):
+            line_indices.extend(chunk)
+        return line_indices
+
+    def cancel(self):
+        """
+        Stop the pass, nothing is running in the background.
+        """
+        self._position = 0
@@ -0,0 +1,65 @@
+import os
+
+# Constants
+LINE_WRITER_BUFFER_BYTES = 256 * 1024
+
+
+class RotatingLineWriter:
+    """
+    Buffered writer of log lines to a file, rotated when it exceeds a maximum size.
+
+    Rotation works like logging.handlers.RotatingFileHandler: the full file is
+    renamed to <path>.1, older files to <path>.2 and so on, files beyond
+    backup_count are deleted.
+    """
+
+    def __init__(self, path, max_bytes=0, backup_count=0):
+        """
+        Args:
+            path (str): Path of the log file.
+            max_bytes (int): Size after which the file is rotated, 0 disables rotation.
+            backup_count (int): Number of rotated files kept.
+        """
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._file = None
+        self._size = 0
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, "a", encoding="utf-8", buffering=LINE_WRITER_BUFFER_BYTES)
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        if self._backup_count > 0:
+            for backup_no in range(self._backup_count - 1, 0, -1):
+                backup_path = f"{self.path}.{backup_no}"
+                if os.path.exists(backup_path):
+                    os.replace(backup_path, f"{self.path}.{backup_no + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write_lines(self, lines):
+        """
+        Append lines, the file is rotated before a batch that would exceed the maximum size.
+        """
+        if not lines:
+            return
+        text = '\n'.join(lines) + '\n'
+        size = len(text.encode("utf-8")) if not text.isascii() else len(text)
+        if self._max_bytes and self._size > 0 and self._size + size > self._max_bytes:
+            self._rotate()
+        self._file.write(text)
+        self._size += size
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,203 @@
+import argparse
+import queue
+import sys
+import time
+from libs.jlink.rtt_source_options import add_rtt_source_arguments, create_rtt_handler, get_rtt_source_settings
+from libs.log.filter_expression import FilterExpressionError, compile_filter
+from libs.log.highlighted_log_lines import format_channel
+from libs.log.rotating_line_writer import RotatingLineWriter
+
+# constants
+QUEUE_POLL_INTERVAL_s = 0.1
+MAX_QUEUE_ITEMS_PER_BATCH = 1000
+# exit codes
+EXIT_OK = 0
+EXIT_CONNECTION_FAILED = 1
+EXIT_TIMEOUT = 2
+EXIT_INVALID_ARGUMENTS = 3
+EXIT_INTERRUPTED = 130
+
+
+class _StdoutLineWriter:
+    """
+    Line writer for stdout, flushed per batch so pipes see the lines right away.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write_lines(self, lines):
+        if lines:
+            self._stream.write('\n'.join(lines) + '\n')
+
+    def flush(self):
+        self._stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class RTTStreamer:
+    """
+    Headless RTT capture streaming filtered lines to stdout or a file.
+
+    Uses the same RTT handlers and line framing as the GUI, but writes the
+    lines right away instead of keeping the log in memory, so long captures
+    run with constant memory.
+    """
+
+    def __init__(self, rtt_handler, log_queue, writer, filter_string="", exit_pattern=None, timeout_s=None,
+                 max_lines=None, status_stream=None, show_channels=False):
+        """
+        Args:
+            rtt_handler (RTTHandlerInterface): Source of the RTT lines.
+            log_queue (queue.Queue): Queue the handler puts the lines into.
+            writer: Writer of the matching lines (write_lines, flush, close).
+            filter_string (str): Filter expression selecting the written lines.
+            exit_pattern (str, optional): Filter expression, the capture ends with the first matching line.
+            timeout_s (float, optional): Capture duration after which the capture ends.
+            max_lines (int, optional): Number of written lines after which the capture ends.
+            status_stream: Stream for status messages of the handler, stderr by default.
+            show_channels (bool): Write the RTT channel of each line in front of the line.
+
+        Raises:
+            FilterExpressionError: If a filter expression is invalid.
+        """
+        self._rtt_handler = rtt_handler
+        self._log_queue = log_queue
+        self._writer = writer
+        self._line_matcher = compile_filter(filter_string)
+        self._exit_matcher = compile_filter(exit_pattern) if exit_pattern else None
+        self._timeout_s = timeout_s
+        self._max_lines = max_lines
+        self._status_stream = status_stream or sys.stderr
+        self._show_channels = show_channels
+        self.written_line_count = 0
+
+    def _get_queued_items(self, timeout):
+        items = [self._log_queue.get(timeout=timeout)]
+        while len(items) < MAX_QUEUE_ITEMS_PER_BATCH:
+            try:
+                items.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _process_lines(self, lines, channels=None):
+        """
+        Write the matching lines, up to and including the line matching the exit pattern.
+
+        The filters match the line text, the channel column is only added to the written lines.
+
+        Returns:
+            bool: True if the capture has to end.
+        """
+        lower_lines = [line.lower() for line in lines]
+        exit_line = None
+        if self._exit_matcher is not None:
+            for line_no, lower_line in enumerate(lower_lines):
+                if self._exit_matcher(lower_line):
+                    exit_line = lines[line_no]
+                    lines = lines[:line_no + 1]
+                    lower_lines = lower_lines[:line_no + 1]
+                    break
+        if channels is not None:
+            lines = [format_channel(channel) + line for line, channel in zip(lines, channels)]
+        matching_lines = [line for line, lower_line in zip(lines, lower_lines) if self._line_matcher(lower_line)]
+        if self._max_lines is not None:
+            matching_lines = matching_lines[:self._max_lines - self.written_line_count]
+        self._writer.write_lines(matching_lines)
+        self.written_line_count += len(matching_lines)
+        if self._max_lines is not None and self.written_line_count >= self._max_lines:
+            return True
+        if exit_line is not None:
+            self._status_stream.write(f"exit pattern matched: {exit_line}\n")
+            return True
+        return False
+
+    def run(self):
+        """
+        Stream lines until the exit pattern matched, the timeout expired or the source ended.
+
+        Returns:
+            int: Exit code.
+        """
+        end_time = time.monotonic() + self._timeout_s if self._timeout_s is not None else None
+        try:
+            while True:
+                timeout = QUEUE_POLL_INTERVAL_s
+                if end_time is not None:
+                    timeout = min(timeout, max(0.0, end_time - time.monotonic()))
+                try:
+                    items = self._get_queued_items(timeout)
+                except queue.Empty:
+                    items = []
+                lines = []
+                channels = [] if self._show_channels else None
+                for item in items:
+                    if "lines" in item:
+                        lines.extend(item["lines"])
+                        if channels is not None:
+                            channels.extend([item.get("channel")] * len(item["lines"]))
+                    elif "line" in item:
+                        # status messages of the handler
+                        self._status_stream.write(item["line"].rstrip('\n') + '\n')
+                if lines and self._process_lines(lines, channels):
+                    return EXIT_OK
+                self._writer.flush()
+                if not items and not self._rtt_handler.is_connected:
+                    # source ended, e.g. a replay finished
+                    return EXIT_TIMEOUT if self._exit_matcher is not None else EXIT_OK
+                if end_time is not None and time.monotonic() >= end_time:
+                    self._status_stream.write("timeout expired\n")
+                    return EXIT_TIMEOUT if self._exit_matcher is not None else EXIT_OK
+        finally:
+            self._writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless RTT capture, streams filtered RTT lines to stdout or a file')
+    parser.add_argument('--mcu', default='STM32F427II', help='MCU to connect to')
+    parser.add_argument('--interface', choices=['SWD', 'JTAG'], default='SWD', help='Debug interface')
+    parser.add_argument('--block-address', type=lambda value: int(value, 0), default=None, help='Address of the RTT control block')
+    parser.add_argument('--filter', default="", help='Filter expression selecting the written lines, see README')
+    parser.add_argument('--exit-on', default=None, metavar='PATTERN', help='Exit with code 0 on the first line matching this filter expression')
+    parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS', help='Exit after this time, with code 2 if --exit-on did not match')
+    parser.add_argument('--max-lines', type=int, default=None, help='Exit after writing this many lines')
+    parser.add_argument('--output', default=None, metavar='FILE', help='Write the lines to a file instead of stdout')
+    parser.add_argument('--max-file-mb', type=float, default=0, help='Rotate the output file at this size, 0 disables rotation')
+    parser.add_argument('--backup-count', type=int, default=5, help='Number of rotated output files kept')
+    parser.add_argument('--channel-column', action='store_true', help='Write the RTT channel of each line in front of the line')
+    add_rtt_source_arguments(parser)
+    args = parser.parse_args(argv)
+
+    log_queue = queue.Queue()
+    rtt_handler = create_rtt_handler(log_queue, **get_rtt_source_settings(args))
+    if args.output:
+        writer = RotatingLineWriter(args.output, int(args.max_file_mb * 1024 * 1024), args.backup_count)
+    else:
+        writer = _StdoutLineWriter(sys.stdout)
+    try:
+        streamer = RTTStreamer(rtt_handler, log_queue, writer, args.filter, args.exit_on, args.timeout, args.max_lines,
+                                show_channels=args.channel_column)
+    except FilterExpressionError as e:
+        writer.close()
+        sys.stderr.write(f"invalid filter expression: {e}\n")
+        return EXIT_INVALID_ARGUMENTS
+
+    try:
+        rtt_handler.connect(args.mcu, interface=args.interface, block_address=args.block_address)
+    except Exception as e:
+        writer.close()
+        sys.stderr.write(f"{e}\n")
+        return EXIT_CONNECTION_FAILED
+    try:
+        return streamer.run()
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        rtt_handler.disconnect()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
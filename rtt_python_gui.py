@@ -5,32 +5,47 @@ import threading
 import argparse
 import libs.log.log_controller as log_controller
 from datetime import datetime
-from libs.jlink.rtt_handler import RTTHandler
-from libs.jlink.demo_rtt_handler import DemoRTTHandler
-from libs.jlink.rtt_handler_interface import RTTHandlerInterface
-from libs.log.log_view import LogView
+from libs.jlink.mcu_search_index import MCUSearchIndex
+from libs.jlink.replay_rtt_handler import REPLAY_SPEED_REALTIME
+from libs.jlink.rtt_handler_interface import CONNECTION_STATE_DISCONNECTED, CONNECTION_STATE_RECONNECTING
+from libs.log.bounded_log_queue import (BoundedLogQueue, DISPLAY_QUEUE_MAX_UPDATES, DISPLAY_QUEUE_POLICY, INPUT_QUEUE_MAX_LINES,
+                                        INPUT_QUEUE_POLICY, QUEUE_POLICIES, get_log_input_line_count)
+from libs.jlink.rtt_source_options import add_rtt_source_arguments, create_rtt_handler, get_rtt_source_settings
+from libs.log.frame_scheduler import FrameScheduler
+from libs.log.log_view import LogView, MAX_DISPLAYED_LINES
+from libs.log.pipeline_metrics import MetricsExporter, METRICS_EXPORT_FORMATS, METRICS_EXPORT_INTERVAL_s, format_status_line, pipeline_metrics
 
 # constants
-LOG_UPDATE_TIME_INTERVAL_ms = 100
+# Maximum wait for GUI events while no log update is pending
+EVENT_POLL_INTERVAL_ms = 100
+MAX_LINES_PER_PROCESSING_BATCH = 50000
+RTT_STATISTICS_UPDATE_INTERVAL_s = 1.0
 
 
 class RTTViewer:
-    def __init__(self, demo=False):
+    def __init__(self, demo=False, rtt_handler_options=None, max_displayed_lines=MAX_DISPLAYED_LINES, virtual_log_view=False,
+                 replay_path=None, replay_speed=REPLAY_SPEED_REALTIME, demo_load_generator=None,
+                 input_queue_max_lines=INPUT_QUEUE_MAX_LINES, input_queue_policy=INPUT_QUEUE_POLICY,
+                 display_queue_max_updates=DISPLAY_QUEUE_MAX_UPDATES, display_queue_policy=DISPLAY_QUEUE_POLICY):
         self.filter_input_string = ""
         self.highlight_input_string = ""
-        self.last_processed_time = time.time()
-        self.log_update_time_interval_s = LOG_UPDATE_TIME_INTERVAL_ms / 1000.0
+        self.last_rtt_statistics_update_time = time.time()
 
-        # Create queues
-        self.log_processing_input_queue = queue.Queue()
-        self.display_output_queue = queue.Queue()
+        # Create bounded queues, the input queue is bounded by lines, the display queue by updates
+        self.log_processing_input_queue = BoundedLogQueue(input_queue_max_lines, input_queue_policy, get_log_input_line_count)
+        self.display_output_queue = BoundedLogQueue(display_queue_max_updates, display_queue_policy)
+        pipeline_metrics.register_gauge("input_q", lambda: self.log_processing_input_queue.size)
+        pipeline_metrics.register_gauge("input_dropped", lambda: self.log_processing_input_queue.dropped_line_count)
+        pipeline_metrics.register_gauge("display_q", self.display_output_queue.qsize)
+        pipeline_metrics.register_gauge("display_dropped", lambda: self.display_output_queue.dropped_item_count)
 
         # Initialize RTT Handler
-        if demo:
-            self._rtt_handler = DemoRTTHandler(self.log_processing_input_queue)
-        else:
-            self._rtt_handler = RTTHandler(self.log_processing_input_queue)
-        self.supported_mcu_list = self._rtt_handler.get_supported_mcus()
+        self._rtt_handler = create_rtt_handler(self.log_processing_input_queue, demo, rtt_handler_options, replay_path,
+                                               replay_speed, demo_load_generator)
+        # MCU list shown by the combo, filled once the handler loaded it in the background
+        default_mcu = 'DEMO_MCU' if demo else 'STM32F427II'
+        self._mcu_list = [default_mcu]
+        self._mcu_search_index = MCUSearchIndex(self._mcu_list)
         # GUI setup
         sg.theme('Dark Gray 13')
 
@@ -40,7 +55,7 @@ class RTTViewer:
             [sg.Frame('Configuration', [
                 [sg.Text('MCU Chip Name:', size=(14, 1)),
                 sg.Text("", size=(1, 1)),  # horizontal spacer
-                sg.Combo(self.supported_mcu_list, default_value='DEMO_MCU' if demo else 'STM32F427II',
+                sg.Combo(self._mcu_list, default_value=default_mcu,
                         key='-MCU-', size=(20, 1), enable_events=True, auto_size_text=False)],
                 [sg.Text('Interface:', size=(14, 1)),
                 sg.Text("", size=(1, 1)),  # horizontal spacer
@@ -50,7 +65,8 @@ class RTTViewer:
             sg.Frame('Connection', [
                 [sg.Button('Connect', key='-CONNECT-'),
                 sg.Button('Disconnect', key='-DISCONNECT-', disabled=True)],
-                [sg.Text('Status: Disconnected', key='-STATUS-', size=(20, 1))]
+                [sg.Text('Status: Disconnected', key='-STATUS-', size=(24, 1))],
+                [sg.Text('', key='-RTT-STATS-', size=(40, 1))]
                 ], pad=((20,10),(10,10)))
             ],
             [sg.Frame('Log', [
@@ -62,7 +78,8 @@ class RTTViewer:
                      sg.Input(key='-HIGHLIGHT-', size=(20, 1), enable_events=True),
                      sg.Button('Pause', key='-PAUSE-', disabled=False),
                      sg.Button('Clear', key='-CLEAR-')]
-                ])]
+                ])],
+                [sg.Text('', key='-METRICS-', size=(120, 1), font=('Consolas', 8))]
             ], expand_x=True, expand_y=True, pad=((10,10),(10,20)))]
         ]
 
@@ -72,14 +89,15 @@ class RTTViewer:
         self._window.set_min_size((800, 600))
 
         # Initialize GUI state
+        self._connection_state = CONNECTION_STATE_DISCONNECTED
         self._update_gui_status(False)
 
-        self.mcu_filter_string = ''
-        self.last_mcu_filter_string = ""
-        self.mcu_list_last_update_time = time.time()
+        # Bind the <KeyRelease> event to the Combo widget, the typed character is part of the combo value then
+        self._window['-MCU-'].Widget.bind("<KeyRelease>", lambda event: self._window.write_event_value('-MCU-KEYRELEASE-', event))
 
-        # Bind the <KeyRelease> event to the Combo widget
-        self._window['-MCU-'].Widget.bind("<KeyPress>", lambda event: self._window.write_event_value('-MCU-KEYRELEASE-', event))
+        # Load the MCU list and build its search index without blocking the window
+        self._rtt_handler.start_loading_supported_mcus(
+            lambda mcu_list: self._window.write_event_value('-MCU-LIST-LOADED-', MCUSearchIndex(mcu_list)))
 
         # Create LogView instance
         self.log_view = LogView(
@@ -87,72 +105,145 @@ class RTTViewer:
             filter_widget=self._window['-FILTER-'],
             highlight_widget=self._window['-HIGHLIGHT-'],
             pause_button=self._window['-PAUSE-'],
-            window=self._window
+            window=self._window,
+            max_displayed_lines=max_displayed_lines,
+            virtual=virtual_log_view
         )
 
         # Create log handler
         self.log_handler = log_controller.create_log_processor_and_displayer(self.log_view)
+        # Renders the processed updates in coalesced frames
+        self.frame_scheduler = FrameScheduler(self.log_view)
 
         self.demo = demo
 
-    def _update_gui_status(self, connected):
-        self._window['-STATUS-'].update(
-            'Status: Connected' if connected else 'Status: Disconnected'
-        )
+    def _update_gui_status(self, connected, reconnecting=False):
+        if reconnecting:
+            self._window['-STATUS-'].update('Status: Reconnecting...')
+        else:
+            self._window['-STATUS-'].update(
+                'Status: Connected' if connected else 'Status: Disconnected'
+            )
         self._window['-CONNECT-'].update(disabled=connected)
         self._window['-DISCONNECT-'].update(disabled=not connected)
         #self._window['-PAUSE-'].update(disabled=not connected)
 
-    def _log_processing_thread(self):
-        while True:
+    def _get_queued_log_processing_items(self, timeout):
+        """
+        Wait for the next log processing item and drain all items queued behind it.
+        """
+        items = [self.log_processing_input_queue.get(timeout=timeout)]
+        line_count = 0
+        while line_count < MAX_LINES_PER_PROCESSING_BATCH:
             try:
-                # Get element from input queue
-                log_input = self.log_processing_input_queue.get(timeout=0.1)
+                item = self.log_processing_input_queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            line_count += len(item.get("lines", ()))
+        return items
 
-                # Parse log processing item
-                line = log_input["line"] if "line" in log_input else ""
-                filter_string = log_input["filter_string"] if "filter_string" in log_input else None
-                highlight_string = log_input["highlight_string"] if "highlight_string" in log_input else None
-                pause_string = log_input["pause_string"] if "pause_string" in log_input else None
+    def _process_line_batch(self, lines, read_times=None, channels=None):
+        if lines:
+            start_time = time.perf_counter()
+            update_info = self.log_handler["process"](new_lines=lines, read_times=read_times, channels=channels)
+            pipeline_metrics.record("processing", time.perf_counter() - start_time, len(lines))
+            self.display_output_queue.put(update_info)
 
-                # Invoke processing
-                update_info = self.log_handler["process"](line, filter_string, highlight_string, pause_string)
+    def _process_control_item(self, log_input):
+        if log_input.get("clear", False):
+            self.display_output_queue.put(self.log_handler["clear"]())
+            return
 
-                # Add processing result to output queue
-                self.display_output_queue.put(update_info)
-            except queue.Empty:
-                pass
-            time.sleep(0.01)
-
-    def _process_display_output_queue(self):
-        count = 0
-        max_per_call = 20  # Limit to 100 lines per GUI update to prevent overload
-        highlighted_log_lines = []
-        update_info = []
-        while not self.display_output_queue.empty() and count < max_per_call:
+        # Parse log processing item
+        filter_string = log_input["filter_string"] if "filter_string" in log_input else None
+        highlight_string = log_input["highlight_string"] if "highlight_string" in log_input else None
+        pause_string = log_input["pause_string"] if "pause_string" in log_input else None
+
+        # Invoke processing
+        start_time = time.perf_counter()
+        update_info = self.log_handler["process"]("", filter_string, highlight_string, pause_string)
+        pipeline_metrics.record("processing", time.perf_counter() - start_time)
+
+        # Add processing result to output queue
+        self.display_output_queue.put(update_info)
+
+    def _log_processing_thread(self):
+        while True:
+            # Don't wait for new items while a progressive filter pass is pending
+            timeout = 0 if self.log_handler["has_pending_work"]() else 0.1
             try:
-                update_info = self.display_output_queue.get_nowait()
-                highlighted_log_lines += update_info['highlighted_text_list']
-                count += 1
-                if update_info["append"] == False:
-                    break
+                # Get all elements from input queue
+                log_inputs = self._get_queued_log_processing_items(timeout)
             except queue.Empty:
-                break
-        if update_info != []:
-            # print processed lines
-            #highlighted_log_lines.append((f"count on print: {count}", False))
-            update_info['highlighted_text_list'] = highlighted_log_lines
-            self.log_view.display_log_update(update_info)
-        #else:
-        #    # call log gui update at least once per second
-        #    if (datetime.now() - log_controller.get_last_log_gui_filter_update_date()).total_seconds() > log_controller.GUI_MINIMUM_REFRESH_INTERVAL_s:
-        #        update_info = self.log_handler["process"]("")
-        #        self.log_view.display_log_update(update_info)
+                log_inputs = []
+
+            # Merge consecutive line items into one batch, keep order relative to control items
+            # and the read time and RTT channel of each merged item as (offset in batch, read time/channel)
+            batch_lines = []
+            batch_read_times = []
+            batch_channels = []
+            for log_input in log_inputs:
+                if "lines" in log_input:
+                    batch_read_times.append((len(batch_lines), log_input.get("read_time")))
+                    batch_channels.append((len(batch_lines), log_input.get("channel")))
+                    batch_lines.extend(log_input["lines"])
+                elif "line" in log_input:
+                    batch_read_times.append((len(batch_lines), None))
+                    batch_channels.append((len(batch_lines), None))
+                    batch_lines.extend(line for line in log_input["line"].split('\n') if line)
+                else:
+                    self._process_line_batch(batch_lines, batch_read_times, batch_channels)
+                    batch_lines = []
+                    batch_read_times = []
+                    batch_channels = []
+                    self._process_control_item(log_input)
+            self._process_line_batch(batch_lines, batch_read_times, batch_channels)
+
+            # Continue in-flight filtering of older history
+            update_info = self.log_handler["process_pending_work"]()
+            if update_info is not None:
+                self.display_output_queue.put(update_info)
+
+    def _update_connection_state(self):
+        """
+        Show connection changes of the RTT handler, e.g. a reconnect after a target reset.
+        """
+        connection_state = self._rtt_handler.connection_state
+        if connection_state != self._connection_state:
+            self._connection_state = connection_state
+            self._update_gui_status(connection_state != CONNECTION_STATE_DISCONNECTED,
+                                    connection_state == CONNECTION_STATE_RECONNECTING)
+
+    def _update_rtt_statistics(self):
+        """
+        Show RTT read rates and suspected overflows in the connection frame.
+        """
+        self._window['-METRICS-'].update(format_status_line(pipeline_metrics.snapshot()))
+        statistics = self._rtt_handler.get_read_statistics()
+        if not statistics or not self._rtt_handler.is_connected:
+            self._window['-RTT-STATS-'].update('')
+            return
+        self._window['-RTT-STATS-'].update(
+            f"{statistics['bytes_per_s'] / 1024:.1f} KB/s, "
+            f"{statistics['reads_per_s']:.0f} reads/s, "
+            f"{statistics['overflow_events']} overflows"
+            + (f", {statistics['reconnects']} reconnects" if statistics.get('reconnects') else '')
+        )
+
+    @property
+    def supported_mcu_list(self):
+        """
+        Get the MCUs supported by the RTT handler, waits until the list is loaded.
+        """
+        return self._rtt_handler.get_supported_mcus()
 
     def _filter_mcu_list(self, filter_string):
-            input_text = filter_string.upper()
-            filtered = [mcu for mcu in self.supported_mcu_list if input_text in mcu]
-            self._window['-MCU-'].update(values=filtered)
+        """
+        Show the MCUs matching the typed text in the combo, prefix matches first, the typed text is kept.
+        """
+        filtered = self._mcu_search_index.search(filter_string)
+        self._window['-MCU-'].update(value=filter_string, values=filtered)
 
     def handle_events(self, event, values):
         retVal = True
@@ -160,10 +251,15 @@ class RTTViewer:
             retVal = False
         if event == '-MCU-':
             self.current_mcu = values['-MCU-']
-            self.mcu_filter_string = ""
+        if event == '-MCU-LIST-LOADED-':
+            if len(values[event]):
+                self._mcu_search_index = values[event]
+                self._mcu_list = self._mcu_search_index.names
+                # keep the typed or selected MCU
+                self._window['-MCU-'].update(value=self._window['-MCU-'].get(), values=self._mcu_list)
         if event == '-MCU-KEYRELEASE-':
-            self.mcu_filter_string = values['-MCU-']
-            self.mcu_list_last_update_time = time.time()
+            # the search index is fast enough to filter on every key
+            self._filter_mcu_list(values['-MCU-'])
         if event == '-CONNECT-':
             try:
                 selected_mcu = self._window['-MCU-'].get()
@@ -176,8 +272,8 @@ class RTTViewer:
             self._rtt_handler.disconnect()
             self._update_gui_status(False)
         if event == '-CLEAR-':
-            self.log_handler['clear']()
-            log_controller.clear_log_data()
+            # the log is cleared by the processing thread, in order with the queued lines
+            self.log_processing_input_queue.put({"clear": True})
         if event == '-FILTER-':
             self.filter_input_string = values['-FILTER-']
         if event == '-HIGHLIGHT-':
@@ -203,27 +299,29 @@ class RTTViewer:
                 #time.sleep(0.1)
 
                 # Check events
-                event, values = self._window.read(timeout=100)
+                # wake up for the next frame if log updates are pending
+                time_until_next_frame = self.frame_scheduler.get_time_until_next_frame()
+                event_timeout_ms = EVENT_POLL_INTERVAL_ms if time_until_next_frame is None else min(EVENT_POLL_INTERVAL_ms, int(time_until_next_frame * 1000))
+                event, values = self._window.read(timeout=event_timeout_ms)
                 if self.handle_events(event, values) == False:
                     break
+                self._update_connection_state()
 
                 # Handle widget highlighting
-                input_update = self.log_view.handle_widget_highlighting(self.filter_input_string, self.highlight_input_string, self.mcu_filter_string)
-                if "mcu_string" in input_update:
-                    # Check MCU filter
-                    applied_mcu_filter_string = input_update["mcu_string"]
-                    if applied_mcu_filter_string:
-                        self._filter_mcu_list(applied_mcu_filter_string)
+                input_update = self.log_view.handle_widget_highlighting(self.filter_input_string, self.highlight_input_string)
 
                 # Handle log processing on input changes
                 if input_update != {}:
                     self.log_processing_input_queue.put(input_update)
 
-                # Update log
+                # Update log, queued updates are coalesced until the next frame is due
+                self.frame_scheduler.collect(self.display_output_queue)
+                if self.frame_scheduler.is_frame_due():
+                    self.frame_scheduler.render_frame()
                 current_time = time.time()
-                if current_time - self.last_processed_time >= self.log_update_time_interval_s:
-                    self._process_display_output_queue()
-                    self.last_processed_time = current_time
+                if current_time - self.last_rtt_statistics_update_time >= RTT_STATISTICS_UPDATE_INTERVAL_s:
+                    self._update_rtt_statistics()
+                    self.last_rtt_statistics_update_time = current_time
 
         finally:
             self._rtt_handler.disconnect()
@@ -231,8 +329,39 @@ class RTTViewer:
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='RTT GUI')
-    parser.add_argument('--demo-messages', action='store_true', help='Enable demo mode with sample log messages')
+    add_rtt_source_arguments(parser)
+    parser.add_argument('--scrollback-lines', type=int, default=log_controller.MAX_SCROLLBACK_MEMORY_LINES, help='Maximum number of log lines kept in memory, older lines are spilled to disk')
+    parser.add_argument('--scrollback-mb', type=float, default=log_controller.MAX_SCROLLBACK_MEMORY_MB, help='Maximum memory of log lines kept in memory in MB')
+    parser.add_argument('--spill-dir', default=None, help='Directory for the scrollback spill file (default: system temp directory)')
+    parser.add_argument('--display-lines', type=int, default=MAX_DISPLAYED_LINES, help='Maximum number of lines held by the log widget')
+    parser.add_argument('--virtual-log-view', action='store_true', help='Only render the visible part of the log, for very long logs')
+    parser.add_argument('--input-queue-lines', type=int, default=INPUT_QUEUE_MAX_LINES, help='Maximum number of received lines waiting for processing')
+    parser.add_argument('--input-queue-policy', choices=QUEUE_POLICIES, default=INPUT_QUEUE_POLICY, help='Behaviour when the processing falls behind: block the RTT reader, drop the oldest lines or replace new lines by a "N lines skipped" marker')
+    parser.add_argument('--display-queue-updates', type=int, default=DISPLAY_QUEUE_MAX_UPDATES, help='Maximum number of processed updates waiting for display')
+    parser.add_argument('--display-queue-policy', choices=("block", "drop_oldest"), default=DISPLAY_QUEUE_POLICY, help='Behaviour when the display falls behind: block the processing or drop the oldest updates (the view is reprinted)')
+    parser.add_argument('--read-time-column', action='store_true', help='Show the host time each line was read from the probe in front of the line')
+    parser.add_argument('--channel-column', choices=log_controller.CHANNEL_COLUMN_MODES, default=log_controller.channel_column_mode, help='Show the RTT channel of each line in front of the line: once lines of more than one channel were received (auto), always or never')
+    parser.add_argument('--metrics-file', default=None, metavar='FILE', help='Write periodic pipeline metrics snapshots to a file')
+    parser.add_argument('--metrics-format', choices=METRICS_EXPORT_FORMATS, default=None, help='Format of the metrics file, derived from the file extension by default')
+    parser.add_argument('--metrics-interval-s', type=float, default=METRICS_EXPORT_INTERVAL_s, help='Time between two metrics snapshots')
+    parser.add_argument('--filter-workers', type=int, default=log_controller.parallel_filter_engine.max_workers, help='Number of processes filtering large log histories, 1 disables parallel filtering')
     args = parser.parse_args()
 
-    viewer = RTTViewer(demo=args.demo_messages)
-    viewer.run()
+    log_controller.configure_scrollback(args.scrollback_lines, args.scrollback_mb, args.spill_dir)
+    log_controller.configure_parallel_filtering(args.filter_workers)
+    log_controller.configure_read_time_column(args.read_time_column)
+    log_controller.configure_channel_column(args.channel_column)
+
+    metrics_exporter = None
+    if args.metrics_file:
+        metrics_exporter = MetricsExporter(pipeline_metrics, args.metrics_file, args.metrics_format, args.metrics_interval_s)
+
+    viewer = RTTViewer(max_displayed_lines=args.display_lines, virtual_log_view=args.virtual_log_view,
+                       input_queue_max_lines=args.input_queue_lines, input_queue_policy=args.input_queue_policy,
+                       display_queue_max_updates=args.display_queue_updates, display_queue_policy=args.display_queue_policy,
+                       **get_rtt_source_settings(args))
+    try:
+        viewer.run()
+    finally:
+        if metrics_exporter is not None:
+            metrics_exporter.close()
@@ -0,0 +1,86 @@
+"""
+Tests for the bounded queues between the log pipeline stages
+"""
+
+import sys
+import os
+import queue
+import threading
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.log.bounded_log_queue import BoundedLogQueue, get_log_input_line_count
+
+
+def create_input_queue(max_lines, policy):
+    return BoundedLogQueue(max_lines, policy, get_log_input_line_count)
+
+
+def drain(log_queue):
+    items = []
+    while not log_queue.empty():
+        items.append(log_queue.get_nowait())
+    return items
+
+
+class TestBoundedLogQueue:
+    """Test BoundedLogQueue class functionality"""
+
+    def test_block_policy(self):
+        log_queue = create_input_queue(4, "block")
+        log_queue.put({"lines": ["a", "b", "c"]})
+        with pytest.raises(queue.Full):
+            log_queue.put({"lines": ["d", "e"]}, timeout=0.01)
+        producer = threading.Thread(target=log_queue.put, args=({"lines": ["d", "e"]},))
+        producer.start()
+        assert log_queue.get(timeout=1) == {"lines": ["a", "b", "c"]}
+        producer.join(timeout=1)
+        assert not producer.is_alive()
+        assert log_queue.get(timeout=1) == {"lines": ["d", "e"]}
+        assert log_queue.dropped_line_count == 0
+
+    def test_control_items_never_block_or_drop(self):
+        log_queue = create_input_queue(2, "drop_oldest")
+        log_queue.put({"lines": ["a", "b"]})
+        log_queue.put({"filter_string": "x"})
+        log_queue.put({"lines": ["c"]})
+        assert drain(log_queue) == [{"filter_string": "x"}, {"lines": ["c"]}]
+        assert log_queue.dropped_item_count == 1
+        assert log_queue.dropped_line_count == 2
+        blocking_queue = create_input_queue(1, "block")
+        blocking_queue.put({"lines": ["a"]})
+        blocking_queue.put({"pause_string": "Pause"}, timeout=0)
+        assert blocking_queue.qsize() == 2
+
+    def test_drop_oldest_policy(self):
+        log_queue = create_input_queue(5, "drop_oldest")
+        for batch_no in range(4):
+            log_queue.put({"lines": [f"{batch_no}.{i}" for i in range(2)]})
+        assert log_queue.size == 4
+        assert [item["lines"][0] for item in drain(log_queue)] == ["2.0", "3.0"]
+        assert log_queue.get_statistics()["dropped_lines"] == 4
+
+    def test_collapse_policy(self):
+        log_queue = create_input_queue(3, "collapse")
+        log_queue.put({"lines": ["a", "b"]})
+        assert log_queue.put({"lines": ["c", "d"]}) is False
+        assert log_queue.put({"line": "status\n"}) is True
+        assert log_queue.put({"lines": ["e"]}) is False
+        assert drain(log_queue) == [{"lines": ["a", "b"]}, {"line": "[RTT GUI] 2 lines skipped\n"}, {"line": "status\n"}]
+        log_queue.put({"lines": ["f"]})
+        assert drain(log_queue) == [{"line": "[RTT GUI] 1 lines skipped\n"}, {"lines": ["f"]}]
+        assert log_queue.dropped_line_count == 3
+
+    def test_oversized_item_fits_empty_queue(self):
+        log_queue = create_input_queue(2, "collapse")
+        assert log_queue.put({"lines": ["a", "b", "c"]}) is True
+        assert log_queue.put({"lines": ["d"]}) is False
+        assert log_queue.get(timeout=0.01) == {"lines": ["a", "b", "c"]}
+        with pytest.raises(queue.Empty):
+            log_queue.get(timeout=0.01)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
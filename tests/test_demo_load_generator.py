@@ -0,0 +1,80 @@
+"""
+Tests for the synthetic load generator of the demo mode
+"""
+
+import sys
+import os
+import queue
+import threading
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.demo_load_generator import DemoLoadGenerator, parse_level_weights
+from libs.jlink.demo_rtt_handler import DemoRTTHandler
+
+
+class TestDemoLoadGenerator:
+    """Test DemoLoadGenerator class functionality"""
+
+    def test_sequence_numbers_and_total_lines(self):
+        generator = DemoLoadGenerator(lines_per_s=1000, total_lines=5, seed=1)
+        lines = generator.generate_lines(3) + generator.generate_lines(3)
+        assert [line.split(' ')[0] for line in lines] == ["0", "1", "2", "3", "4"]
+        assert generator.done
+
+    def test_line_lengths_and_levels(self):
+        generator = DemoLoadGenerator(lines_per_s=1000, mean_line_length=40, line_length_distribution="fixed",
+                                      level_weights={"ERROR": 1}, seed=1)
+        lines = generator.generate_lines(100)
+        assert all(" [ERROR] " in line for line in lines)
+        assert all(len(line.split(' ', 1)[1]) <= 40 for line in lines)
+
+    def test_bytes_per_s_and_bursts(self):
+        generator = DemoLoadGenerator(bytes_per_s=81000, mean_line_length=80, line_length_distribution="fixed",
+                                      burst_factor=10, burst_period_s=1.0, burst_duty=0.2, seed=1)
+        assert generator.lines_per_s == pytest.approx(1000, rel=0.05)
+        assert generator.get_rate(0.1) == pytest.approx(generator.lines_per_s * 10)
+        assert generator.get_rate(0.5) == generator.lines_per_s
+        assert generator.get_rate(1.1) == pytest.approx(generator.lines_per_s * 10)
+
+    def test_run_emits_batches_up_to_total_lines(self):
+        generator = DemoLoadGenerator(lines_per_s=100000, total_lines=2000, seed=1)
+        batches = []
+        generator.run(batches.append, threading.Event(), batch_interval_s=0.005)
+        assert sum(len(batch) for batch in batches) == 2000
+        assert len(batches) > 1
+
+    def test_parse_level_weights(self):
+        assert parse_level_weights("info=70, WARN=20,ERROR=10") == {"INFO": 70, "WARN": 20, "ERROR": 10}
+        for text in ["INFO", "INFO=0", "=5"]:
+            with pytest.raises(ValueError):
+                parse_level_weights(text)
+
+    def test_invalid_distribution(self):
+        with pytest.raises(ValueError):
+            DemoLoadGenerator(lines_per_s=1, line_length_distribution="gaussian")
+
+
+class TestDemoRTTHandlerLoad:
+    """Test the demo handler with a load generator"""
+
+    def test_generated_lines_are_queued_in_batches(self):
+        log_queue = queue.Queue()
+        handler = DemoRTTHandler(log_queue, DemoLoadGenerator(lines_per_s=100000, total_lines=1000, seed=1))
+        handler.connect("DEMO_MCU")
+        lines = []
+        while True:
+            item = log_queue.get(timeout=2)
+            if "line" in item:
+                assert "finished after 1000 lines" in item["line"]
+                break
+            lines.extend(item["lines"])
+        handler.disconnect()
+        assert len(lines) == 1000
+        assert handler.get_read_statistics()["total_bytes"] == sum(len(line) + 1 for line in lines)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,153 @@
+"""
+Tests for the RTT control block address resolution from firmware ELF files
+"""
+
+import sys
+import os
+import queue
+import struct
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.elf_symbols import ELFFormatError, ELFSymbolReader, find_rtt_control_block_address
+from libs.jlink.rtt_block_address_cache import get_firmware_hash, load_cached_block_address, save_block_address
+from libs.jlink.rtt_handler import RTTHandler
+from libs.jlink.simulated_jlink import SimulatedJLink
+
+
+def build_elf(symbols, elf_class=1, byte_order="<", undefined_symbols=()):
+    """
+    Build an ELF file with a null section, a symbol table and its string table.
+
+    Args:
+        symbols (dict): Defined symbols, name to value.
+        elf_class (int): 1 for 32 bit, 2 for 64 bit.
+        byte_order (str): "<" or ">".
+        undefined_symbols: Names of undefined symbols.
+    """
+    is_64_bit = elf_class == 2
+    header_size = 0x40 if is_64_bit else 0x34
+    section_header_format = byte_order + ("IIQQQQIIQQ" if is_64_bit else "IIIIIIIIII")
+    symbol_format = byte_order + ("IBBHQQ" if is_64_bit else "IIIBBH")
+
+    strings = b"\0"
+    symbol_entries = [b"\0" * struct.calcsize(symbol_format)]
+    all_symbols = [(name, value, 1) for name, value in symbols.items()] + [(name, 0, 0) for name in undefined_symbols]
+    for name, value, section_index in all_symbols:
+        name_offset = len(strings)
+        strings += name.encode() + b"\0"
+        if is_64_bit:
+            symbol_entries.append(struct.pack(symbol_format, name_offset, 0x11, 0, section_index, value, 4))
+        else:
+            symbol_entries.append(struct.pack(symbol_format, name_offset, value, 4, 0x11, 0, section_index))
+    symbol_table = b"".join(symbol_entries)
+
+    symbol_table_offset = header_size
+    string_table_offset = symbol_table_offset + len(symbol_table)
+    section_header_offset = string_table_offset + len(strings)
+    section_headers = [
+        struct.pack(section_header_format, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        struct.pack(section_header_format, 0, 2, 0, 0, symbol_table_offset, len(symbol_table), 2, 1, 4,
+                    struct.calcsize(symbol_format)),
+        struct.pack(section_header_format, 0, 3, 0, 0, string_table_offset, len(strings), 0, 0, 1, 0),
+    ]
+    ident = b"\x7fELF" + bytes([elf_class, 1 if byte_order == "<" else 2, 1]) + b"\0" * 9
+    header_format = byte_order + ("16sHHIQQQIHHHHHH" if is_64_bit else "16sHHIIIIIHHHHHH")
+    header = struct.pack(header_format, ident, 2, 40, 1, 0, 0, section_header_offset, 0, header_size, 0, 0,
+                         struct.calcsize(section_header_format), len(section_headers), 0)
+    return header + symbol_table + strings + b"".join(section_headers)
+
+
+def write_elf(path, symbols, **kwargs):
+    with open(path, "wb") as f:
+        f.write(build_elf(symbols, **kwargs))
+    return str(path)
+
+
+class TestELFSymbolReader:
+    @pytest.mark.parametrize("elf_class, byte_order", [(1, "<"), (1, ">"), (2, "<"), (2, ">")])
+    def test_find_symbol(self, tmp_path, elf_class, byte_order):
+        elf_path = write_elf(tmp_path / "firmware.elf", {"main": 0x08000101, "_SEGGER_RTT": 0x20000400},
+                             elf_class=elf_class, byte_order=byte_order)
+        reader = ELFSymbolReader(elf_path)
+        assert reader.find_symbol("main") == 0x08000101
+        assert reader.find_symbol("_SEGGER_RTT") == 0x20000400
+        assert reader.find_symbol("missing") is None
+        assert find_rtt_control_block_address(elf_path) == 0x20000400
+
+    def test_undefined_symbol_ignored(self, tmp_path):
+        elf_path = write_elf(tmp_path / "firmware.elf", {"main": 0x08000101}, undefined_symbols=("_SEGGER_RTT",))
+        assert find_rtt_control_block_address(elf_path) is None
+
+    def test_invalid_files(self, tmp_path):
+        not_elf_path = tmp_path / "firmware.hex"
+        not_elf_path.write_bytes(b":020000040800F2\n")
+        with pytest.raises(ELFFormatError):
+            ELFSymbolReader(str(not_elf_path))
+        truncated_path = tmp_path / "truncated.elf"
+        truncated_path.write_bytes(build_elf({"_SEGGER_RTT": 0x20000000})[:0x40])
+        with pytest.raises(ELFFormatError):
+            ELFSymbolReader(str(truncated_path))
+        with pytest.raises(OSError):
+            ELFSymbolReader(str(tmp_path / "missing.elf"))
+
+
+class TestBlockAddressCache:
+    def test_cached_per_mcu_and_firmware(self, tmp_path):
+        cache_path = str(tmp_path / "rtt_block_addresses.json")
+        assert load_cached_block_address("STM32F427II", "hash1", cache_path) is None
+        save_block_address("STM32F427II", "hash1", 0x20000400, cache_path)
+        save_block_address("nrf52840", "hash1", 0x20001000, cache_path)
+        assert load_cached_block_address("stm32f427ii", "hash1", cache_path) == 0x20000400
+        assert load_cached_block_address("NRF52840", "hash1", cache_path) == 0x20001000
+        assert load_cached_block_address("STM32F427II", "hash2", cache_path) is None
+
+    def test_firmware_hash_changes_with_content(self, tmp_path):
+        first_path = write_elf(tmp_path / "first.elf", {"_SEGGER_RTT": 0x20000400})
+        second_path = write_elf(tmp_path / "second.elf", {"_SEGGER_RTT": 0x20000800})
+        assert get_firmware_hash(first_path) != get_firmware_hash(second_path)
+
+
+class TestRTTHandlerBlockAddress:
+    def _connect(self, elf_path, cache_path, block_address=None):
+        jlink = SimulatedJLink()
+        handler = RTTHandler(queue.Queue(), jlink=jlink, mcu_list_cache_path=None, elf_path=elf_path,
+                             block_address_cache_path=cache_path)
+        handler.connect("SIMULATED_MCU", block_address=block_address)
+        handler.disconnect()
+        return jlink, handler
+
+    def test_block_address_from_elf_and_cache(self, tmp_path):
+        cache_path = str(tmp_path / "rtt_block_addresses.json")
+        elf_path = write_elf(tmp_path / "firmware.elf", {"_SEGGER_RTT": 0x20000400})
+        jlink, _ = self._connect(elf_path, cache_path)
+        assert jlink.rtt_block_address == 0x20000400
+        assert load_cached_block_address("SIMULATED_MCU", get_firmware_hash(elf_path), cache_path) == 0x20000400
+
+        # a cached address is used without reading the symbol table
+        save_block_address("SIMULATED_MCU", get_firmware_hash(elf_path), 0x20000800, cache_path)
+        jlink, _ = self._connect(elf_path, cache_path)
+        assert jlink.rtt_block_address == 0x20000800
+
+    def test_explicit_block_address_takes_precedence(self, tmp_path):
+        elf_path = write_elf(tmp_path / "firmware.elf", {"_SEGGER_RTT": 0x20000400})
+        jlink, _ = self._connect(elf_path, None, block_address=0x20002000)
+        assert jlink.rtt_block_address == 0x20002000
+
+    def test_falls_back_to_ram_search(self, tmp_path):
+        elf_path = write_elf(tmp_path / "firmware.elf", {"main": 0x08000101})
+        jlink, handler = self._connect(elf_path, None)
+        assert jlink.rtt_block_address is None
+        lines = []
+        while not handler.log_queue.empty():
+            lines.append(handler.log_queue.get().get("line", ""))
+        assert any("no _SEGGER_RTT symbol" in line for line in lines)
+
+        jlink, _ = self._connect(str(tmp_path / "missing.elf"), None)
+        assert jlink.rtt_block_address is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""
+Tests for the filter expression language
+"""
+
+import sys
+import os
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.log.filter_cache import FilterResultCache
+from libs.log.filter_expression import (FilterExpressionError, compile_filter, compile_filter_or_substring,
+                                        filter_refines, get_filter_error, is_plain_filter, parse_filter)
+
+LINES = [
+    "ADC channel: 14, raw value: 2514, converted value: 5004",
+    "ADC channel: 9, raw value: 1236, converted value: 11953",
+    "ERROR: ADC channel: 9 timeout",
+    "WARN: voltage low, channel: 14",
+    "connected, starting RTT...",
+]
+
+
+def matching_lines(filter_string):
+    line_matcher = compile_filter(filter_string)
+    return [line for line in LINES if line_matcher(line.lower())]
+
+
+class TestFilterExpression:
+    """Test parsing and matching of filter expressions"""
+
+    def test_plain_filter_is_case_insensitive_substring(self):
+        assert is_plain_filter("ADC channel: 9")
+        assert is_plain_filter("error and warning")
+        assert matching_lines("adc CHANNEL: 9") == LINES[1:3]
+
+    def test_uppercase_phrase_is_substring(self):
+        # keywords without operator characters are log text, not operators
+        lines = ["state: NOT READY", "state: ready", "CONNECTION OR TIMEOUT error"]
+        for filter_string, expected_lines in [("NOT READY", lines[0:1]), ("CONNECTION OR TIMEOUT", lines[2:3])]:
+            assert is_plain_filter(filter_string)
+            line_matcher = compile_filter(filter_string)
+            assert [line for line in lines if line_matcher(line.lower())] == expected_lines
+
+    def test_empty_filter_matches_all_lines(self):
+        assert matching_lines("") == LINES
+
+    def test_boolean_operators(self):
+        assert matching_lines("ERROR | WARN") == LINES[2:4]
+        assert matching_lines("(ERROR OR WARN)") == LINES[2:4]
+        assert matching_lines('ERROR|WARN and not "channel: 14"') == [LINES[2]]
+        assert matching_lines('!"channel: 14" && ADC') == LINES[1:3]
+
+    def test_implicit_and_and_parentheses(self):
+        assert matching_lines('(ERROR | WARN) "channel: 9"') == [LINES[2]]
+        assert matching_lines('ADC (NOT ERROR)') == LINES[0:2]
+
+    def test_regex_term(self):
+        assert matching_lines(r"/raw value: 25\d\d/") == [LINES[0]]
+        assert matching_lines(r"/^error/ | /rtt\.+$/") == [LINES[2], LINES[4]]
+
+    def test_field_term(self):
+        # a lone field term is a plain substring
+        assert matching_lines("channel:9") == []
+        assert matching_lines("channel:9 | channel:1") == LINES[1:3]
+        assert matching_lines('"raw value":1236') == []
+        assert matching_lines('channel:"14" and not WARN') == [LINES[0]]
+
+    def test_invalid_expressions(self):
+        for filter_string in ['(ERROR | WARN', 'ERROR |', 'ERROR)', '/[a-/ | x', '!']:
+            with pytest.raises(FilterExpressionError):
+                parse_filter(filter_string) if not filter_string.startswith('/') else compile_filter(filter_string)
+            assert get_filter_error(filter_string) is not None
+        assert get_filter_error("ERROR | WARN") is None
+
+    def test_invalid_expression_falls_back_to_substring(self):
+        line_matcher = compile_filter_or_substring("(ERROR")
+        assert line_matcher("(error) in brackets")
+        assert not line_matcher("error")
+
+    def test_filter_refines(self):
+        assert filter_refines("ADC ch", "ADC")
+        assert not filter_refines("ADC", "ADC ch")
+        assert filter_refines("ERROR and not ADC", "ERROR")
+        assert filter_refines('(ERROR | WARN) "channel: 9"', "ERROR | WARN")
+        assert not filter_refines("ERROR | WARN", "ERROR")
+        assert not filter_refines("!ERROR", "ERROR")
+        assert not filter_refines("(NOT ERROR)", "ERROR")
+        # keywords without operator characters are plain substrings
+        assert filter_refines("NOT ERROR", "ERROR")
+        assert filter_refines("ERROR | WARN", "")
+
+    def test_filter_cache_refinement_with_expressions(self):
+        cache = FilterResultCache()
+        cache.put("ERROR | WARN", [2, 3], 5)
+        cache.put("ADC", [0, 1, 2], 5)
+        assert cache.find_refinable_result("(ERROR | WARN) and not ADC")[0] == "ERROR | WARN"
+        assert cache.find_refinable_result("ERROR")[0] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
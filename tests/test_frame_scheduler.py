@@ -0,0 +1,145 @@
+"""
+Tests for the coalescing frame scheduler of the log view
+"""
+
+import sys
+import os
+import queue
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.log.bounded_log_queue import BoundedLogQueue
+from libs.log.frame_scheduler import FrameScheduler, FRAME_LOAD_FACTOR
+from libs.log.highlighted_log_lines import HighlightedLogLines
+from libs.log.log_store import LogStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+class _LogViewStub:
+    max_displayed_lines = 20
+
+    def __init__(self):
+        self.updates = []
+
+    def display_log_update(self, update_info):
+        self.updates.append(update_info)
+
+
+@pytest.fixture
+def store():
+    store = LogStore()
+    store.append_lines([f"line {i}" for i in range(100)])
+    return store
+
+
+def create_update(store, start, stop, append=True, prepend=False, filtered_stop=None, read_time=None):
+    return {
+        "highlighted_text_list": HighlightedLogLines(store, range(start, stop)),
+        "append": append,
+        "prepend": prepend,
+        "filtered_lines": HighlightedLogLines(store, range(0, filtered_stop or stop)),
+        "read_time": read_time,
+    }
+
+
+def get_texts(update_info):
+    return list(update_info["highlighted_text_list"].texts())
+
+
+class TestFrameScheduler:
+    """Test FrameScheduler class functionality"""
+
+    def test_appends_are_merged(self, store):
+        view = _LogViewStub()
+        scheduler = FrameScheduler(view, clock=FakeClock())
+        display_output_queue = queue.Queue()
+        for start in range(0, 30, 10):
+            display_output_queue.put(create_update(store, start, start + 10))
+        assert scheduler.collect(display_output_queue) == 3
+        assert scheduler.is_frame_due()
+        scheduler.render_frame()
+        assert len(view.updates) == 1
+        assert view.updates[0]["append"] is True
+        assert get_texts(view.updates[0]) == [f"line {i}" for i in range(30)]
+        assert len(view.updates[0]["filtered_lines"]) == 30
+        assert not scheduler.has_pending_updates
+
+    def test_reprint_drops_obsolete_updates(self, store):
+        view = _LogViewStub()
+        scheduler = FrameScheduler(view, clock=FakeClock())
+        scheduler.add_update(create_update(store, 0, 10))
+        scheduler.add_update(create_update(store, 5, 6, prepend=True, filtered_stop=10))
+        scheduler.add_update(create_update(store, 0, 20, append=False))
+        scheduler.add_update(create_update(store, 0, 30, append=False))
+        scheduler.add_update(create_update(store, 30, 35))
+        assert scheduler.coalesced_reprint_count == 2
+        scheduler.render_frame()
+        assert len(view.updates) == 1
+        # the append extends the latest reprint
+        assert view.updates[0]["append"] is False
+        assert get_texts(view.updates[0]) == [f"line {i}" for i in range(35)]
+
+    def test_prepends_are_merged_and_use_latest_filtered_lines(self, store):
+        view = _LogViewStub()
+        scheduler = FrameScheduler(view, clock=FakeClock())
+        scheduler.add_update(create_update(store, 90, 100, append=False, filtered_stop=100))
+        scheduler.add_update(create_update(store, 80, 90, prepend=True, filtered_stop=100))
+        scheduler.add_update(create_update(store, 70, 80, prepend=True, filtered_stop=100))
+        scheduler.render_frame()
+        assert [update["prepend"] for update in view.updates] == [False, True]
+        assert get_texts(view.updates[1]) == [f"line {i}" for i in range(70, 90)]
+
+    def test_prepends_deferred_when_budget_is_used(self, store):
+        view = _LogViewStub()
+        scheduler = FrameScheduler(view, frame_time_budget_s=0.0, clock=FakeClock())
+        scheduler.add_update(create_update(store, 90, 100))
+        scheduler.add_update(create_update(store, 80, 90, prepend=True, filtered_stop=100))
+        scheduler.render_frame()
+        assert len(view.updates) == 1
+        assert scheduler.has_pending_updates
+        scheduler.render_frame()
+        assert view.updates[1]["prepend"] is True
+
+    def test_dropped_updates_cause_tail_reprint(self, store):
+        view = _LogViewStub()
+        scheduler = FrameScheduler(view, clock=FakeClock())
+        display_output_queue = BoundedLogQueue(2, "drop_oldest")
+        for start in range(0, 40, 10):
+            display_output_queue.put(create_update(store, start, start + 10))
+        assert display_output_queue.dropped_item_count == 2
+        scheduler.collect(display_output_queue)
+        scheduler.render_frame()
+        assert len(view.updates) == 1
+        assert view.updates[0]["append"] is False
+        assert get_texts(view.updates[0]) == [f"line {i}" for i in range(20, 40)]
+
+    def test_frame_interval_adapts_to_render_time(self, store, monkeypatch):
+        clock = FakeClock()
+        view = _LogViewStub()
+        scheduler = FrameScheduler(view, min_frame_interval_s=0.02, max_frame_interval_s=0.25, clock=clock)
+        assert scheduler.get_time_until_next_frame() is None
+        render_times = iter([0.01, 0.0])
+        monkeypatch.setattr(scheduler, "_display", lambda update_info, lines: next(render_times))
+        scheduler.add_update(create_update(store, 0, 10))
+        scheduler.render_frame()
+        assert scheduler.frame_interval_s == pytest.approx(0.01 * FRAME_LOAD_FACTOR)
+        scheduler.add_update(create_update(store, 10, 20))
+        assert not scheduler.is_frame_due()
+        assert scheduler.get_time_until_next_frame() == pytest.approx(0.04)
+        clock.time += 0.04
+        assert scheduler.is_frame_due()
+        scheduler.render_frame()
+        assert scheduler.frame_interval_s == 0.02
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,338 @@
+"""
+Tests for the append-only log store and the log processing on top of it
+"""
+
+import sys
+import os
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import libs.log.log_controller as log_controller
+from libs.log.log_store import LogStore, create_line_index_array
+from libs.log.highlight_rules import HighlightRule, HighlightRuleSet, create_default_highlight_rules
+from libs.log.highlighted_log_lines import ChainedLogLines, HighlightedLogLines, CHANNEL_COLUMN_WIDTH, READ_TIME_COLUMN_WIDTH, format_channel, format_read_time
+from libs.log.parallel_filter import ParallelFilterEngine, ParallelFilterPass
+
+
+class _LogViewStub:
+    max_displayed_lines = None
+
+    def update_log(self, text, append):
+        pass
+
+
+@pytest.fixture
+def log_handler():
+    log_controller.clear_log_data()
+    yield log_controller.create_log_processor_and_displayer(_LogViewStub())
+    log_controller.clear_log_data()
+
+
+@pytest.fixture
+def log_processor(log_handler):
+    return log_handler["process"]
+
+
+class TestLogStore:
+    """Test LogStore class functionality"""
+
+    def test_append_across_blocks(self):
+        store = LogStore(block_size=4)
+        assert store.append_lines([f"line {i}" for i in range(10)]) == 0
+        assert store.append_lines(["a", "b"]) == 10
+        assert len(store) == 12
+        assert store[0] == "line 0"
+        assert store[9] == "line 9"
+        assert store[-1] == "b"
+        with pytest.raises(IndexError):
+            store[12]
+
+    def test_iter_and_get_lines(self):
+        store = LogStore(block_size=3)
+        store.append_lines([str(i) for i in range(8)])
+        assert list(store.iter_lines(2, 7)) == [(i, str(i)) for i in range(2, 7)]
+        assert store.get_lines([0, 4, 7]) == ["0", "4", "7"]
+
+    def test_clear(self):
+        store = LogStore(block_size=3)
+        store.append_lines(["a", "b", "c", "d"])
+        store.clear()
+        assert len(store) == 0
+        assert list(store.iter_lines()) == []
+
+
+    def test_lowercase_copy(self):
+        store = LogStore(block_size=2)
+        store.append_lines(["MiXeD", "lower", "UP"])
+        assert [line for _, line in store.iter_lines(lower=True)] == ["mixed", "lower", "up"]
+        assert store.get_lines([2, 0], lower=True) == ["up", "mixed"]
+
+    def test_spill_to_disk(self, tmp_path):
+        store = LogStore(block_size=4, max_memory_lines=8, spill_directory=str(tmp_path))
+        store.append_lines([f"line {i}" for i in range(20)])
+        assert len(store) == 20
+        assert store.memory_line_count <= 8
+        assert store.spilled_line_count == 12
+        assert store[0] == "line 0"
+        assert store[13] == "line 13"
+        assert [line for _, line in store.iter_lines(2, 18)] == [f"line {i}" for i in range(2, 18)]
+        assert store.get_lines([1, 19, 5]) == ["line 1", "line 19", "line 5"]
+        assert store.get_lines([3], lower=True) == ["line 3"]
+        store.clear()
+        assert len(store) == 0
+        assert store.spilled_line_count == 0
+
+    def test_memory_byte_limit(self, tmp_path):
+        store = LogStore(block_size=2, max_memory_bytes=1000, spill_directory=str(tmp_path))
+        store.append_lines(["x" * 100] * 50)
+        assert store.memory_line_count < 10
+        assert store[0] == "x" * 100
+
+
+class TestHighlightedLogLines:
+    """Test lazy highlighted log line sequences"""
+
+    def test_snapshot_and_slicing(self):
+        store = LogStore(block_size=2)
+        store.append_lines(["info a", "error b", "info c", "error d"])
+        indices = create_line_index_array([1, 2, 3])
+        lines = HighlightedLogLines(store, indices, HighlightRuleSet().with_user_highlight("ERROR"))
+        indices.append(0)
+        assert len(lines) == 3
+        assert lines[0] == ("error b", "highlight")
+        assert lines[-1] == ("error d", "highlight")
+        assert list(lines[1:]) == [("info c", None), ("error d", "highlight")]
+        assert list(lines[-2:][1:]) == [("error d", "highlight")]
+        assert list(lines.texts()) == ["error b", "info c", "error d"]
+        assert lines[1:].line_index(0) == 2
+
+    def test_highlight_rules_precedence_and_memo(self):
+        store = LogStore()
+        store.append_lines(["ERROR: sensor", "Warning: low battery", "sensor ok", "terror"])
+        rules = create_default_highlight_rules()
+        assert [rules.get_tag(store, i, store[i]) for i in range(4)] == ["error", "warning", None, None]
+        # the user rule takes precedence, the default rules keep their memoized matches
+        user_rules = rules.with_user_highlight("sensor")
+        assert user_rules.rules[1] is rules.rules[0]
+        assert [user_rules.get_tag(store, i, store[i]) for i in range(4)] == ["highlight", "warning", "highlight", None]
+        rule = HighlightRule("x", "sensor", "red")
+        assert rule.match(store, 2, "sensor ok") is True
+        assert rule.get_memoized_match(store, 2) is True
+        assert rule.get_memoized_match(store.create_empty_copy(), 2) is None
+
+    def test_read_times(self):
+        store = LogStore(block_size=2)
+        store.append_lines(["a", "b", "c"], read_times=[(0, 1.0), (2, 2.0)])
+        store.append_lines(["status"])
+        store.append_lines(["d", "e"], read_times=[(0, 3.0)])
+        store.append_lines(["f"], read_times=[(0, 3.0)])
+        assert store.get_read_times(range(7)) == [1.0, 1.0, 2.0, None, 3.0, 3.0, 3.0]
+        assert store.get_read_times([6, 0, 3]) == [3.0, 1.0, None]
+        assert store.get_read_time(2) == 2.0
+        store.clear()
+        store.append_lines(["x"])
+        assert store.get_read_time(0) is None
+
+    def test_read_time_column(self):
+        store = LogStore()
+        store.append_lines(["error: a", "b"], read_times=[(0, 100.0)])
+        store.append_lines(["status"])
+        lines = HighlightedLogLines(store, range(3), create_default_highlight_rules(), show_read_times=True)
+        column = format_read_time(100.0)
+        assert len(column) == READ_TIME_COLUMN_WIDTH
+        assert list(lines) == [(column + "error: a", "error"), (column + "b", None), (" " * READ_TIME_COLUMN_WIDTH + "status", None)]
+        assert list(lines[1:].texts()) == [column + "b", " " * READ_TIME_COLUMN_WIDTH + "status"]
+        assert lines[0] == (column + "error: a", "error")
+
+    def test_channels(self):
+        store = LogStore(block_size=2)
+        store.append_lines(["a", "b", "c"], channels=[(0, 0), (2, 1)])
+        store.append_lines(["status"])
+        store.append_lines(["d"], read_times=[(0, 1.0)], channels=[(0, 1)])
+        assert store.get_channels(range(5)) == [0, 0, 1, None, 1]
+        assert store.channel_numbers == {0, 1}
+        lines = HighlightedLogLines(store, range(2, 5), show_channels=True)
+        assert len(format_channel(1)) == CHANNEL_COLUMN_WIDTH
+        assert list(lines.texts()) == [" 1> c", " " * CHANNEL_COLUMN_WIDTH + "status", " 1> d"]
+        store.clear()
+        assert store.channel_numbers == frozenset()
+
+    def test_chained_log_lines(self):
+        store = LogStore()
+        store.append_lines(["a", "b", "c", "d", "e"])
+        chain = ChainedLogLines()
+        chain.append(HighlightedLogLines(store, range(2, 4)))
+        chain.append(HighlightedLogLines(store, range(4, 4)))
+        chain.append(HighlightedLogLines(store, range(4, 5)))
+        chain.prepend(HighlightedLogLines(store, range(0, 2)))
+        assert len(chain) == 5
+        assert list(chain.texts()) == ["a", "b", "c", "d", "e"]
+        assert chain[-1] == ("e", None)
+        assert list(chain[1:4].texts()) == ["b", "c", "d"]
+        assert list(chain[-2:]) == [("d", None), ("e", None)]
+
+
+class TestLogProcessing:
+    """Test log processing on top of the log store"""
+
+    def test_append_and_filter(self, log_processor):
+        update = log_processor("ADC channel: 9\nADC channel: 14\n")
+        assert update["append"] is True
+        assert list(update["highlighted_text_list"]) == [("ADC channel: 9", None), ("ADC channel: 14", None)]
+
+        update = log_processor("", filter_string="channel: 9")
+        assert update["append"] is False
+        assert list(update["highlighted_text_list"]) == [("ADC channel: 9", None)]
+
+        update = log_processor("ADC channel: 9, raw\nother\n")
+        assert update["append"] is True
+        assert list(update["highlighted_text_list"]) == [("ADC channel: 9, raw", None)]
+
+    def test_highlight(self, log_processor):
+        log_processor("error: a\ninfo: b\nwarning: c\n")
+        update = log_processor("", highlight_string="INFO")
+        # a new highlight string does not reprint, the log view re-tags the visible lines
+        assert update["append"] is True
+        assert list(update["highlighted_text_list"]) == []
+        assert list(update["filtered_lines"]) == [("error: a", "error"), ("info: b", "highlight"), ("warning: c", "warning")]
+        update = log_processor("", highlight_string="")
+        assert list(update["filtered_lines"]) == [("error: a", "error"), ("info: b", None), ("warning: c", "warning")]
+
+    def test_pause_and_unpause(self, log_processor):
+        log_processor("first\n")
+        log_processor("", pause_string="Unpause")
+        update = log_processor("during pause\n")
+        assert list(update["highlighted_text_list"]) == []
+        update = log_processor("", pause_string="Pause")
+        assert update["append"] is True
+        assert list(update["highlighted_text_list"]) == [("during pause", None)]
+
+    def test_unpause_renders_backlog_in_batches(self, log_handler, monkeypatch):
+        monkeypatch.setattr(log_controller, "UNPAUSE_BACKLOG_BATCH_LINES", 10)
+        log_handler["process"]("", pause_string="Unpause")
+        log_handler["process"](new_lines=[f"line {i}" for i in range(25)])
+        assert not log_handler["has_pending_work"]()
+
+        update = log_handler["process"]("", pause_string="Pause")
+        rendered_lines = list(update["highlighted_text_list"].texts())
+        assert len(rendered_lines) == 10
+        while log_handler["has_pending_work"]():
+            update = log_handler["process_pending_work"]()
+            assert update["append"] is True
+            rendered_lines += update["highlighted_text_list"].texts()
+        assert rendered_lines == [f"line {i}" for i in range(25)]
+        assert len(update["filtered_lines"]) == 25
+
+    def test_read_time_of_update(self, log_processor):
+        update = log_processor(new_lines=["a", "b", "c"], read_times=[(0, 10.0), (1, 11.0)])
+        # read time of the oldest new line
+        assert update["read_time"] == 10.0
+        assert log_processor("")["read_time"] is None
+        log_processor("", pause_string="Unpause")
+        log_processor(new_lines=["d"], read_times=[(0, 12.0)])
+        # lines held back by a pause are stale on purpose, no read time
+        assert log_processor("", pause_string="Pause")["read_time"] is None
+        assert log_processor(new_lines=["e"], read_times=[(0, 13.0)])["read_time"] == 13.0
+
+    def test_channel_column(self, log_processor, monkeypatch):
+        update = log_processor(new_lines=["a", "b"], channels=[(0, 0)])
+        assert list(update["highlighted_text_list"].texts()) == ["a", "b"]
+        # the column is shown, with a reprint, once a second channel is received
+        update = log_processor(new_lines=["trace"], channels=[(0, 1)])
+        assert update["append"] is False
+        assert list(update["highlighted_text_list"].texts()) == [" 0> a", " 0> b", " 1> trace"]
+        update = log_processor("", filter_string="trace")
+        assert list(update["highlighted_text_list"].texts()) == [" 1> trace"]
+        monkeypatch.setattr(log_controller, "channel_column_mode", "never")
+        update = log_processor(new_lines=["trace 2"], channels=[(0, 1)])
+        assert update["append"] is False
+        assert list(update["highlighted_text_list"].texts()) == ["trace", "trace 2"]
+        with pytest.raises(ValueError):
+            log_controller.configure_channel_column("sometimes")
+
+    def test_clear(self, log_handler):
+        log_handler["process"](new_lines=["a", "b", "c"])
+        update = log_handler["clear"]()
+        assert update["append"] is False
+        assert list(update["highlighted_text_list"]) == []
+        # the pause cursor is reset with the store, new lines are shown right away
+        update = log_handler["process"](new_lines=["d"])
+        assert list(update["highlighted_text_list"]) == [("d", None)]
+        assert len(log_controller.log_store) == 1
+
+    def test_filtered_lines_cover_complete_filtered_log(self, log_processor):
+        log_processor(new_lines=["a 1", "b 2", "a 3"])
+        update = log_processor("", filter_string="a")
+        update = log_processor(new_lines=["a 4"])
+        assert list(update["highlighted_text_list"]) == [("a 4", None)]
+        assert [line for line, _ in update["filtered_lines"]] == ["a 1", "a 3", "a 4"]
+
+    def test_filter_refinement_and_cache(self, log_processor):
+        log_processor(new_lines=["ADC channel: 9", "ADC channel: 14", "GPIO"])
+        update = log_processor("", filter_string="ADC")
+        assert len(update["highlighted_text_list"]) == 2
+        update = log_processor("", filter_string="adc channel: 9")
+        assert list(update["highlighted_text_list"]) == [("ADC channel: 9", None)]
+        log_processor(new_lines=["ADC channel: 9 again", "ADC channel: 1"])
+        # cached result of "ADC" is extended by the lines received meanwhile
+        update = log_processor("", filter_string="ADC")
+        assert [line for line, _ in update["highlighted_text_list"]] == \
+            ["ADC channel: 9", "ADC channel: 14", "ADC channel: 9 again", "ADC channel: 1"]
+        update = log_processor("", filter_string="")
+        assert len(update["highlighted_text_list"]) == 5
+
+    def test_line_batch(self, log_processor):
+        update = log_processor(new_lines=["batch 1", "batch 2"], filter_string="2")
+        assert list(update["highlighted_text_list"]) == [("batch 2", None)]
+        assert len(log_controller.log_store) == 2
+
+
+class TestProgressiveFiltering:
+    """Test progressive filtering of large histories"""
+
+    def test_newest_lines_first_then_older_history(self, log_handler, monkeypatch):
+        monkeypatch.setattr(log_controller, "PROGRESSIVE_FILTER_MIN_LINES", 1000)
+        monkeypatch.setattr(log_controller, "PROGRESSIVE_FILTER_FIRST_MATCH_COUNT", 5)
+        log_handler["process"](new_lines=[f"line {i} {'even' if i % 2 == 0 else 'odd'}" for i in range(20000)])
+
+        update = log_handler["process"]("", filter_string="even")
+        assert update["append"] is False
+        assert log_handler["has_pending_work"]()
+        first_lines = [line for line, _ in update["highlighted_text_list"]]
+        assert first_lines[-1] == "line 19998 even"
+
+        prepended_lines = []
+        while log_handler["has_pending_work"]():
+            update = log_handler["process_pending_work"]()
+            assert update["prepend"] is True
+            prepended_lines = [line for line, _ in update["highlighted_text_list"]] + prepended_lines
+            # the filtered lines cover the older history filtered so far
+            assert list(update["filtered_lines"].texts()) == prepended_lines + first_lines
+        assert prepended_lines + first_lines == [f"line {i} even" for i in range(0, 20000, 2)]
+        assert len(update["filtered_lines"]) == 10000
+        assert list(log_controller.filtered_line_indices) == list(range(0, 20000, 2))
+
+    def test_filter_change_cancels_pass(self, log_handler, monkeypatch):
+        monkeypatch.setattr(log_controller, "PROGRESSIVE_FILTER_MIN_LINES", 1000)
+        monkeypatch.setattr(log_controller, "PROGRESSIVE_FILTER_FIRST_MATCH_COUNT", 1)
+        log_handler["process"](new_lines=[f"line {i}" for i in range(20000)])
+        log_handler["process"]("", filter_string="line")
+        assert log_handler["has_pending_work"]()
+        update = log_handler["process"]("", filter_string="")
+        assert not log_handler["has_pending_work"]()
+        assert len(update["filtered_lines"]) == 20000
+
+    def test_parallel_filter_pass(self):
+        store = LogStore(block_size=100)
+        store.append_lines([f"Line {i} {'EVEN' if i % 2 == 0 else 'odd'}" for i in range(5000)])
+        engine = ParallelFilterEngine(max_workers=2)
+        try:
+            filter_pass = ParallelFilterPass("even", len(store), store, engine, None, chunk_lines=700)
+            line_indices = create_line_index_array()
+            while not filter_pass.done:
+                line_indices = filter_pass.run_slice(1.0) + line_indices
+        finally:
+            engine.shutdown()
+        assert list(line_indices) == list(range(0, 5000, 2))
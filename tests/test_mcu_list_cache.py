@@ -0,0 +1,117 @@
+"""
+Tests for the cached MCU list and the lazy J-Link startup
+"""
+
+import sys
+import os
+import queue
+import subprocess
+import threading
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.mcu_list_cache import load_cached_mcu_list, save_mcu_list
+from libs.jlink.rtt_handler import RTTHandler
+from libs.jlink.simulated_jlink import SimulatedJLink
+
+
+class VersionedJLink(SimulatedJLink):
+    """Simulated J-Link reporting a DLL version and counting the device enumeration calls"""
+
+    def __init__(self, version, **kwargs):
+        super().__init__(**kwargs)
+        self.version = version
+        self.supported_device_call_count = 0
+
+    def supported_device(self, index=0):
+        self.supported_device_call_count += 1
+        return super().supported_device(index)
+
+
+class TestMCUListCache:
+    """Test the MCU list cache file"""
+
+    def test_cache_per_dll_version(self, tmp_path):
+        cache_path = str(tmp_path / "cache" / "mcu_list.json")
+        assert load_cached_mcu_list("7.94", cache_path) is None
+        save_mcu_list("7.94", ["STM32F427II"], cache_path)
+        save_mcu_list("8.10", ["NRF52840"], cache_path)
+        assert load_cached_mcu_list("7.94", cache_path) == ["STM32F427II"]
+        assert load_cached_mcu_list("8.10", cache_path) == ["NRF52840"]
+        assert load_cached_mcu_list("8.12", cache_path) is None
+
+    def test_corrupt_cache_is_ignored(self, tmp_path):
+        cache_path = str(tmp_path / "mcu_list.json")
+        with open(cache_path, "w") as f:
+            f.write("{not json")
+        assert load_cached_mcu_list("7.94", cache_path) is None
+        save_mcu_list("7.94", ["A"], cache_path)
+        assert load_cached_mcu_list("7.94", cache_path) == ["A"]
+
+
+class TestRTTHandlerMCUList:
+    """Test the background loading of the MCU list"""
+
+    def test_enumerated_once_per_dll_version(self, tmp_path):
+        cache_path = str(tmp_path / "mcu_list.json")
+        jlink = VersionedJLink("7.94", supported_devices=("stm32f427ii", "nrf52840"))
+        assert RTTHandler(None, jlink=jlink, mcu_list_cache_path=cache_path).get_supported_mcus() == ["STM32F427II", "NRF52840"]
+        assert jlink.supported_device_call_count == 2
+
+        cached_jlink = VersionedJLink("7.94", supported_devices=("stm32f427ii", "nrf52840"))
+        assert RTTHandler(None, jlink=cached_jlink, mcu_list_cache_path=cache_path).get_supported_mcus() == ["STM32F427II", "NRF52840"]
+        assert cached_jlink.supported_device_call_count == 0
+
+        updated_jlink = VersionedJLink("8.10", supported_devices=("stm32f427ii",))
+        assert RTTHandler(None, jlink=updated_jlink, mcu_list_cache_path=cache_path).get_supported_mcus() == ["STM32F427II"]
+        assert updated_jlink.supported_device_call_count == 1
+
+    def test_loaded_in_background(self, tmp_path):
+        handler = RTTHandler(None, jlink=SimulatedJLink(), mcu_list_cache_path=None)
+        loaded = threading.Event()
+        loaded_lists = []
+
+        def on_loaded(mcu_list):
+            loaded_lists.append(mcu_list)
+            loaded.set()
+
+        handler.start_loading_supported_mcus(on_loaded)
+        assert loaded.wait(timeout=5)
+        assert "SIMULATED_MCU" in loaded_lists[0]
+        # registered after loading, called right away
+        handler.start_loading_supported_mcus(loaded_lists.append)
+        assert len(loaded_lists) == 2
+        assert "SIMULATED_MCU" in handler.supported_mcu_list
+
+    def test_connect_does_not_wait_for_enumeration(self):
+        class SlowJLink(SimulatedJLink):
+            """Simulated J-Link whose device enumeration runs until it is released"""
+            released = threading.Event()
+
+            def num_supported_devices(self):
+                self.released.wait(timeout=5)
+                return super().num_supported_devices()
+
+        jlink = SlowJLink()
+        handler = RTTHandler(queue.Queue(), jlink=jlink, mcu_list_cache_path=None)
+        handler.start_loading_supported_mcus()
+        with pytest.raises(Exception, match="still listing"):
+            handler.connect("SIMULATED_MCU")
+        assert not handler.is_connected
+        jlink.released.set()
+        assert "SIMULATED_MCU" in handler.get_supported_mcus()
+        assert handler.connect("SIMULATED_MCU")
+        handler.disconnect()
+
+    def test_pylink_not_imported_on_startup(self):
+        code = ("import sys; import libs.jlink.rtt_source_options, libs.jlink.rtt_handler;"
+                "libs.jlink.rtt_handler.RTTHandler(None); print('pylink' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.join(os.path.dirname(__file__), '..'))
+        assert result.stdout.strip() == "False", result.stderr
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,60 @@
+"""
+Tests for the indexed MCU search of the MCU combo
+"""
+
+import sys
+import os
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.mcu_search_index import MCUSearchIndex
+
+MCU_NAMES = ["ATSAMD21G18", "EFM32GG11B", "NRF52832", "NRF52840", "NRF5340", "STM32F407VG", "STM32F427II", "STM32H743ZI",
+             "XSTM32F4"]
+
+
+class TestMCUSearchIndex:
+    def test_matches_equal_substring_scan(self):
+        index = MCUSearchIndex(MCU_NAMES)
+        for query in ["N", "32", "F4", "STM32F4", "52840", "2F42", "Z", "NRF5284X", "H743ZI"]:
+            assert sorted(index.search(query)) == sorted(name for name in MCU_NAMES if query in name)
+
+    def test_case_insensitive(self):
+        index = MCUSearchIndex(MCU_NAMES)
+        assert index.search("nrf528") == ["NRF52832", "NRF52840"]
+        assert index.search("  stm32h  ") == ["STM32H743ZI"]
+
+    def test_empty_query_returns_all_names(self):
+        index = MCUSearchIndex(MCU_NAMES)
+        assert index.search("") == MCU_NAMES
+        assert index.search("   ") == MCU_NAMES
+
+    def test_exact_and_prefix_matches_ranked_first(self):
+        index = MCUSearchIndex(["ASTM32F4", "STM32F407VG", "XSTM32F4", "STM32F4"])
+        assert index.search("stm32f4") == ["STM32F4", "STM32F407VG", "ASTM32F4", "XSTM32F4"]
+
+    def test_incremental_narrowing_while_typing(self):
+        index = MCUSearchIndex(MCU_NAMES)
+        expected_results = {
+            "S": ["STM32F407VG", "STM32F427II", "STM32H743ZI", "ATSAMD21G18", "XSTM32F4"],
+            "ST": ["STM32F407VG", "STM32F427II", "STM32H743ZI", "XSTM32F4"],
+            "STM32F": ["STM32F407VG", "STM32F427II", "XSTM32F4"],
+            "STM32F42": ["STM32F427II"],
+            "STM32F42X": [],
+        }
+        for query, expected_result in expected_results.items():
+            assert index.search(query) == expected_result
+        # deleting characters widens the search again
+        assert index.search("STM32F") == expected_results["STM32F"]
+        assert index.search("NRF") == ["NRF52832", "NRF52840", "NRF5340"]
+
+    def test_empty_index(self):
+        index = MCUSearchIndex([])
+        assert len(index) == 0
+        assert index.search("STM") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,120 @@
+"""
+Tests for the log pipeline instrumentation
+"""
+
+import sys
+import os
+import csv
+import json
+import queue
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.log.pipeline_metrics import (DurationHistogram, MetricsExporter, PipelineMetrics, PIPELINE_STAGES, StageMetrics,
+                                       flatten_snapshot, format_status_line)
+
+
+class TestDurationHistogram:
+    """Test DurationHistogram class functionality"""
+
+    def test_percentiles(self):
+        histogram = DurationHistogram()
+        for _ in range(90):
+            histogram.record(0.001)
+        for _ in range(10):
+            histogram.record(0.1)
+        # estimates are the bucket upper bounds, at most a factor 2 above the duration
+        assert 0.001 <= histogram.get_percentile(50) < 0.002
+        assert 0.1 <= histogram.get_percentile(95) <= 0.1
+        assert histogram.get_percentile(99) == 0.1
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 100
+        assert snapshot["max_s"] == 0.1
+        assert snapshot["mean_s"] == pytest.approx(0.0109)
+
+    def test_empty_and_above_last_bucket(self):
+        histogram = DurationHistogram()
+        assert histogram.get_percentile(50) == 0.0
+        histogram.record(100.0)
+        assert histogram.get_percentile(50) == 100.0
+
+
+class TestStageMetrics:
+    """Test StageMetrics class functionality"""
+
+    def test_durations_of_sliding_window(self):
+        clock_time = [0.0]
+        stage_metrics = StageMetrics("processing", window_s=10.0, window_slice_s=1.0, clock=lambda: clock_time[0])
+        for _ in range(100):
+            stage_metrics.record(0.5)
+        clock_time[0] = 5.0
+        stage_metrics.record(0.001)
+        assert stage_metrics.snapshot()["duration"]["p95_s"] == 0.5
+        # the spike is out of the window, the percentiles show the current durations
+        clock_time[0] = 10.5
+        duration = stage_metrics.snapshot()["duration"]
+        assert duration["count"] == 1
+        assert duration["p95_s"] == duration["max_s"] == 0.001
+        assert stage_metrics.snapshot()["total_calls"] == 101
+        clock_time[0] = 20.0
+        assert stage_metrics.snapshot()["duration"]["count"] == 0
+
+
+class TestPipelineMetrics:
+    """Test PipelineMetrics class functionality"""
+
+    def test_stages_and_gauges(self):
+        metrics = PipelineMetrics()
+        input_queue = queue.Queue()
+        input_queue.put(1)
+        metrics.register_gauge("input_q", input_queue.qsize)
+        metrics.record("processing", 0.002, line_count=100)
+        metrics.record("processing", 0.004, line_count=50)
+        metrics.record("read", 0.0001, byte_count=4096)
+        snapshot = metrics.snapshot()
+        assert list(snapshot["stages"]) == list(PIPELINE_STAGES)
+        assert snapshot["gauges"] == {"input_q": 1}
+        processing = snapshot["stages"]["processing"]
+        assert processing["total_calls"] == 2
+        assert processing["total_lines"] == 150
+        assert snapshot["stages"]["read"]["total_bytes"] == 4096
+        status_line = format_status_line(snapshot)
+        assert status_line.startswith("input_q 1 | read")
+        assert "processing" in status_line and "rendering" not in status_line
+
+    def test_latency(self):
+        metrics = PipelineMetrics()
+        metrics.record_latency("read_to_display", 0.005, line_count=10)
+        metrics.record_latency("read_to_display", 0.2, line_count=10)
+        latency = metrics.snapshot()["latencies"]["read_to_display"]
+        assert latency["total_lines"] == 20
+        assert latency["duration"]["max_s"] == 0.2
+        assert "read_to_display p50 " in format_status_line(metrics.snapshot())
+
+    def test_flatten_snapshot(self):
+        flat_snapshot = flatten_snapshot({"time": 1.0, "stages": {"read": {"duration": {"p95_s": 0.5}}}})
+        assert flat_snapshot == {"time": 1.0, "stages.read.duration.p95_s": 0.5}
+
+    def test_json_and_csv_export(self, tmp_path):
+        metrics = PipelineMetrics()
+        metrics.register_gauge("display_q", lambda: 3)
+        metrics.record("rendering", 0.01, line_count=20)
+        json_path = str(tmp_path / "metrics.json")
+        csv_path = str(tmp_path / "metrics.csv")
+        for path in (json_path, csv_path):
+            exporter = MetricsExporter(metrics, path, interval_s=0.01)
+            exporter.close()
+        with open(json_path) as f:
+            snapshots = [json.loads(line) for line in f]
+        assert snapshots[-1]["gauges"]["display_q"] == 3
+        assert snapshots[-1]["stages"]["rendering"]["total_lines"] == 20
+        with open(csv_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert rows[-1]["stages.rendering.total_lines"] == "20"
+        assert rows[-1]["gauges.display_q"] == "3"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
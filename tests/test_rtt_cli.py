@@ -0,0 +1,101 @@
+"""
+Tests for the headless RTT capture
+"""
+
+import sys
+import os
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import rtt_cli
+from libs.jlink.rtt_recording import RTTRecordingWriter
+from libs.log.rotating_line_writer import RotatingLineWriter
+
+
+@pytest.fixture
+def recording_path(tmp_path):
+    path = str(tmp_path / "session.rttrec")
+    writer = RTTRecordingWriter(path)
+    for i in range(100):
+        writer.write(0, f"{i} [{'ERROR' if i % 10 == 9 else 'INFO'}] value: {i}\n".encode())
+    writer.write(0, b"99 boot complete\n")
+    writer.close()
+    return path
+
+
+class TestRTTCli:
+    """Test the headless capture entry point"""
+
+    def test_filtered_lines_to_stdout(self, recording_path, capsys):
+        exit_code = rtt_cli.main(["--replay", recording_path, "--replay-speed", "0", "--filter", "ERROR and not \"value: 19\""])
+        captured = capsys.readouterr()
+        assert exit_code == rtt_cli.EXIT_OK
+        assert captured.out.splitlines() == [f"{i} [ERROR] value: {i}" for i in range(9, 100, 10) if i != 19]
+        assert "replay finished" in captured.err
+
+    def test_exit_on_pattern(self, recording_path, capsys):
+        exit_code = rtt_cli.main(["--replay", recording_path, "--replay-speed", "0", "--exit-on", "/^5 /"])
+        assert exit_code == rtt_cli.EXIT_OK
+        lines = capsys.readouterr().out.splitlines()
+        assert "5 [INFO] value: 5" in lines
+        assert lines[-1] == "5 [INFO] value: 5"
+
+    def test_exit_pattern_not_found(self, recording_path, capsys):
+        exit_code = rtt_cli.main(["--replay", recording_path, "--replay-speed", "0", "--exit-on", "never printed"])
+        assert exit_code == rtt_cli.EXIT_TIMEOUT
+
+    def test_timeout_and_max_lines(self, capsys):
+        exit_code = rtt_cli.main(["--demo-lines-per-s", "1000", "--timeout", "0.3", "--exit-on", "never printed"])
+        assert exit_code == rtt_cli.EXIT_TIMEOUT
+        assert 0 < len(capsys.readouterr().out.splitlines()) < 1000
+        exit_code = rtt_cli.main(["--demo-lines-per-s", "100000", "--max-lines", "42"])
+        assert exit_code == rtt_cli.EXIT_OK
+        assert len(capsys.readouterr().out.splitlines()) == 42
+
+    def test_channel_column(self, tmp_path, capsys):
+        path = str(tmp_path / "channels.rttrec")
+        writer = RTTRecordingWriter(path)
+        writer.write(0, b"terminal\n")
+        writer.write(1, b"trace ")
+        writer.write(0, b"terminal error\n")
+        writer.write(1, b"error\n")
+        writer.close()
+        exit_code = rtt_cli.main(["--replay", path, "--replay-speed", "0", "--filter", "error", "--channel-column"])
+        assert exit_code == rtt_cli.EXIT_OK
+        assert capsys.readouterr().out.splitlines() == [" 0> terminal error", " 1> trace error"]
+
+    def test_invalid_filter(self, recording_path, capsys):
+        assert rtt_cli.main(["--replay", recording_path, "--filter", "(ERROR"]) == rtt_cli.EXIT_INVALID_ARGUMENTS
+
+    def test_missing_recording(self, tmp_path, capsys):
+        assert rtt_cli.main(["--replay", str(tmp_path / "missing.rttrec")]) == rtt_cli.EXIT_CONNECTION_FAILED
+
+
+class TestRotatingLineWriter:
+    """Test RotatingLineWriter class functionality"""
+
+    def test_rotation(self, tmp_path):
+        path = str(tmp_path / "capture.log")
+        writer = RotatingLineWriter(path, max_bytes=100, backup_count=2)
+        for batch_no in range(6):
+            writer.write_lines([f"batch {batch_no} line {i:02d}" for i in range(3)])
+        writer.close()
+        assert sorted(os.listdir(tmp_path)) == ["capture.log", "capture.log.1", "capture.log.2"]
+        with open(path) as f:
+            assert f.read().splitlines()[-1] == "batch 5 line 02"
+        assert all(os.path.getsize(tmp_path / name) <= 100 for name in os.listdir(tmp_path))
+
+    def test_append_without_rotation(self, tmp_path):
+        path = str(tmp_path / "capture.log")
+        for _ in range(2):
+            writer = RotatingLineWriter(path)
+            writer.write_lines(["a", "b"])
+            writer.close()
+        with open(path) as f:
+            assert f.read() == "a\nb\na\nb\n"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,72 @@
+"""
+Tests for the incremental RTT line framer
+"""
+
+import sys
+import os
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.rtt_line_framer import RTTLineFramer
+
+
+class TestRTTLineFramer:
+    """Test RTTLineFramer class functionality"""
+
+    def test_complete_and_partial_lines(self):
+        framer = RTTLineFramer()
+        assert framer.feed(b"first\nsec") == ["first"]
+        assert framer.pending_byte_count == 3
+        assert framer.feed(b"ond\nthird\n") == ["second", "third"]
+        assert framer.pending_byte_count == 0
+
+    def test_list_of_ints_input(self):
+        # pylink returns RTT data as list of ints
+        framer = RTTLineFramer()
+        assert framer.feed(list(b"abc\n")) == ["abc"]
+
+    def test_utf8_character_split_across_reads(self):
+        framer = RTTLineFramer()
+        data = "temp: 25 °C\n".encode('utf-8')
+        split_index = data.index(b'\xb0')
+        assert framer.feed(data[:split_index]) == []
+        assert framer.feed(data[split_index:]) == ["temp: 25 °C"]
+
+    def test_ansi_escape_split_across_reads(self):
+        framer = RTTLineFramer()
+        assert framer.feed(b"\x1b[1;3") == []
+        assert framer.feed(b"1mred\x1b[0m\n") == ["red"]
+
+    def test_terminal_switch_marker(self):
+        framer = RTTLineFramer()
+        assert framer.feed(b"a\n\xff0b\n\xff") == ["a", "b"]
+        assert framer.feed(b"1c\n") == ["c"]
+
+    def test_crlf_line_endings(self):
+        framer = RTTLineFramer()
+        assert framer.feed(b"one\r\ntwo\r\n") == ["one", "two"]
+
+    def test_empty_lines_are_kept(self):
+        framer = RTTLineFramer()
+        assert framer.feed(b"\n\nx\n") == ["", "", "x"]
+
+    def test_overlong_line_split_at_character_boundary(self):
+        framer = RTTLineFramer(max_line_length=4)
+        lines = framer.feed("abc€def".encode('utf-8'))
+        assert lines == ["abc"]
+        assert framer.flush() == ["€def"]
+
+    def test_flush_and_reset(self):
+        framer = RTTLineFramer()
+        framer.feed(b"partial")
+        assert framer.flush() == ["partial"]
+        assert framer.flush() == []
+        framer.feed(b"dropped")
+        framer.reset()
+        assert framer.feed(b"\n") == [""]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,101 @@
+"""
+Tests for recording and replaying raw RTT sessions
+"""
+
+import sys
+import os
+import queue
+import time
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.replay_rtt_handler import ReplayRTTHandler, REPLAY_SPEED_MAX
+from libs.jlink.rtt_recording import RECORDING_HEADER, RecordingFormatError, RTTRecordingWriter, read_recording
+
+
+def write_recording(path, chunks, interval_s=0.0):
+    writer = RTTRecordingWriter(path)
+    for channel, data in chunks:
+        writer.write(channel, data)
+        if interval_s:
+            time.sleep(interval_s)
+    writer.close()
+
+
+def get_queued_lines(log_queue):
+    lines = []
+    while True:
+        try:
+            item = log_queue.get(timeout=2)
+        except queue.Empty:
+            return lines
+        lines.extend(item["lines"] if "lines" in item else [item["line"].rstrip('\n')])
+        if lines[-1] == "[RTT GUI] replay finished":
+            return lines
+
+
+class TestRTTRecording:
+    """Test the recording file format"""
+
+    def test_write_and_read_records(self, tmp_path):
+        path = tmp_path / "session.rttrec"
+        write_recording(path, [(0, b"first\nsec"), (1, list(b"ond\n")), (0, b"")], interval_s=0.002)
+        records = list(read_recording(path))
+        assert [(channel, payload) for _, channel, payload in records] == [(0, b"first\nsec"), (1, b"ond\n"), (0, b"")]
+        timestamps = [timestamp_ns for timestamp_ns, _, _ in records]
+        assert timestamps == sorted(timestamps)
+        assert timestamps[1] - timestamps[0] >= 1000000
+
+    def test_truncated_record_ends_recording(self, tmp_path):
+        path = tmp_path / "session.rttrec"
+        write_recording(path, [(0, b"complete\n"), (0, b"truncated\n")])
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 3)
+        assert [payload for _, _, payload in read_recording(path)] == [b"complete\n"]
+
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / "log.txt"
+        path.write_bytes(b"ADC channel: 9, raw value: 1236\n")
+        with pytest.raises(RecordingFormatError):
+            list(read_recording(path))
+        path.write_bytes(RECORDING_HEADER.pack(b"RTTREC", 99, 0))
+        with pytest.raises(RecordingFormatError):
+            list(read_recording(path))
+
+
+class TestReplayRTTHandler:
+    """Test replaying a recording through the RTT handler interface"""
+
+    def test_replay_at_max_speed(self, tmp_path):
+        path = tmp_path / "session.rttrec"
+        write_recording(path, [(0, b"line 1\nli"), (0, b"ne 2\r\n\x1b[31mline 3\x1b[0m\n"), (0, b"partial")])
+        log_queue = queue.Queue()
+        handler = ReplayRTTHandler(log_queue, str(path), speed=REPLAY_SPEED_MAX)
+        assert handler.connect("REPLAY")
+        lines = get_queued_lines(log_queue)
+        handler.disconnect()
+        assert lines[1:] == ["line 1", "line 2", "line 3", "partial", "[RTT GUI] replay finished"]
+        assert handler.get_read_statistics()["total_bytes"] == 9 + 22 + 7
+
+    def test_replay_keeps_timing(self, tmp_path):
+        path = tmp_path / "session.rttrec"
+        write_recording(path, [(0, b"a\n"), (0, b"b\n")], interval_s=0.1)
+        log_queue = queue.Queue()
+        handler = ReplayRTTHandler(log_queue, str(path), speed=2.0)
+        start_time = time.monotonic()
+        handler.connect("REPLAY")
+        assert get_queued_lines(log_queue)[1:] == ["a", "b", "[RTT GUI] replay finished"]
+        assert time.monotonic() - start_time >= 0.04
+        handler.disconnect()
+
+    def test_missing_recording(self, tmp_path):
+        handler = ReplayRTTHandler(queue.Queue(), str(tmp_path / "missing.rttrec"))
+        with pytest.raises(Exception):
+            handler.connect("REPLAY")
+        assert not handler.is_connected
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,354 @@
+"""
+Tests for the simulated J-Link probe and the RTT handler running against it
+"""
+
+import sys
+import os
+import queue
+import threading
+import time
+import pylink
+import pytest
+
+# Add the libs directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from libs.jlink.rtt_handler import RTTHandler
+from libs.jlink.rtt_handler_interface import CONNECTION_STATE_CONNECTED, CONNECTION_STATE_DISCONNECTED, CONNECTION_STATE_RECONNECTING
+from libs.jlink.rtt_line_framer import RTTLineFramer
+from libs.jlink.rtt_recording import read_recording
+from libs.jlink.simulated_jlink import SimulatedJLink, SimulatedUpBuffer
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+def create_started_jlink(clock, **kwargs):
+    jlink = SimulatedJLink(clock=clock, **kwargs)
+    jlink.open()
+    jlink.connect("SIMULATED_MCU")
+    jlink.rtt_start()
+    return jlink
+
+
+def get_sequence_numbers(lines):
+    return [int(line.split(' ', 1)[0]) for line in lines]
+
+
+class TestSimulatedJLink:
+    """Test the simulated target up-buffer"""
+
+    def test_wraparound_without_loss(self):
+        clock = FakeClock()
+        jlink = create_started_jlink(clock, up_buffer_size=256, bytes_per_s=1000)
+        framer = RTTLineFramer()
+        lines = []
+        for _ in range(100):
+            clock.time += 0.1
+            lines += framer.feed(jlink.rtt_read(0, 64))
+            lines += framer.feed(jlink.rtt_read(0, 64))
+        assert jlink.dropped_write_count == 0
+        assert jlink.read_byte_count > 5 * 256
+        assert get_sequence_numbers(lines) == list(range(len(lines)))
+
+    def test_skip_mode_drops_complete_lines(self):
+        clock = FakeClock()
+        jlink = create_started_jlink(clock, up_buffer_size=256, bytes_per_s=10000, overflow_mode="skip")
+        clock.time += 1.0
+        data = jlink.rtt_read(0, 4096)
+        assert 0 < len(data) < 256
+        assert jlink.dropped_write_count > 0
+        assert jlink.rtt_get_status().HostOverflowCount == jlink.dropped_write_count
+        lines = RTTLineFramer().feed(data)
+        assert all(line.split(' ')[1].startswith('[') for line in lines)
+
+    def test_trim_mode_fills_buffer(self):
+        clock = FakeClock()
+        jlink = create_started_jlink(clock, up_buffer_size=256, bytes_per_s=10000, overflow_mode="trim")
+        clock.time += 1.0
+        assert len(jlink.rtt_read(0, 4096)) == 255
+        assert jlink.dropped_byte_count > 0
+
+    def test_block_mode_stalls_producer(self):
+        clock = FakeClock()
+        jlink = create_started_jlink(clock, up_buffer_size=256, bytes_per_s=10000, overflow_mode="block")
+        framer = RTTLineFramer()
+        lines = []
+        for _ in range(20):
+            clock.time += 1.0
+            lines += framer.feed(jlink.rtt_read(0, 4096))
+        assert jlink.dropped_write_count == 0
+        assert jlink.produced_byte_count < 20 * 256
+        assert get_sequence_numbers(lines) == list(range(len(lines)))
+
+    def test_independent_up_buffers(self):
+        clock = FakeClock()
+        jlink = create_started_jlink(clock, up_buffer_size=256, bytes_per_s=10000,
+                                     additional_up_buffers=[SimulatedUpBuffer(1024, 1000, name="Trace")])
+        assert jlink.rtt_get_num_up_buffers() == 2
+        assert jlink.rtt_get_buf_descriptor(1, True).acName == "Trace"
+        assert jlink.rtt_get_buf_descriptor(1, True).SizeOfBuffer == 1024
+        clock.time += 0.5
+        assert len(jlink.rtt_read(0, 4096)) < 256
+        trace_lines = RTTLineFramer().feed(jlink.rtt_read(1, 4096))
+        assert get_sequence_numbers(trace_lines) == list(range(len(trace_lines)))
+        assert jlink.up_buffers[1].dropped_write_count == 0
+        with pytest.raises(pylink.JLinkException):
+            jlink.rtt_read(2, 1024)
+
+    def test_reset_and_disconnect(self):
+        clock = FakeClock()
+        jlink = create_started_jlink(clock)
+        jlink.simulate_reset()
+        with pytest.raises(pylink.JLinkException):
+            jlink.rtt_read(0, 1024)
+        jlink.rtt_start()
+        jlink.rtt_read(0, 1024)
+        jlink.simulate_disconnect()
+        with pytest.raises(pylink.JLinkException):
+            jlink.rtt_read(0, 1024)
+        with pytest.raises(pylink.JLinkException):
+            jlink.connect("UNKNOWN_MCU")
+
+
+class TestRTTHandlerWithSimulatedJLink:
+    """Test the RTT read loop against the simulated probe"""
+
+    def _get_lines(self, log_queue, timeout_s):
+        lines = []
+        end_time = time.monotonic() + timeout_s
+        while time.monotonic() < end_time:
+            try:
+                item = log_queue.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            lines.extend(item["lines"] if "lines" in item else [item["line"].strip()])
+        return lines
+
+    def test_supported_devices(self):
+        handler = RTTHandler(queue.Queue(), jlink=SimulatedJLink())
+        assert "SIMULATED_MCU" in handler.get_supported_mcus()
+
+    def test_lines_are_received_without_loss(self):
+        log_queue = queue.Queue()
+        handler = RTTHandler(log_queue, jlink=SimulatedJLink(up_buffer_size=16384, bytes_per_s=200000))
+        assert handler.connect("SIMULATED_MCU")
+        lines = self._get_lines(log_queue, 0.5)
+        handler.disconnect()
+        data_lines = [line for line in lines if line[0].isdigit()]
+        assert len(data_lines) > 100
+        assert get_sequence_numbers(data_lines) == list(range(len(data_lines)))
+        assert handler.get_read_statistics()["overflow_events"] == 0
+
+    def _get_channel_lines(self, log_queue, timeout_s):
+        channel_lines = {}
+        status_lines = []
+        end_time = time.monotonic() + timeout_s
+        while time.monotonic() < end_time:
+            try:
+                item = log_queue.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if "lines" in item:
+                channel_lines.setdefault(item["channel"], []).extend(item["lines"])
+            else:
+                status_lines.append(item["line"].strip())
+        return channel_lines, status_lines
+
+    def test_all_up_channels_are_read(self):
+        log_queue = queue.Queue()
+        # a busy terminal channel must not starve the slow trace channel
+        jlink = SimulatedJLink(up_buffer_size=16384, bytes_per_s=400000,
+                               additional_up_buffers=[SimulatedUpBuffer(512, 5000, name="Trace")])
+        handler = RTTHandler(log_queue, jlink=jlink, read_size=512)
+        handler.connect("SIMULATED_MCU")
+        channel_lines, status_lines = self._get_channel_lines(log_queue, 0.5)
+        handler.disconnect()
+        assert [(up_channel.index, up_channel.name, up_channel.read_size) for up_channel in handler.up_channels] == [
+            (0, "Terminal", 512), (1, "Trace", 512)]
+        assert "RTT up-channels: 0 'Terminal' (16384 bytes), 1 'Trace' (512 bytes)" in status_lines
+        assert sorted(channel_lines) == [0, 1]
+        for lines in channel_lines.values():
+            assert len(lines) > 10
+            assert get_sequence_numbers(lines) == list(range(len(lines)))
+        assert jlink.up_buffers[1].dropped_write_count == 0
+
+    def test_selected_up_channels(self):
+        log_queue = queue.Queue()
+        jlink = SimulatedJLink(bytes_per_s=20000, additional_up_buffers=[SimulatedUpBuffer(1024, 20000, name="Trace")])
+        handler = RTTHandler(log_queue, jlink=jlink, channels=[1, 5])
+        handler.connect("SIMULATED_MCU")
+        channel_lines, _ = self._get_channel_lines(log_queue, 0.3)
+        handler.disconnect()
+        assert [up_channel.index for up_channel in handler.up_channels] == [1]
+        assert list(channel_lines) == [1]
+
+    def test_full_buffer_is_read_again_immediately(self):
+        class FloodedJLink(SimulatedJLink):
+            """Simulated J-Link whose target fills the complete up-buffer between two reads"""
+
+            def rtt_read(self, buffer_index, num_bytes):
+                clock.time += 1.0
+                return super().rtt_read(buffer_index, num_bytes)
+
+        clock = FakeClock()
+        handler = RTTHandler(queue.Queue(), jlink=FloodedJLink(up_buffer_size=256, overflow_mode="trim", clock=clock),
+                             min_poll_interval_s=0.2, max_poll_interval_s=0.2)
+        handler.connect("SIMULATED_MCU")
+        time.sleep(0.3)
+        handler.disconnect()
+        statistics = handler.get_read_statistics()
+        # reads returning the 255 bytes a 256 byte ring buffer holds are not followed by a poll interval
+        assert statistics["full_reads"] > 20
+        assert statistics["total_reads"] > 20
+
+    def test_read_after_disconnect_timeout_is_not_recorded(self, tmp_path):
+        class StallingJLink(SimulatedJLink):
+            """Simulated J-Link whose reads stall longer than disconnect waits for the read thread"""
+            stalled = threading.Event()
+            in_stalled_read = threading.Event()
+
+            def rtt_read(self, buffer_index, num_bytes):
+                data = super().rtt_read(buffer_index, num_bytes)
+                if self.stalled.is_set() and data:
+                    self.in_stalled_read.set()
+                    time.sleep(1.5)
+                return data
+
+        jlink = StallingJLink(bytes_per_s=100000)
+        recording_path = str(tmp_path / "session.rttrec")
+        handler = RTTHandler(queue.Queue(), jlink=jlink, recording_path=recording_path)
+        handler.connect("SIMULATED_MCU")
+        time.sleep(0.1)
+        jlink.stalled.set()
+        assert jlink.in_stalled_read.wait(timeout=1)
+        handler.disconnect()
+        recorded_byte_count = sum(len(payload) for _, _, payload in read_recording(recording_path))
+        # the stalled read returns after the recording was closed and is dropped
+        handler._rtt_thread.join(timeout=2)
+        assert not handler._rtt_thread.is_alive()
+        assert sum(len(payload) for _, _, payload in read_recording(recording_path)) == recorded_byte_count
+        assert handler.get_read_statistics()["total_bytes"] > recorded_byte_count
+
+    def test_overflow_is_reported(self):
+        log_queue = queue.Queue()
+        handler = RTTHandler(log_queue, jlink=SimulatedJLink(up_buffer_size=128, bytes_per_s=2000000),
+                             min_poll_interval_s=0.01, max_poll_interval_s=0.01)
+        handler.connect("SIMULATED_MCU")
+        lines = self._get_lines(log_queue, 1.5)
+        handler.disconnect()
+        assert any(line.startswith("[RTT GUI] suspected RTT buffer overflow") for line in lines)
+        assert handler.get_read_statistics()["overflow_events"] > 0
+
+    def test_reconnects_after_target_reset(self):
+        log_queue = queue.Queue()
+        jlink = SimulatedJLink(bytes_per_s=20000)
+        handler = RTTHandler(log_queue, jlink=jlink, block_address_cache_path=None)
+        handler.connect("SIMULATED_MCU", block_address=0x20000400)
+        lines_before_reset = self._get_lines(log_queue, 0.2)
+        jlink.simulate_reset()
+        lines_after_reset = self._get_lines(log_queue, 0.3)
+        assert handler._rtt_thread.is_alive()
+        assert handler.connection_state == CONNECTION_STATE_CONNECTED
+        handler.disconnect()
+        assert any(line[0].isdigit() for line in lines_before_reset)
+        assert any(line.startswith("[RTT GUI] RTT connection lost") for line in lines_after_reset)
+        gap_markers = [line_no for line_no, line in enumerate(lines_after_reset) if "reconnected, no data for" in line]
+        assert len(gap_markers) == 1
+        # the marker is in front of the first data after the reconnect
+        assert lines_after_reset[gap_markers[0] - 1].startswith("[RTT GUI] RTT connection lost")
+        assert lines_after_reset[gap_markers[0] + 1][0].isdigit()
+        # the open probe and the control block address are reused
+        assert jlink.rtt_block_address == 0x20000400
+        assert handler.get_read_statistics()["reconnects"] == 1
+
+    def test_reconnects_after_lost_target(self):
+        log_queue = queue.Queue()
+        jlink = SimulatedJLink(bytes_per_s=20000)
+        handler = RTTHandler(log_queue, jlink=jlink)
+        handler.connect("SIMULATED_MCU")
+        jlink.simulate_disconnect()
+        lines = self._get_lines(log_queue, 0.3)
+        assert jlink.target_connected()
+        handler.disconnect()
+        assert any("reconnected, no data for" in line for line in lines)
+
+    def test_gap_marker_in_front_of_first_data(self):
+        log_queue = queue.Queue()
+        jlink = SimulatedJLink(bytes_per_s=20000)
+        handler = RTTHandler(log_queue, jlink=jlink)
+        handler.connect("SIMULATED_MCU")
+        self._get_lines(log_queue, 0.1)
+        # the target runs again after the reset, but does not log for a while
+        jlink.up_buffers[0].bytes_per_s = 0
+        jlink.simulate_reset()
+        silent_lines = self._get_lines(log_queue, 0.3)
+        assert handler.connection_state == CONNECTION_STATE_CONNECTED
+        assert not any("reconnected, no data for" in line for line in silent_lines)
+        jlink.up_buffers[0].bytes_per_s = 20000
+        lines = self._get_lines(log_queue, 0.2)
+        handler.disconnect()
+        assert "reconnected, no data for" in lines[0]
+        assert int(lines[0].split("no data for ")[1].split(" ms")[0]) >= 300
+        assert lines[1][0].isdigit()
+
+    def test_reconnect_backoff_while_target_is_down(self):
+        class ResettingJLink(SimulatedJLink):
+            """Simulated J-Link whose target firmware needs time to initialize RTT after a reset"""
+            target_ready = True
+            descriptor_call_count = 0
+
+            def rtt_get_buf_descriptor(self, buffer_index, up):
+                self.descriptor_call_count += 1
+                if not self.target_ready:
+                    raise pylink.JLinkException("RTT control block not found")
+                return super().rtt_get_buf_descriptor(buffer_index, up)
+
+        log_queue = queue.Queue()
+        jlink = ResettingJLink(bytes_per_s=20000)
+        handler = RTTHandler(log_queue, jlink=jlink, reconnect_min_backoff_s=0.01, reconnect_max_backoff_s=0.04)
+        handler.connect("SIMULATED_MCU")
+        jlink.target_ready = False
+        jlink.simulate_reset()
+        time.sleep(0.3)
+        assert handler.is_connected
+        assert handler.connection_state == CONNECTION_STATE_RECONNECTING
+        # about 0, 10, 30, 70, 110, ... ms, the backoff is capped
+        assert 5 <= jlink.descriptor_call_count <= 12
+        jlink.target_ready = True
+        lines = self._get_lines(log_queue, 0.3)
+        assert handler.connection_state == CONNECTION_STATE_CONNECTED
+        handler.disconnect()
+        gap_markers = [line for line in lines if "reconnected, no data for" in line]
+        assert len(gap_markers) == 1
+        assert int(gap_markers[0].split("no data for ")[1].split(" ms")[0]) >= 300
+
+    def test_disconnect_ends_reconnect(self):
+        class UnpluggedJLink(SimulatedJLink):
+            """Simulated J-Link that can not connect to the target anymore once unplugged"""
+            unplugged = False
+
+            def connect(self, chip_name, speed='auto', verbose=False):
+                if self.unplugged:
+                    raise pylink.JLinkException("no target")
+                super().connect(chip_name, speed, verbose)
+
+        jlink = UnpluggedJLink()
+        handler = RTTHandler(queue.Queue(), jlink=jlink, reconnect_min_backoff_s=10.0)
+        handler.connect("SIMULATED_MCU")
+        jlink.unplugged = True
+        jlink.close()
+        time.sleep(0.1)
+        assert handler.connection_state == CONNECTION_STATE_RECONNECTING
+        handler.disconnect()
+        assert not handler._rtt_thread.is_alive()
+        assert handler.connection_state == CONNECTION_STATE_DISCONNECTED
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])